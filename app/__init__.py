@@ -18,11 +18,11 @@ login_manager = LoginManager()
 mail = Mail()
 migrate = Migrate()
 
-def create_app():
+def create_app(config_class=Config):
     app = Flask(__name__)
     
     # 🔒 Cargar configuración desde la clase Config (que usa variables de entorno)
-    app.config.from_object(Config)
+    app.config.from_object(config_class)
     
     
     # Inicializar extensiones con la app
@@ -37,6 +37,12 @@ def create_app():
     
     # Importar y configurar user_loader DENTRO de create_app
     from app.models.usuarios import User
+    # Registrar el resto de modelos antes de create_all (cart_item -> product, pedido, reporte)
+    from app.models import products, pedidos, reportes, reservas, idempotencia  # noqa: F401
+    # Mantiene pedido.total al escribir las líneas de pedido
+    from app import order_totals  # noqa: F401
+    # Mantiene venta_diaria al pagar, cancelar, editar o borrar pedidos
+    from app import sales_rollup  # noqa: F401
     
     @login_manager.user_loader
     def load_user(user_id):
@@ -66,6 +72,27 @@ def create_app():
             print(f"⚠️  No se pudo crear el admin: {e}")
             print("💡 Ejecuta: flask db migrate && flask db upgrade")
     
+    # Índice de texto completo del catálogo (FTS5 en SQLite, FULLTEXT en MySQL): lo crea la
+    # migración o `flask products search-index`; aquí solo se detecta para elegir el motor
+    with app.app_context():
+        try:
+            from app.search import detect_backend
+            app.extensions['search_backend'] = detect_backend()
+            if app.extensions['search_backend'] == 'like':
+                print("⚠️  Sin índice de búsqueda: se usa LIKE. Ejecuta: flask db upgrade")
+        except Exception as e:
+            db.session.rollback()
+            print(f"⚠️  No se pudo comprobar el índice de búsqueda: {e}")
+    
+    # Caché del catálogo (se invalida sola en cada commit que toque productos)
+    from app.cache import catalog_cache, stats_cache, analytics_cache
+    catalog_cache.configure(
+        maxsize=app.config.get('CATALOG_CACHE_SIZE', 1024),
+        ttl=app.config.get('CATALOG_CACHE_TTL', 300)
+    )
+    stats_cache.configure(ttl=app.config.get('DASHBOARD_STATS_TTL', 30))
+    analytics_cache.configure(ttl=app.config.get('ANALYTICS_CACHE_TTL', 600))
+    
     # ✅ RUTA PRINCIPAL - Página de inicio con todos los productos
     @app.route('/')
     def index():
@@ -75,36 +102,44 @@ def create_app():
         page = request.args.get('page', 1, type=int)
         per_page = 30  # ✅ 30 productos por página (no 6)
         
-        # Obtener productos con paginación
-        products_query = Productos.query.filter_by(status='Activo')
-        pagination = products_query.paginate(
-            page=page, 
-            per_page=per_page,
-            error_out=False
-        )
-        
-        products = pagination.items
+        def load_page():
+            # Obtener productos con paginación
+            products_query = Productos.query.filter_by(status='Activo')
+            pagination = products_query.paginate(
+                page=page, 
+                per_page=per_page,
+                error_out=False
+            )
+            
+            # Convertir productos a formato para la template
+            products_data = []
+            for product in pagination.items:
+                products_data.append({
+                    'id': product.idProduct,
+                    'name': product.nameProduct,
+                    'description': product.description or '',
+                    'price': float(product.price),
+                    'image_url': product.image or f'https://via.placeholder.com/300x400/f8f9fa/000?text={product.nameProduct}',
+                    'category': product.category,
+                    'stock': product.stock,
+                    'status': product.status
+                })
+            
+            return {
+                'products': products_data,
+                'total_pages': pagination.pages,
+                'has_next': pagination.has_next,
+                'has_prev': pagination.has_prev
+            }
         
-        # Convertir productos a formato para la template
-        products_data = []
-        for product in products:
-            products_data.append({
-                'id': product.idProduct,
-                'name': product.nameProduct,
-                'description': product.description or '',
-                'price': float(product.price),
-                'image_url': product.image or f'https://via.placeholder.com/300x400/f8f9fa/000?text={product.nameProduct}',
-                'category': product.category,
-                'stock': product.stock,
-                'status': product.status
-            })
+        data = catalog_cache.get_or_set(('index', page, per_page), load_page)
         
         return render_template('index.html', 
-                             products=products_data,
+                             products=data['products'],
                              current_page=page,
-                             total_pages=pagination.pages,
-                             has_next=pagination.has_next,
-                             has_prev=pagination.has_prev)
+                             total_pages=data['total_pages'],
+                             has_next=data['has_next'],
+                             has_prev=data['has_prev'])
     
     # ✅ VERIFICAR QUE products_bp ESTÉ REGISTRADO SIN url_prefix
     # Registrar blueprints
@@ -112,7 +147,7 @@ def create_app():
     from app.routes.users_route import bp as users_bp
     from app.routes.dashboard import dashboard_bp
     from app.routes.products import products_bp
-    #from app.routes.cart import cart_bp
+    from app.routes.cart import cart_bp
     from app.routes.pedidos import pedidos_bp
     from app.routes.reportes import reportes_bp
     
@@ -125,7 +160,7 @@ def create_app():
     app.register_blueprint(products_bp)  # SIN url_prefix - para que maneje '/'
     
     app.register_blueprint(pedidos_bp)
-    #app.register_blueprint(cart_bp)
+    app.register_blueprint(cart_bp)
     app.register_blueprint(reportes_bp)
     
     return app
\ No newline at end of file
@@ -0,0 +1,315 @@
+"""Analítica de ventas vectorizada: tendencias diarias, medias móviles y cohortes.
+
+Los pedidos pagados se leen por lotes de idPedido (solo idUser, día y total) y
+se guardan en arreglos NumPy que se comparten en caché (orders_frame); cada
+consulta solo filtra y agrega con bincount/unique sin recorrer filas en Python.
+El total se maneja en centavos enteros para que las sumas sean exactas.
+
+NumPy es opcional: si no está instalado todo se calcula con el motor 'sql'
+(GROUP BY en la base de datos), que además sirve de referencia en
+``flask dashboard benchmark-analytics``. Los resultados se guardan en
+analytics_cache por tipo, motor y rango de fechas.
+"""
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from flask import current_app
+from sqlalchemy import Integer, cast, distinct, extract, func, select
+
+from app import db
+from app.cache import analytics_cache
+from app.models.pedidos import Pedido
+from app.sales_rollup import PAID_STATES
+
+try:
+    import numpy as np
+except ImportError:  # Sin NumPy se usa el motor SQL
+    np = None
+
+ENGINES = ('numpy', 'sql')
+
+
+def default_engine():
+    return 'numpy' if np is not None else 'sql'
+
+
+def resolve_engine(engine=None):
+    """Motor pedido (o el mejor disponible). Lanza ValueError si no se puede usar"""
+    engine = engine or default_engine()
+    if engine not in ENGINES:
+        raise ValueError(f'Motor no válido. Opciones: {", ".join(ENGINES)}')
+    if engine == 'numpy' and np is None:
+        raise ValueError('NumPy no está instalado, usa engine=sql')
+    return engine
+
+
+def _bounds(desde, hasta):
+    """[desde 00:00, hasta+1 00:00) como datetimes"""
+    return datetime.combine(desde, datetime.min.time()), datetime.combine(hasta + timedelta(days=1), datetime.min.time())
+
+
+def _month_index(day):
+    return day.year * 12 + day.month - 1
+
+
+def _month_label(index):
+    return f'{index // 12:04d}-{index % 12 + 1:02d}'
+
+
+def _day(value):
+    # SQLite devuelve DATE() como texto, MySQL como date
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+
+# =======================
+# LECTURA POR LOTES
+# =======================
+def load_orders(end, start=None, chunk_size=None):
+    """Arreglos (idUser, día desde 1970-01-01, centavos) de los pedidos pagados con fecha en [start, end).
+
+    El día y los centavos ya salen convertidos de SQL (DATE() y ROUND(total * 100)) y se leen
+    con Core sobre la tabla, sin construir objetos: NumPy convierte cada lote entero de una vez.
+    """
+    chunk_size = chunk_size or current_app.config.get('ANALYTICS_CHUNK_SIZE', 50000)
+    table = Pedido.__table__
+    criteria = [table.c.estado.in_(PAID_STATES), table.c.fecha < end]
+    if start is not None:
+        criteria.append(table.c.fecha >= start)
+    statement = select(
+        table.c.idPedido,
+        table.c.idUser,
+        func.date(table.c.fecha),
+        cast(func.round(table.c.total * 100), Integer)
+    ).order_by(table.c.idPedido).limit(chunk_size)
+
+    users, days, cents = [], [], []
+    last_id = 0
+    while True:
+        rows = db.session.execute(statement.where(table.c.idPedido > last_id, *criteria)).all()
+        if not rows:
+            break
+        ids, user_ids, dates, amounts = zip(*rows)
+        users.append(np.array(user_ids, dtype=np.int64))
+        # SQLite devuelve DATE() como texto y MySQL como date: datetime64 entiende los dos
+        days.append(np.array(dates, dtype='datetime64[D]').astype(np.int64))
+        cents.append(np.array(amounts, dtype=np.int64))
+        last_id = ids[-1]
+
+    if not users:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+    return np.concatenate(users), np.concatenate(days), np.concatenate(cents)
+
+
+def _epoch_day(day):
+    return (day - date(1970, 1, 1)).days
+
+
+def orders_frame(hasta=None):
+    """Arreglos de todos los pedidos pagados hasta hoy (o hasta hasta si es posterior).
+
+    Se cargan una vez y se comparten en analytics_cache: cada tendencia o cohorte solo
+    filtra y agrega en memoria (unos 24 bytes por pedido) sin volver a leer pedido.
+    """
+    last_day = max(hasta or date.min, datetime.utcnow().date())
+    return analytics_cache.get_or_set(('pedidos', last_day), lambda: load_orders(_bounds(last_day, last_day)[1]))
+
+
+# =======================
+# VENTAS DIARIAS
+# =======================
+def _daily_numpy(desde, hasta, frame=None):
+    _, days, cents = frame or orders_frame(hasta)
+    size = (hasta - desde).days + 1
+    offsets = days - _epoch_day(desde)
+    keep = (offsets >= 0) & (offsets < size)
+    orders = np.bincount(offsets[keep], minlength=size)
+    # Centavos enteros en float64: exactos hasta 2**53
+    revenue = np.bincount(offsets[keep], weights=cents[keep], minlength=size)
+    return [int(value) for value in orders], [round(float(value) / 100, 2) for value in revenue]
+
+
+def _daily_sql(desde, hasta):
+    start, end = _bounds(desde, hasta)
+    day = func.date(Pedido.fecha)
+    rows = db.session.query(day, func.count(Pedido.idPedido), func.sum(Pedido.total)).filter(
+        Pedido.estado.in_(PAID_STATES), Pedido.fecha >= start, Pedido.fecha < end
+    ).group_by(day).all()
+
+    size = (hasta - desde).days + 1
+    orders = [0] * size
+    revenue = [0.0] * size
+    for value, count, total in rows:
+        index = (_day(value) - desde).days
+        orders[index] = int(count)
+        revenue[index] = float(Decimal(str(total or 0)).quantize(Decimal('0.01')))
+    return orders, revenue
+
+
+def moving_average(values, window=7):
+    """Media móvil hacia atrás; los primeros días promedian los disponibles"""
+    if not values:
+        return []
+    window = max(int(window), 1)
+    if np is not None:
+        data = np.asarray(values, dtype=np.float64)
+        sums = np.cumsum(data)
+        sums[window:] = sums[window:] - sums[:-window]
+        counts = np.minimum(np.arange(1, len(data) + 1), window)
+        return [round(float(value), 2) for value in sums / counts]
+
+    result = []
+    running = 0.0
+    for i, value in enumerate(values):
+        running += value
+        if i >= window:
+            running -= values[i - window]
+        result.append(round(running / min(i + 1, window), 2))
+    return result
+
+
+def daily_sales(desde, hasta, window=7, engine=None):
+    """Pedidos e ingresos por día entre desde y hasta (incluidos), con su media móvil"""
+    engine = resolve_engine(engine)
+
+    def load():
+        orders, revenue = _daily_numpy(desde, hasta) if engine == 'numpy' else _daily_sql(desde, hasta)
+        return {
+            'days': [(desde + timedelta(days=i)).isoformat() for i in range(len(orders))],
+            'orders': orders,
+            'revenue': revenue,
+            'total_revenue': round(sum(revenue), 2),
+            'total_orders': sum(orders)
+        }
+
+    data = analytics_cache.get_or_set(('daily', engine, desde, hasta), load)
+    return dict(data, moving_average=moving_average(data['revenue'], window), window=window, engine=engine)
+
+
+# =======================
+# COHORTES
+# =======================
+def _cohort_rows(matrix, first_month):
+    """Lista de cohortes desde la matriz [cohorte, meses desde la primera compra] de clientes activos"""
+    cohorts = []
+    width = len(matrix[0]) if matrix else 0
+    for i, row in enumerate(matrix):
+        size = row[0]
+        if not size:
+            continue
+        active = row[:width - i]  # Solo los meses que ya se pueden observar
+        cohorts.append({
+            'cohorte': _month_label(first_month + i),
+            'clientes': size,
+            'activos': active,
+            'retencion': [round(value / size, 4) for value in active]
+        })
+    return cohorts
+
+
+def _cohorts_numpy(desde, hasta, frame=None):
+    users, days, _ = frame or orders_frame(hasta)
+    first_month, last_month = _month_index(desde), _month_index(hasta)
+    width = last_month - first_month + 1
+    # La cohorte es el mes de la primera compra: cuenta todo el historial hasta hasta
+    keep = days <= _epoch_day(hasta)
+    if not keep.any():
+        return []
+
+    months = days[keep].astype('datetime64[D]').astype('datetime64[M]').astype(np.int64) + 1970 * 12
+    user_ids, user_index = np.unique(users[keep], return_inverse=True)
+    first = np.full(len(user_ids), np.iinfo(np.int64).max, dtype=np.int64)
+    np.minimum.at(first, user_index, months)
+
+    # Pares (cliente, mes) distintos en una sola clave entera: un cliente cuenta una vez por mes activo
+    base = months.min()
+    span = months.max() - base + 1
+    pairs = np.unique(user_index * span + (months - base))
+    month = pairs % span + base
+    cohort = first[pairs // span]
+    keep = (cohort >= first_month) & (cohort <= last_month)
+    cells = (cohort[keep] - first_month) * width + (month[keep] - cohort[keep])
+    matrix = np.bincount(cells, minlength=width * width).reshape(width, width)
+    return _cohort_rows(matrix.tolist(), first_month)
+
+
+def _cohorts_sql(desde, hasta):
+    _, end = _bounds(desde, hasta)
+    first_month, last_month = _month_index(desde), _month_index(hasta)
+    width = last_month - first_month + 1
+
+    month = extract('year', Pedido.fecha) * 12 + extract('month', Pedido.fecha) - 1
+    activity = select(Pedido.idUser, month.label('mes')).where(
+        Pedido.estado.in_(PAID_STATES), Pedido.fecha < end
+    ).distinct().subquery()
+    first = select(
+        activity.c.idUser, func.min(activity.c.mes).label('cohorte')
+    ).group_by(activity.c.idUser).subquery()
+
+    offset = (activity.c.mes - first.c.cohorte).label('offset')
+    rows = db.session.execute(
+        select(first.c.cohorte, offset, func.count(distinct(activity.c.idUser)))
+        .join(first, first.c.idUser == activity.c.idUser)
+        .where(first.c.cohorte >= first_month, first.c.cohorte <= last_month)
+        .group_by(first.c.cohorte, offset)
+    ).all()
+
+    matrix = [[0] * width for _ in range(width)]
+    for cohort, months_after, count in rows:
+        matrix[int(cohort) - first_month][int(months_after)] = int(count)
+    return _cohort_rows(matrix, first_month)
+
+
+def cohorts(desde, hasta, engine=None):
+    """Cohortes por mes de primera compra entre desde y hasta, con clientes activos y retención por mes"""
+    engine = resolve_engine(engine)
+
+    def load():
+        rows = _cohorts_numpy(desde, hasta) if engine == 'numpy' else _cohorts_sql(desde, hasta)
+        return {'cohorts': rows, 'engine': engine}
+
+    return analytics_cache.get_or_set(('cohorts', engine, desde, hasta), load)
+
+
+# =======================
+# BENCHMARK
+# =======================
+def _timed(function, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return round((time.perf_counter() - started) * 1000 / repeat, 2), result
+
+
+def benchmark(desde, hasta, repeat=3):
+    """Tiempo medio en ms de cada motor sin caché y si todos dan el mismo resultado.
+
+    numpy incluye la carga de los pedidos; numpy_en_memoria solo la agregación sobre
+    arreglos ya cargados (el caso habitual con orders_frame en caché).
+    """
+    jobs = {
+        'daily': (_daily_numpy, _daily_sql),
+        'cohorts': (_cohorts_numpy, _cohorts_sql),
+    }
+    results = {}
+    for kind, (numpy_function, sql_function) in jobs.items():
+        timings = {}
+        outputs = []
+        ms, output = _timed(lambda: sql_function(desde, hasta), repeat)
+        timings['sql'] = ms
+        outputs.append(output)
+        if np is not None:
+            end = _bounds(hasta, hasta)[1]
+            ms, output = _timed(lambda: numpy_function(desde, hasta, load_orders(end)), repeat)
+            timings['numpy'] = ms
+            outputs.append(output)
+            frame = load_orders(end)
+            ms, output = _timed(lambda: numpy_function(desde, hasta, frame), repeat)
+            timings['numpy_en_memoria'] = ms
+            outputs.append(output)
+        timings['iguales'] = all(output == outputs[0] for output in outputs)
+        results[kind] = timings
+    return results
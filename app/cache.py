@@ -0,0 +1,203 @@
+"""Caché en memoria para las lecturas del catálogo (TTL + LRU acotado).
+
+Los productos cambian pocas veces al día, así que los listados, detalles y
+categorías se guardan ya serializados y se invalidan automáticamente en cada
+commit que crea, modifica o borra filas de ``product``. Un commit que solo toca
+el stock (una compra, la sincronización del almacén) conserva las entradas que
+no lo muestran, como el mapa de relacionados y las facetas (STOCK_FREE_KEYS).
+"""
+import threading
+import time
+from collections import OrderedDict
+from itertools import chain
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.models.products import Productos
+
+_MISSING = object()
+
+# Columnas de product cuyo cambio solo afecta a las entradas que muestran stock
+STOCK_COLUMNS = frozenset({'stock'})
+
+# Entradas del catálogo (primer elemento de la clave) que no dependen del stock
+STOCK_FREE_KEYS = frozenset({'related_map', 'facets', 'profile'})
+
+
+class TTLCache:
+    """Caché LRU acotada con expiración por tiempo, segura entre hilos"""
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        # Un candado por clave mientras se calcula, para que los hilos concurrentes no repitan el loader
+        self._loading = {}
+        # Sube en cada clear(): un loader que empezó antes no guarda su resultado ya viejo
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def configure(self, maxsize=None, ttl=None):
+        """Ajusta el tamaño y el TTL (se llama desde create_app) y vacía la caché"""
+        with self._lock:
+            if maxsize is not None:
+                self.maxsize = maxsize
+            if ttl is not None:
+                self.ttl = ttl
+            self._data.clear()
+            self.generation += 1
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, generation=None):
+        """Guarda value. Con generation, solo si no hubo un clear() desde entonces"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_set(self, key, loader):
+        """Devuelve el valor cacheado o lo calcula con loader() y lo guarda.
+
+        Si varios hilos fallan a la vez en la misma clave, solo uno ejecuta loader();
+        los demás esperan y reciben su resultado. Si la caché se invalida mientras
+        loader() corre, el valor se devuelve pero no se guarda (puede ser anterior al cambio).
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        with self._lock:
+            key_lock = self._loading.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                entry = self._data.get(key, _MISSING)
+                generation = self.generation
+            if entry is not _MISSING and entry[0] >= time.monotonic():
+                return entry[1]
+            try:
+                value = loader()
+                self.set(key, value, generation)
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+        return value
+
+    def clear(self, keep=None):
+        """Vacía la caché; keep(key) -> True conserva esa entrada"""
+        with self._lock:
+            if keep is None:
+                self._data.clear()
+            else:
+                for key in [key for key in self._data if not keep(key)]:
+                    del self._data[key]
+            self.generation += 1
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+
+# Instancia única para todo el catálogo (configurada en create_app)
+catalog_cache = TTLCache()
+
+# Estadísticas del dashboard: TTL corto, se comparte entre las pestañas de los admins
+stats_cache = TTLCache(maxsize=16, ttl=30)
+
+# Tendencias y cohortes por rango de fechas (se vacía cuando un cambio de estado toca ventas)
+analytics_cache = TTLCache(maxsize=64, ttl=600)
+
+
+# =======================
+# INVALIDACIÓN AUTOMÁTICA
+# =======================
+def _mark(session, scope):
+    """Anota qué invalidar al confirmar: 'stock' solo si todos los cambios fueron de stock"""
+    if session.info.get('catalog_dirty') != 'all':
+        session.info['catalog_dirty'] = scope
+
+
+def _changed_columns(product):
+    state = inspect(product)
+    return {attr.key for attr in state.attrs if attr.history.has_changes()}
+
+
+@event.listens_for(Session, 'before_flush')
+def _track_product_changes(session, flush_context, instances):
+    for obj in chain(session.new, session.deleted):
+        if isinstance(obj, Productos):
+            _mark(session, 'all')
+            return
+    for obj in session.dirty:
+        if isinstance(obj, Productos) and session.is_modified(obj):
+            _mark(session, 'stock' if _changed_columns(obj) <= STOCK_COLUMNS else 'all')
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _track_bulk_product_changes(orm_execute_state):
+    # UPDATE/DELETE masivos (query.update(), update(Productos)) no pasan por el flush
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+        return None
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ is not Productos:
+        return None
+    # Quien solo cambia el stock lo declara con .execution_options(catalog_scope='stock')
+    scope = 'stock' if orm_execute_state.is_update and \
+        orm_execute_state.execution_options.get('catalog_scope') == 'stock' else 'all'
+    result = orm_execute_state.invoke_statement()
+    # Un UPDATE/DELETE que no tocó filas no invalida nada
+    if orm_execute_state.is_insert or getattr(result, 'rowcount', None) != 0:
+        _mark(orm_execute_state.session, scope)
+    return result
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    scope = session.info.pop('catalog_dirty', None)
+    if scope == 'stock':
+        catalog_cache.clear(keep=lambda key: key[0] in STOCK_FREE_KEYS)
+        stats_cache.clear()
+    elif scope:
+        catalog_cache.clear()
+        stats_cache.clear()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('catalog_dirty', None)
@@ -0,0 +1,112 @@
+"""Checkout atómico: convierte los CartItem de un usuario en un Pedido.
+
+Todo ocurre en una transacción:
+
+1. Se leen el carrito y los precios con una consulta (CartItem JOIN product).
+2. El stock se descuenta con UPDATEs condicionales ``WHERE stock - reservas de
+   otros >= cantidad``; si alguno no afecta filas, otro comprador se llevó las
+   unidades y se hace rollback de todo. Solo se bloquean las filas de los
+   productos comprados (nunca la tabla) y siempre en orden de idProduct para
+   evitar interbloqueos.
+3. El pedido y sus líneas se insertan en bloque (order_totals calcula el total
+   desde las líneas), el carrito se vacía con un DELETE
+   (y su contador se pone a 0) y se liberan las reservas del usuario.
+"""
+from decimal import Decimal
+
+from sqlalchemy import insert, update
+
+from app import db, reservations
+from app.models.pedidos import Pedido, DetallePedido
+from app.models.products import Productos
+from app.models.usuarios import CartItem, User
+
+
+class CheckoutError(Exception):
+    """El checkout no se pudo completar (carrito vacío o sin stock suficiente)"""
+
+    def __init__(self, message, product_ids=None):
+        super().__init__(message)
+        self.message = message
+        self.product_ids = product_ids or []
+
+
+def checkout(user_id):
+    """Crea el pedido del carrito de user_id y devuelve el Pedido. Lanza CheckoutError"""
+    try:
+        lines = db.session.query(
+            CartItem.idProduct,
+            CartItem.quantity,
+            Productos.price,
+            Productos.nameProduct
+        ).join(
+            Productos, CartItem.idProduct == Productos.idProduct
+        ).filter(
+            CartItem.idUser == user_id,
+            CartItem.quantity > 0
+        ).order_by(CartItem.idProduct).all()
+
+        if not lines:
+            raise CheckoutError('El carrito está vacío')
+
+        # Sumar cantidades por producto (por si hay filas repetidas)
+        quantities = {}
+        prices = {}
+        for line in lines:
+            quantities[line.idProduct] = quantities.get(line.idProduct, 0) + line.quantity
+            prices[line.idProduct] = Decimal(line.price)
+
+        # Descuento condicional de stock: nunca deja stock negativo aunque haya compras simultáneas
+        sold_out = []
+        for product_id in sorted(quantities):
+            quantity = quantities[product_id]
+            result = db.session.execute(
+                update(Productos)
+                .where(
+                    Productos.idProduct == product_id,
+                    # Las unidades reservadas por otros carritos no se pueden vender
+                    Productos.stock - reservations.held_quantity(exclude_user=user_id) >= quantity
+                )
+                .values(stock=Productos.stock - quantity)
+                # Solo cambia el stock: la caché conserva relacionados y facetas
+                .execution_options(synchronize_session=False, catalog_scope='stock')
+            )
+            if result.rowcount != 1:
+                sold_out.append(product_id)
+
+        if sold_out:
+            names = [line.nameProduct for line in lines if line.idProduct in sold_out]
+            raise CheckoutError(f'No hay suficiente stock de: {", ".join(dict.fromkeys(names))}', sold_out)
+
+        # Los productos agotados pasan a Inactivo (solo esos cambian el catálogo entero)
+        db.session.execute(
+            update(Productos)
+            .where(
+                Productos.idProduct.in_(list(quantities)),
+                Productos.stock <= 0,
+                Productos.status.is_distinct_from('Inactivo')
+            )
+            .values(status='Inactivo')
+            .execution_options(synchronize_session=False)
+        )
+
+        pedido = Pedido(idUser=user_id, estado='Pendiente')
+        db.session.add(pedido)
+        db.session.flush()
+
+        # pedido.total lo calcula order_totals en SQL al insertar las líneas
+        db.session.execute(insert(DetallePedido), [{
+            'idPedido': pedido.idPedido,
+            'idProduct': product_id,
+            'cantidad': quantity,
+            'precio_unitario': prices[product_id]
+        } for product_id, quantity in quantities.items()])
+
+        CartItem.query.filter(CartItem.idUser == user_id).delete(synchronize_session=False)
+        User.query.filter(User.idUser == user_id).update({User.cart_count: 0}, synchronize_session=False)
+        reservations.release(user_id)
+        db.session.commit()
+        return pedido
+    except Exception:
+        db.session.rollback()
+        raise
@@ -1,5 +1,6 @@
+import hashlib
 from functools import wraps
-from flask import flash, redirect, url_for
+from flask import flash, redirect, url_for, request, make_response, jsonify
 from flask_login import current_user
 
 def admin_required(f):
@@ -12,4 +13,90 @@ def admin_required(f):
             flash('Acceso restringido a administradores', 'danger')
             return redirect(url_for('users.profile'))
         return f(*args, **kwargs)
-    return decorated_function
\ No newline at end of file
+    return decorated_function
+
+def admin_api_required(f):
+    """Versión JSON de admin_required para las APIs: 401 sin sesión y 403 si no es admin"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not current_user.is_authenticated:
+            return jsonify({'error': 'Debes iniciar sesión'}), 401
+        if not current_user.is_admin:
+            return jsonify({'error': 'Acceso restringido a administradores'}), 403
+        return f(*args, **kwargs)
+    return decorated_function
+
+def catalog_etag(f):
+    """GET condicional para el catálogo: responde 304 sin cuerpo si el ETag coincide.
+
+    El cuerpo ya codificado y su ETag (hash del cuerpo) se guardan juntos en catalog_cache
+    por ruta y parámetros: con la entrada en caché no se llama a la vista ni se vuelve a
+    serializar o calcular el hash. Todos los workers y reinicios dan el mismo ETag para el
+    mismo contenido.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        from app.cache import catalog_cache
+        key = ('response', request.path, tuple(sorted(request.args.items(multi=True))))
+        entry = catalog_cache.get(key)
+        if entry is None:
+            generation = catalog_cache.generation
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            body = response.get_data()
+            entry = (body, hashlib.sha1(body).hexdigest(), response.mimetype)
+            # Si el catálogo cambió mientras corría la vista, el cuerpo puede ser viejo: no se guarda
+            catalog_cache.set(key, entry, generation)
+        else:
+            response = None
+
+        body, etag, mimetype = entry
+        if request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+        elif response is None:
+            response = make_response(body, 200)
+            response.mimetype = mimetype
+        response.set_etag(etag)
+        response.cache_control.public = True
+        response.cache_control.no_cache = True  # Siempre revalidar con If-None-Match
+        return response
+    return decorated_function
+
+def idempotent(f):
+    """Respeta la cabecera Idempotency-Key: un reintento recibe la respuesta guardada sin repetir la escritura"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        from app import idempotency
+        key = request.headers.get(idempotency.HEADER)
+        # Sin clave, sin sesión o dentro de otro endpoint idempotente (p. ej. update -> remove): flujo normal
+        if not key or not current_user.is_authenticated or request.environ.get('idempotency.key'):
+            return f(*args, **kwargs)
+        if len(key) > idempotency.MAX_KEY_LENGTH:
+            return jsonify({'success': False, 'message': 'Idempotency-Key demasiado larga'}), 400
+
+        user_id = current_user.idUser
+        fingerprint = idempotency.request_fingerprint()
+        stored = idempotency.claim(user_id, key, request.endpoint, fingerprint)
+        if stored is not None:
+            if stored.status_code is None:
+                return jsonify({'success': False, 'message': 'La petición original todavía está en curso'}), 409
+            if stored.request_hash != fingerprint:
+                return jsonify({'success': False, 'message': 'La Idempotency-Key ya se usó con otra petición'}), 422
+            response = make_response(stored.body, stored.status_code)
+            response.mimetype = 'application/json'
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+
+        request.environ['idempotency.key'] = key
+        try:
+            response = make_response(f(*args, **kwargs))
+        except Exception:
+            idempotency.release(user_id, key)
+            raise
+        if response.status_code >= 500:
+            idempotency.release(user_id, key)
+        else:
+            idempotency.save(user_id, key, response.status_code, response.get_data(as_text=True))
+        return response
+    return decorated_function
@@ -0,0 +1,97 @@
+"""Facetas del catálogo: conteos por categoría y por rango de precio.
+
+Un único GROUP BY (category, rango) sobre los productos activos alimenta las dos
+facetas; el resultado tiene como mucho categorías x rangos filas y se guarda en
+la caché del catálogo.
+"""
+from sqlalchemy import case, func
+
+from app import db
+from app.cache import catalog_cache
+from app.models.products import Productos
+
+# Límites de los rangos de precio: 0-50, 50-100, 100-200, 200-500, 500+
+PRICE_BOUNDS = [0, 50, 100, 200, 500]
+
+
+def price_ranges():
+    """Lista de rangos [{'label', 'min', 'max'}] (max=None en el último)"""
+    ranges = []
+    for i, low in enumerate(PRICE_BOUNDS):
+        high = PRICE_BOUNDS[i + 1] if i + 1 < len(PRICE_BOUNDS) else None
+        ranges.append({
+            'label': f'{low}-{high}' if high is not None else f'{low}+',
+            'min': low,
+            'max': high
+        })
+    return ranges
+
+
+def find_range(label):
+    """Devuelve el rango con esa etiqueta o None"""
+    for price_range in price_ranges():
+        if price_range['label'] == label:
+            return price_range
+    return None
+
+
+def _bucket_expression():
+    whens = [(Productos.price < high, i) for i, high in enumerate(PRICE_BOUNDS[1:])]
+    return case(*whens, else_=len(PRICE_BOUNDS) - 1)
+
+
+def _grouped_counts():
+    """{(categoría, índice_de_rango): cantidad} de los productos activos, en una consulta"""
+    def load():
+        bucket = _bucket_expression().label('bucket')
+        rows = db.session.query(
+            Productos.category, bucket, func.count(Productos.idProduct)
+        ).filter(Productos.status == 'Activo').group_by(Productos.category, bucket)
+        return {(category, index): count for category, index, count in rows}
+
+    return catalog_cache.get_or_set(('facets',), load)
+
+
+def catalog_facets(category=None, price_label=None):
+    """Facetas para los filtros actuales.
+
+    Los conteos por categoría respetan el rango de precio elegido y los conteos por
+    rango respetan la categoría elegida (cada faceta ignora su propio filtro).
+    """
+    counts = _grouped_counts()
+    ranges = price_ranges()
+    selected_index = next((i for i, r in enumerate(ranges) if r['label'] == price_label), None)
+
+    by_category = {}
+    by_range = [0] * len(ranges)
+    total = 0
+    for (cat, index), count in counts.items():
+        by_category.setdefault(cat, 0)
+        if selected_index is None or index == selected_index:
+            by_category[cat] += count
+        if category is None or cat == category:
+            by_range[index] += count
+            if selected_index is None or index == selected_index:
+                total += count
+
+    return {
+        'total': total,
+        'categories': [
+            {'name': cat, 'count': count}
+            for cat, count in sorted(by_category.items(), key=lambda item: (item[0] is None, item[0] or ''))
+        ],
+        'price_ranges': [dict(r, count=by_range[i]) for i, r in enumerate(ranges)]
+    }
+
+
+def filtered_query(category=None, price_label=None):
+    """Consulta de productos activos con los filtros aplicados en SQL"""
+    query = Productos.query.filter(Productos.status == 'Activo')
+    if category:
+        query = query.filter(Productos.category == category)
+    price_range = find_range(price_label) if price_label else None
+    if price_range:
+        query = query.filter(Productos.price >= price_range['min'])
+        if price_range['max'] is not None:
+            query = query.filter(Productos.price < price_range['max'])
+    return query.order_by(Productos.idProduct)
@@ -0,0 +1,147 @@
+"""Carrito de invitado guardado en la sesión firmada.
+
+Los visitantes sin cuenta agregan, cambian y quitan productos sin escribir en
+``cart_item``: el carrito vive en la cookie de sesión como {idProduct: cantidad}.
+Al iniciar sesión se fusiona con los CartItem del usuario en un solo lote.
+"""
+from flask import session, current_app
+from sqlalchemy import insert
+
+from app import db
+from app.models.products import Productos
+from app.models.usuarios import CartItem, User
+
+SESSION_KEY = 'guest_cart'
+
+
+def get_items():
+    """{idProduct: cantidad} del carrito de invitado"""
+    return {int(product_id): quantity for product_id, quantity in session.get(SESSION_KEY, {}).items()}
+
+
+def _save(items):
+    # Las claves de la sesión serializada deben ser str
+    session[SESSION_KEY] = {str(product_id): quantity for product_id, quantity in items.items()}
+    session.modified = True
+
+
+def count():
+    return len(session.get(SESSION_KEY, {}))
+
+
+def add(product, quantity):
+    """Agrega cantidad de un producto validando stock. Devuelve (ok, mensaje)"""
+    if quantity < 1:
+        return False, 'La cantidad debe ser al menos 1'
+    items = get_items()
+    new_quantity = items.get(product.idProduct, 0) + quantity
+    if new_quantity > product.stock:
+        return False, 'No hay suficiente stock disponible'
+    if product.idProduct not in items and len(items) >= current_app.config.get('GUEST_CART_MAX_ITEMS', 50):
+        return False, 'El carrito está lleno, inicia sesión para agregar más productos'
+    items[product.idProduct] = new_quantity
+    _save(items)
+    return True, 'Producto agregado al carrito'
+
+
+def set_quantity(product_id, quantity, stock):
+    """Cambia la cantidad de un producto del carrito. Devuelve (ok, mensaje)"""
+    items = get_items()
+    if product_id not in items:
+        return False, 'Item no encontrado'
+    if quantity > stock:
+        return False, 'No hay suficiente stock disponible'
+    items[product_id] = quantity
+    _save(items)
+    return True, 'Carrito actualizado'
+
+
+def remove(product_id):
+    items = get_items()
+    if items.pop(product_id, None) is None:
+        return False
+    _save(items)
+    return True
+
+
+def clear():
+    session.pop(SESSION_KEY, None)
+
+
+def load():
+    """Carga el carrito de invitado con una sola consulta. Devuelve (items, total) como load_cart"""
+    items = get_items()
+    if not items:
+        return [], 0
+
+    rows = db.session.query(
+        Productos.idProduct,
+        Productos.nameProduct,
+        Productos.price,
+        Productos.image,
+        Productos.stock
+    ).filter(Productos.idProduct.in_(list(items))).order_by(Productos.idProduct).all()
+
+    cart_data = []
+    total = 0
+    for row in rows:
+        price = float(row.price)
+        quantity = items[row.idProduct]
+        product_total = price * quantity
+        total += product_total
+        cart_data.append({
+            # Para el invitado el id del item es el id del producto
+            'id': row.idProduct,
+            'product_id': row.idProduct,
+            'name': row.nameProduct,
+            'price': price,
+            'quantity': quantity,
+            'image': row.image,
+            'stock': row.stock,
+            'subtotal': product_total
+        })
+
+    if len(rows) != len(items):
+        # Productos eliminados desde que se agregaron
+        _save({row.idProduct: items[row.idProduct] for row in rows})
+    return cart_data, total
+
+
+def merge_into_user(user_id):
+    """Fusiona el carrito de invitado con los CartItem del usuario en un solo lote.
+
+    Las cantidades se suman y se limitan al stock disponible. Devuelve cuántos productos se fusionaron.
+    """
+    items = get_items()
+    if not items:
+        return 0
+
+    product_ids = list(items)
+    stock_by_product = dict(
+        db.session.query(Productos.idProduct, Productos.stock).filter(Productos.idProduct.in_(product_ids))
+    )
+    existing = {
+        item.idProduct: item
+        for item in CartItem.query.filter(CartItem.idUser == user_id, CartItem.idProduct.in_(product_ids))
+    }
+
+    new_rows = []
+    merged = 0
+    for product_id, quantity in items.items():
+        stock = stock_by_product.get(product_id) or 0
+        if stock <= 0:
+            continue
+        if product_id in existing:
+            existing[product_id].quantity = min(existing[product_id].quantity + quantity, stock)
+        else:
+            new_rows.append({'idUser': user_id, 'idProduct': product_id, 'quantity': min(quantity, stock)})
+        merged += 1
+
+    if new_rows:
+        db.session.execute(insert(CartItem), new_rows)
+        User.query.filter(User.idUser == user_id).update(
+            {User.cart_count: User.cart_count + len(new_rows)}, synchronize_session=False
+        )
+    db.session.commit()
+    clear()
+    return merged
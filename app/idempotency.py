@@ -0,0 +1,92 @@
+"""Cabecera Idempotency-Key para los endpoints que modifican el carrito o crean pedidos.
+
+La primera petición con una clave la reclama insertando una fila en
+clave_idempotencia (restricción única por usuario y clave) y, al terminar, guarda
+ahí su respuesta. Los reintentos con la misma clave reciben la respuesta guardada
+sin volver a leer ni escribir cart_item o product; si la original sigue en curso
+reciben 409. Las respuestas 5xx no se guardan para que el cliente pueda reintentar
+(por eso los endpoints del carrito responden 500 cuando falla la base de datos).
+
+Solo aplica a usuarios con sesión: el carrito de invitado vive en la cookie y
+reenviar una respuesta guardada sin esa cookie lo dejaría desincronizado.
+"""
+import hashlib
+from datetime import datetime, timedelta
+
+from flask import current_app, request
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models.idempotencia import ClaveIdempotencia
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 64
+
+
+def request_fingerprint():
+    digest = hashlib.sha256()
+    digest.update(f'{request.method} {request.path}\n'.encode('utf-8'))
+    digest.update(request.get_data())
+    return digest.hexdigest()
+
+
+def claim(user_id, key, endpoint, fingerprint):
+    """Reclama la clave. Devuelve None si es nueva o la ClaveIdempotencia existente"""
+    now = datetime.utcnow()
+    ttl = timedelta(hours=current_app.config.get('IDEMPOTENCY_TTL_HOURS', 24))
+    lock = timedelta(seconds=current_app.config.get('IDEMPOTENCY_LOCK_SECONDS', 30))
+
+    existing = ClaveIdempotencia.query.filter_by(idUser=user_id, clave=key).first()
+    if existing is not None:
+        expired = existing.expires_at <= now
+        # Una petición en curso que no terminó (el proceso murió) libera la clave pasado el bloqueo
+        abandoned = existing.status_code is None and existing.created_at <= now - lock
+        if not (expired or abandoned):
+            return existing
+        # flush inmediato: en un mismo flush los INSERT van antes que los DELETE y chocaría con la restricción única
+        db.session.delete(existing)
+        db.session.flush()
+
+    db.session.add(ClaveIdempotencia(
+        idUser=user_id,
+        clave=key,
+        endpoint=endpoint,
+        request_hash=fingerprint,
+        created_at=now,
+        expires_at=now + ttl
+    ))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Otra petición con la misma clave la reclamó entre la lectura y el INSERT
+        db.session.rollback()
+        return ClaveIdempotencia.query.filter_by(idUser=user_id, clave=key).first()
+    return None
+
+
+def save(user_id, key, status_code, body):
+    ClaveIdempotencia.query.filter_by(idUser=user_id, clave=key).update(
+        {'status_code': status_code, 'body': body}, synchronize_session=False
+    )
+    db.session.commit()
+
+
+def release(user_id, key):
+    """Borra la clave sin respuesta para que el cliente pueda reintentar"""
+    db.session.rollback()
+    ClaveIdempotencia.query.filter_by(idUser=user_id, clave=key).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def sweep_expired(batch_size=1000):
+    """Borra las claves vencidas en lotes (un commit por lote). Devuelve cuántas borró"""
+    removed = 0
+    while True:
+        ids = [row[0] for row in db.session.query(ClaveIdempotencia.idClave).filter(
+            ClaveIdempotencia.expires_at <= datetime.utcnow()
+        ).order_by(ClaveIdempotencia.idClave).limit(batch_size)]
+        if not ids:
+            return removed
+        ClaveIdempotencia.query.filter(ClaveIdempotencia.idClave.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        removed += len(ids)
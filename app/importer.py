@@ -0,0 +1,165 @@
+"""Importación masiva de productos desde CSV o JSONL.
+
+El archivo se lee fila a fila (nunca entero en memoria), cada fila se valida con
+las mismas reglas que POST /api/products y las filas válidas se insertan (o
+actualizan, con upsert) en lotes de ``batch_size`` con un commit por lote.
+Los errores se reportan por número de fila sin detener la carga.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+
+from sqlalchemy import insert, update
+
+from app import db
+from app.models.products import Productos, validate_product_data
+
+# Máximo de errores detallados que se devuelven en el reporte
+MAX_REPORTED_ERRORS = 1000
+
+
+def detect_format(filename, default='csv'):
+    """Deduce el formato ('csv' o 'jsonl') por la extensión del archivo"""
+    name = (filename or '').lower()
+    if name.endswith(('.jsonl', '.ndjson', '.json')):
+        return 'jsonl'
+    if name.endswith('.csv'):
+        return 'csv'
+    return default
+
+
+def iter_rows(stream, fmt='csv'):
+    """Genera (número_de_fila, dict) leyendo el archivo en streaming.
+
+    ``stream`` puede ser binario (subida HTTP) o de texto (archivo abierto por la CLI).
+    Las filas JSONL que no son JSON válido se devuelven como ValueError para reportarlas.
+    """
+    if not isinstance(stream, io.TextIOBase):
+        stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+    if fmt == 'csv':
+        # La fila 1 es la cabecera
+        for number, row in enumerate(csv.DictReader(stream), start=2):
+            yield number, {key.strip(): (value or '').strip() for key, value in row.items() if key}
+    elif fmt == 'jsonl':
+        for number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield number, ValueError('JSON inválido')
+                continue
+            if not isinstance(row, dict):
+                yield number, ValueError('Cada línea debe ser un objeto JSON')
+                continue
+            yield number, row
+    else:
+        raise ValueError(f'Formato no soportado: {fmt}')
+
+
+def _row_values(row):
+    """Valores de columnas para una fila (incluye idProduct si la fila trae id)"""
+    values = validate_product_data(row)
+    if row.get('id') not in (None, ''):
+        try:
+            values['idProduct'] = int(row['id'])
+        except (ValueError, TypeError):
+            raise ValueError('El id debe ser un número entero')
+    return values
+
+
+class ImportReport:
+    """Acumula los resultados de una importación"""
+
+    def __init__(self):
+        self.total = 0
+        self.inserted = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, number, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': number, 'message': message})
+
+    def to_dict(self):
+        return {
+            'total': self.total,
+            'inserted': self.inserted,
+            'updated': self.updated,
+            'failed': self.failed,
+            'errors': self.errors
+        }
+
+
+def _write_batch(batch, upsert):
+    """Escribe un lote con un INSERT (y un UPDATE por clave primaria si hay upsert). Devuelve (insertados, actualizados)"""
+    rows = [values for _, values in batch]
+    existing = set()
+    with_id = [values['idProduct'] for values in rows if 'idProduct' in values]
+    if with_id:
+        existing = {
+            product_id for (product_id,) in
+            db.session.query(Productos.idProduct).filter(Productos.idProduct.in_(with_id))
+        }
+        if existing and not upsert:
+            raise ValueError(f'Los productos {sorted(existing)} ya existen (usa upsert)')
+
+    to_update = [values for values in rows if values.get('idProduct') in existing]
+    to_insert = [values for values in rows if values.get('idProduct') not in existing]
+
+    now = datetime.now()
+    if to_insert:
+        # executemany: una sola sentencia INSERT para todo el lote
+        db.session.execute(insert(Productos), [dict(values, created_at=now) for values in to_insert])
+    if to_update:
+        # UPDATE masivo por clave primaria
+        db.session.execute(update(Productos), to_update)
+    return len(to_insert), len(to_update)
+
+
+def _flush_batch(batch, upsert, report):
+    if not batch:
+        return
+    try:
+        inserted, updated = _write_batch(batch, upsert)
+        db.session.commit()
+        report.inserted += inserted
+        report.updated += updated
+    except Exception:
+        db.session.rollback()
+        # El lote falló: reintentar fila a fila para aislar las filas culpables
+        for number, values in batch:
+            try:
+                inserted, updated = _write_batch([(number, values)], upsert)
+                db.session.commit()
+                report.inserted += inserted
+                report.updated += updated
+            except Exception as e:
+                db.session.rollback()
+                report.error(number, str(getattr(e, 'orig', e)))
+
+
+def import_products(rows, batch_size=500, upsert=False):
+    """Importa las filas (iterable de (número, dict)) en lotes y devuelve un ImportReport"""
+    report = ImportReport()
+    batch = []
+    for number, row in rows:
+        report.total += 1
+        if isinstance(row, Exception):
+            report.error(number, str(row))
+            continue
+        try:
+            batch.append((number, _row_values(row)))
+        except ValueError as e:
+            report.error(number, str(e))
+            continue
+        if len(batch) >= batch_size:
+            _flush_batch(batch, upsert, report)
+            batch = []
+    _flush_batch(batch, upsert, report)
+    return report
@@ -0,0 +1,164 @@
+"""Actualización masiva de stock y precios (sincronización con el almacén).
+
+En lugar de un get_or_404 + commit por producto, los cambios se aplican con
+UPDATE ... CASE idProduct WHEN ... por bloques, el estado se recalcula en SQL y
+todo ocurre en una sola transacción.
+"""
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import case, update
+
+from app import db
+from app.models.products import Productos
+
+# Ids por sentencia UPDATE (acota el tamaño del CASE y los parámetros enlazados)
+CHUNK_SIZE = 500
+
+
+def _parse_id(item):
+    """Id entero del cambio o None si falta o no es válido"""
+    raw_id = item.get('id') if isinstance(item, dict) else None
+    # Solo enteros (o texto con un entero): ni listas/objetos, ni 1.5, ni true
+    if isinstance(raw_id, bool) or not isinstance(raw_id, (int, str)):
+        return None
+    try:
+        return int(raw_id)
+    except ValueError:
+        return None
+
+
+def _finite(value):
+    """Decimal del valor; NaN e Infinity (que json acepta) no son precios ni stocks"""
+    number = Decimal(str(value))
+    if not number.is_finite():
+        raise ValueError('Valor no finito')
+    return number
+
+
+def _parse_item(item):
+    """Normaliza un cambio: {'id', 'stock' | 'stock_delta', 'price'}. Lanza ValueError si es inválido"""
+    if not isinstance(item, dict):
+        raise ValueError('Cada cambio debe ser un objeto')
+    product_id = _parse_id(item)
+    if product_id is None:
+        raise ValueError('El id es obligatorio y debe ser numérico')
+
+    if 'stock' in item and 'stock_delta' in item:
+        raise ValueError('Usa stock (absoluto) o stock_delta (relativo), no ambos')
+
+    change = {'id': product_id}
+    try:
+        if 'stock' in item:
+            _finite(item['stock'])
+            change['stock'] = int(item['stock'])
+        if 'stock_delta' in item:
+            _finite(item['stock_delta'])
+            change['stock_delta'] = int(item['stock_delta'])
+        if 'price' in item:
+            change['price'] = _finite(item['price'])
+    except (ValueError, TypeError, InvalidOperation):
+        raise ValueError('Precio y stock deben ser valores numéricos')
+
+    if change.get('stock', 0) < 0 or change.get('price', 0) < 0:
+        raise ValueError('El precio y el stock no pueden ser negativos')
+    if len(change) == 1:
+        raise ValueError('Nada que actualizar (envía stock, stock_delta o price)')
+    return change
+
+
+def _stock_expression(changes):
+    whens = {}
+    for change in changes:
+        if 'stock' in change:
+            whens[change['id']] = change['stock']
+        elif 'stock_delta' in change:
+            new_stock = Productos.stock + change['stock_delta']
+            # Un descuento mayor al stock deja el producto en 0, nunca en negativo
+            whens[change['id']] = case((new_stock < 0, 0), else_=new_stock)
+    if not whens:
+        return None
+    return case(whens, value=Productos.idProduct, else_=Productos.stock)
+
+
+def _price_expression(changes):
+    whens = {change['id']: change['price'] for change in changes if 'price' in change}
+    if not whens:
+        return None
+    return case(whens, value=Productos.idProduct, else_=Productos.price)
+
+
+def apply_stock_updates(items):
+    """Aplica una lista de cambios de stock/precio y devuelve el resultado por id.
+
+    La clave de cada resultado es el id ya convertido a entero (5 y "5" son el mismo
+    producto) o '#posición' si el id no se puede leer. Todo se aplica en una sola
+    transacción: si la base de datos falla, no se aplica nada.
+    """
+    results = {}
+    changes = []
+    seen = set()
+    for position, item in enumerate(items):
+        product_id = _parse_id(item)
+        key = product_id if product_id is not None else f'#{position}'
+        if key in seen:
+            results[key] = {'success': False, 'message': 'Id repetido en el lote'}
+            changes = [c for c in changes if c['id'] != key]
+            continue
+        seen.add(key)
+        try:
+            changes.append(_parse_item(item))
+        except ValueError as e:
+            results[key] = {'success': False, 'message': str(e)}
+
+    try:
+        for start in range(0, len(changes), CHUNK_SIZE):
+            chunk = changes[start:start + CHUNK_SIZE]
+            ids = [change['id'] for change in chunk]
+
+            values = {}
+            stock_expr = _stock_expression(chunk)
+            if stock_expr is not None:
+                values['stock'] = stock_expr
+            price_expr = _price_expression(chunk)
+            if price_expr is not None:
+                values['price'] = price_expr
+
+            db.session.execute(
+                update(Productos)
+                .where(Productos.idProduct.in_(ids))
+                .values(**values)
+                # Sin cambios de precio, la caché del catálogo conserva lo que no muestra stock
+                .execution_options(synchronize_session=False,
+                                   catalog_scope='all' if 'price' in values else 'stock')
+            )
+            # Recalcular el estado con el stock ya actualizado (misma regla que update_product);
+            # solo se tocan las filas cuyo estado cambia
+            status = case((Productos.stock > 0, 'Activo'), else_='Inactivo')
+            db.session.execute(
+                update(Productos)
+                .where(Productos.idProduct.in_(ids), Productos.status.is_distinct_from(status))
+                .values(status=status)
+                .execution_options(synchronize_session=False)
+            )
+
+        # Leer el resultado final de todos los ids en bloques
+        for start in range(0, len(changes), CHUNK_SIZE):
+            ids = [change['id'] for change in changes[start:start + CHUNK_SIZE]]
+            rows = db.session.query(
+                Productos.idProduct, Productos.stock, Productos.price, Productos.status
+            ).filter(Productos.idProduct.in_(ids))
+            for row in rows:
+                results[row.idProduct] = {
+                    'success': True,
+                    'stock': row.stock,
+                    'price': float(row.price) if row.price is not None else None,
+                    'status': row.status
+                }
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    for change in changes:
+        results.setdefault(change['id'], {'success': False, 'message': 'Producto no encontrado'})
+    return results
@@ -0,0 +1,28 @@
+from app import db
+from datetime import datetime
+
+
+# ==========================
+# MODELO CLAVE DE IDEMPOTENCIA
+# ==========================
+class ClaveIdempotencia(db.Model):
+    """Respuesta guardada de una petición con cabecera Idempotency-Key (expira sola)"""
+    __tablename__ = 'clave_idempotencia'
+    __table_args__ = (
+        # Una clave por usuario: el INSERT falla si otra petición ya la reclamó
+        db.UniqueConstraint('idUser', 'clave', name='uq_idempotencia_usuario_clave'),
+        db.Index('ix_idempotencia_expira', 'expires_at'),
+    )
+
+    idClave = db.Column(db.Integer, primary_key=True)
+    idUser = db.Column(db.Integer, db.ForeignKey('user.idUser', ondelete='CASCADE'), nullable=False)
+    clave = db.Column(db.String(64), nullable=False)
+    endpoint = db.Column(db.String(64), nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)  # sha256 del método, ruta y cuerpo
+    status_code = db.Column(db.Integer, nullable=True)  # NULL mientras la petición original está en curso
+    body = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<ClaveIdempotencia {self.clave} Usuario:{self.idUser} {self.status_code}>'
@@ -1,17 +1,24 @@
 from app import db
 from datetime import datetime
+from decimal import Decimal
 
 # ==========================
 # MODELO PEDIDO
 # ==========================
 class Pedido(db.Model):
     __tablename__ = 'pedido'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # Paginación por cursor sobre (fecha, idPedido)
+        db.Index('ix_pedido_fecha', 'fecha', 'idPedido'),
+        {'extend_existing': True}
+    )
 
     idPedido = db.Column(db.Integer, primary_key=True)
     idUser = db.Column(db.Integer, db.ForeignKey('user.idUser', ondelete='CASCADE'), nullable=False)  # Usuario que realizó el pedido
-    fecha = db.Column(db.DateTime, default=datetime.utcnow)
-    total = db.Column(db.Numeric(10, 2), nullable=False)
+    # NOT NULL: es la clave del cursor (fecha, idPedido) y un NULL saldría de la paginación
+    fecha = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    # Se mantiene solo al escribir las líneas (ver app/order_totals.py)
+    total = db.Column(db.Numeric(10, 2), nullable=False, default=0)
     estado = db.Column(
         db.Enum('Pendiente', 'Pagado', 'Enviado', 'Entregado', 'Cancelado', name='estado_pedido'),
         default='Pendiente'
@@ -24,8 +31,16 @@ class Pedido(db.Model):
         return f'<Pedido {self.idPedido} - Usuario {self.idUser} - Estado {self.estado}>'
 
     def calcular_total(self):
-        """Calcula el total sumando los precios de los detalles."""
-        return sum([detalle.cantidad * float(detalle.precio_unitario) for detalle in self.detalles])
+        """Suma exacta (Decimal) de los detalles. Carga las líneas: para mostrar el total usar self.total."""
+        return sum((detalle.precio_unitario * detalle.cantidad for detalle in self.detalles), Decimal('0.00'))
+
+
+# Historial "Mis pedidos": cubre WHERE idUser = ? ORDER BY fecha DESC, idPedido DESC con estado
+# y total incluidos, así la página y el conteo se leen solo del índice sin tocar la tabla
+db.Index(
+    'ix_pedido_usuario_fecha',
+    Pedido.idUser, Pedido.fecha.desc(), Pedido.idPedido.desc(), Pedido.estado, Pedido.total
+)
 
 
 # ==========================
@@ -50,3 +65,24 @@ class DetallePedido(db.Model):
 
     def __repr__(self):
         return f'<DetallePedido Pedido:{self.idPedido} Producto:{self.idProduct} Cantidad:{self.cantidad}>'
+
+
+# ==========================
+# MODELO EVENTO DE PEDIDO
+# ==========================
+class PedidoEvento(db.Model):
+    """Historial de cambios de estado de un pedido (solo se insertan filas, nunca se modifican)"""
+    __tablename__ = 'pedido_evento'
+    __table_args__ = (
+        db.Index('ix_pedido_evento_pedido', 'idPedido', 'fecha'),
+    )
+
+    idEvento = db.Column(db.Integer, primary_key=True)
+    idPedido = db.Column(db.Integer, db.ForeignKey('pedido.idPedido', ondelete='CASCADE'), nullable=False)
+    estado_anterior = db.Column(db.String(20), nullable=False)
+    estado_nuevo = db.Column(db.String(20), nullable=False)
+    idUser = db.Column(db.Integer, db.ForeignKey('user.idUser', ondelete='SET NULL'), nullable=True)  # Quién hizo el cambio
+    fecha = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<PedidoEvento Pedido:{self.idPedido} {self.estado_anterior} -> {self.estado_nuevo}>'
@@ -3,6 +3,11 @@ from datetime import datetime
 
 class Productos(db.Model):
     __tablename__ = 'product'
+    # Índices para los filtros calientes del catálogo (ver migración a7c3e91d5b20)
+    __table_args__ = (
+        db.Index('ix_product_status_category', 'status', 'category', 'idProduct'),
+        db.Index('ix_product_status_created', 'status', 'created_at'),
+    )
     idProduct = db.Column(db.Integer, primary_key=True)
     nameProduct = db.Column(db.String(100))
     description = db.Column(db.Text)
@@ -18,3 +23,32 @@ class Productos(db.Model):
 
     def __repr__(self):
         return f'<Product {self.nameProduct}>'
+
+
+def validate_product_data(data):
+    """Valida los datos de un producto nuevo y devuelve los valores de sus columnas.
+
+    Mismas reglas que POST /api/products; lanza ValueError con el mensaje para el cliente.
+    """
+    # Validar campos requeridos
+    required_fields = ['name', 'category', 'price', 'stock']
+    missing_fields = [field for field in required_fields if field not in data or not data[field]]
+    if missing_fields:
+        raise ValueError(f'Campos requeridos faltantes: {", ".join(missing_fields)}')
+
+    # Validar tipos de datos
+    try:
+        price = float(data['price'])
+        stock = int(data['stock'])
+    except (ValueError, TypeError):
+        raise ValueError('Precio y stock deben ser valores numéricos')
+
+    return {
+        'nameProduct': data['name'],
+        'category': data['category'],
+        'price': price,
+        'stock': stock,
+        'description': data.get('description', ''),
+        'image': data.get('image', ''),
+        'status': 'Activo' if stock > 0 else 'activo'
+    }
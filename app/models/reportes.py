@@ -5,6 +5,11 @@ from decimal import Decimal  # Recomendado para precisión en campos monetarios
 
 class Reporte(db.Model):
     __tablename__ = 'reporte'
+    __table_args__ = (
+        # Listados paginados por cursor (fecha_generacion, idReporte), generales y por usuario
+        db.Index('ix_reporte_fecha', 'fecha_generacion', 'idReporte'),
+        db.Index('ix_reporte_usuario_fecha', 'idUser', 'fecha_generacion', 'idReporte'),
+    )
 
     idReporte = db.Column(db.Integer, primary_key=True)
     idUser = db.Column(db.Integer, db.ForeignKey('user.idUser'), nullable=False)  # Usuario que genera el reporte
@@ -16,6 +21,8 @@ class Reporte(db.Model):
 
     # Relación con detalles del reporte
     detalles = db.relationship('DetalleReporte', backref='reporte', lazy=True, cascade='all, delete-orphan')
+    # Usuario que generó el reporte (sin backref)
+    usuario = db.relationship('User', lazy=True)
 
     def __repr__(self):
         return f'<Reporte {self.idReporte} - Usuario {self.idUser} - {self.tipo}>'
@@ -30,4 +37,80 @@ class DetalleReporte(db.Model):
     descripcion = db.Column(db.String(255), nullable=False)
     monto = db.Column(db.Numeric(10, 2), nullable=False, default=Decimal('0.00'))
     
-    
\ No newline at end of file
+    
+
+class VentaDiaria(db.Model):
+    """Resumen de ventas por día y categoría (pedidos pagados), mantenido en app/sales_rollup.py"""
+    __tablename__ = 'venta_diaria'
+    __table_args__ = (
+        # Clave del resumen: también sirve para leer rangos de días
+        db.UniqueConstraint('dia', 'categoria', name='uq_venta_diaria_dia_categoria'),
+    )
+
+    idVenta = db.Column(db.Integer, primary_key=True)
+    dia = db.Column(db.Date, nullable=False)
+    categoria = db.Column(db.String(50), nullable=False)  # '*' = todas las categorías del día
+    pedidos = db.Column(db.Integer, nullable=False, default=0)
+    unidades = db.Column(db.Integer, nullable=False, default=0)
+    ingresos = db.Column(db.Numeric(12, 2), nullable=False, default=Decimal('0.00'))
+
+    def __repr__(self):
+        return f'<VentaDiaria {self.dia} {self.categoria} - {self.ingresos}>'
+
+
+class VentaPedido(db.Model):
+    """Lo que cada pedido pagado sumó a venta_diaria: al dejar de contarlo se resta exactamente esto"""
+    __tablename__ = 'venta_pedido'
+    __table_args__ = (
+        db.Index('ix_venta_pedido_pedido', 'idPedido'),
+    )
+
+    idVentaPedido = db.Column(db.Integer, primary_key=True)
+    # Sin FK: la fila tiene que sobrevivir al borrado del pedido para poder restarla
+    idPedido = db.Column(db.Integer, nullable=False)
+    dia = db.Column(db.Date, nullable=False)
+    categoria = db.Column(db.String(50), nullable=False)
+    pedidos = db.Column(db.Integer, nullable=False, default=0)
+    unidades = db.Column(db.Integer, nullable=False, default=0)
+    ingresos = db.Column(db.Numeric(12, 2), nullable=False, default=Decimal('0.00'))
+
+    def __repr__(self):
+        return f'<VentaPedido {self.idPedido} {self.dia} {self.categoria} - {self.ingresos}>'
+
+
+class TrabajoReporte(db.Model):
+    """Generación de un reporte en segundo plano (estado, progreso y duración para consultar)"""
+    __tablename__ = 'trabajo_reporte'
+    __table_args__ = (
+        db.Index('ix_trabajo_reporte_estado', 'estado'),
+    )
+
+    idTrabajo = db.Column(db.Integer, primary_key=True)
+    idUser = db.Column(db.Integer, db.ForeignKey('user.idUser', ondelete='CASCADE'), nullable=False)
+    tipo = db.Column(db.String(50), nullable=False)  # Clave del generador: 'ventas', 'pedidos'
+    parametros = db.Column(db.Text, nullable=True)  # JSON con desde/hasta
+    estado = db.Column(
+        db.Enum('Pendiente', 'En proceso', 'Completado', 'Error', name='estado_trabajo'),
+        nullable=False, default='Pendiente'
+    )
+    procesados = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer, nullable=True)
+    idReporte = db.Column(db.Integer, db.ForeignKey('reporte.idReporte', ondelete='SET NULL'), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    # Último avance guardado: un trabajo activo sin avances en REPORT_JOB_STALE_MINUTES se da por abandonado
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=True)
+    duracion_ms = db.Column(db.Integer, nullable=True)
+
+    def progreso(self):
+        """Porcentaje completado (0-100)"""
+        if self.estado == 'Completado':
+            return 100
+        if not self.total:
+            return 0
+        return min(int(self.procesados * 100 / self.total), 99)
+
+    def __repr__(self):
+        return f'<TrabajoReporte {self.idTrabajo} {self.tipo} - {self.estado}>'
@@ -0,0 +1,26 @@
+from app import db
+from datetime import datetime
+
+
+# ==========================
+# MODELO RESERVA DE STOCK
+# ==========================
+class ReservaStock(db.Model):
+    """Unidades apartadas para el carrito de un usuario mientras paga (expiran solas)"""
+    __tablename__ = 'reserva_stock'
+    __table_args__ = (
+        # Stock disponible = stock - SUM(cantidad) de las reservas vigentes del producto
+        db.Index('ix_reserva_producto_expira', 'idProduct', 'expires_at'),
+        db.Index('ix_reserva_usuario', 'idUser'),
+        db.Index('ix_reserva_expira', 'expires_at'),
+    )
+
+    idReserva = db.Column(db.Integer, primary_key=True)
+    idUser = db.Column(db.Integer, db.ForeignKey('user.idUser', ondelete='CASCADE'), nullable=False)
+    idProduct = db.Column(db.Integer, db.ForeignKey('product.idProduct', ondelete='CASCADE'), nullable=False)
+    cantidad = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<ReservaStock Producto:{self.idProduct} Usuario:{self.idUser} Cantidad:{self.cantidad}>'
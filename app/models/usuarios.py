@@ -20,6 +20,8 @@ class User(db.Model, UserMixin):
     verification_code = db.Column(db.String(6), nullable=True)
     verification_code_expiration = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Número de items en cart_item, mantenido junto a cada escritura del carrito
+    cart_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     # Relación con el carrito
     #cart_items = db.relationship('CartItem', backref='user', lazy=True, cascade="all, delete-orphan")
@@ -44,7 +46,33 @@ class User(db.Model, UserMixin):
         return CartItem.query.filter_by(idUser=self.idUser).all()
     
     def get_cart_count(self):
-        return CartItem.query.filter_by(idUser=self.idUser).count()
+        """Items del carrito leídos del contador (sin COUNT sobre cart_item)"""
+        return self.cart_count or 0
+    
+    def adjust_cart_count(self, delta):
+        """Suma delta al contador con un UPDATE atómico (el commit lo hace quien escribe el carrito)"""
+        User.query.filter_by(idUser=self.idUser).update(
+            {User.cart_count: User.cart_count + delta}, synchronize_session=False
+        )
+        db.session.expire(self, ['cart_count'])
+    
+    def set_cart_count(self, value):
+        User.query.filter_by(idUser=self.idUser).update({User.cart_count: value}, synchronize_session=False)
+        db.session.expire(self, ['cart_count'])
+    
+    def reconcile_cart_count(self):
+        """Recalcula el contador desde cart_item (por si se desincronizó)"""
+        self.set_cart_count(CartItem.query.filter_by(idUser=self.idUser).count())
+    
+    @staticmethod
+    def reconcile_all_cart_counts():
+        """Recalcula el contador de todos los usuarios con un solo UPDATE"""
+        count = db.select(db.func.count(CartItem.idCartItem)).where(
+            CartItem.idUser == User.idUser
+        ).scalar_subquery()
+        return db.session.execute(
+            db.update(User).values(cart_count=count).execution_options(synchronize_session=False)
+        ).rowcount
 
     def __repr__(self):
         return f'<User {self.nameUser}>'  
@@ -59,5 +87,5 @@ class CartItem(db.Model):
     quantity = db.Column(db.Integer, default=1, nullable=False)
     added_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    # Relación con producto
-    #product = db.relationship('Product', backref=db.backref('cart_items', lazy=True))
+    # Relación con producto (sin backref: borrar un producto no debe intentar anular cart_item.idProduct)
+    product = db.relationship('Productos', lazy=True)
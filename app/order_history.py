@@ -0,0 +1,36 @@
+"""Historial de pedidos de un cliente ("Mis pedidos").
+
+Todas las consultas usan solo columnas del índice ix_pedido_usuario_fecha
+(idUser, fecha DESC, idPedido DESC, estado, total): la página es un rango del
+índice con LIMIT y cursor, así que cuesta lo mismo con 10 que con 10.000 pedidos,
+y el conteo recorre el índice sin leer la tabla.
+"""
+from sqlalchemy import and_, func, or_
+
+from app import db
+from app.models.pedidos import Pedido
+
+
+def count_user_orders(user_id):
+    return db.session.query(func.count(Pedido.idPedido)).filter(Pedido.idUser == user_id).scalar()
+
+
+def user_orders_page(user_id, limit, after=None):
+    """Una página de pedidos del usuario, del más reciente al más antiguo.
+
+    after es el cursor (fecha, idPedido) del último pedido de la página anterior.
+    Devuelve (filas, has_more) con filas (idPedido, fecha, estado, total).
+    """
+    query = db.session.query(
+        Pedido.idPedido, Pedido.fecha, Pedido.estado, Pedido.total
+    ).filter(Pedido.idUser == user_id)
+
+    if after is not None:
+        fecha, pedido_id = after
+        query = query.filter(or_(
+            Pedido.fecha < fecha,
+            and_(Pedido.fecha == fecha, Pedido.idPedido < pedido_id)
+        ))
+
+    rows = query.order_by(Pedido.fecha.desc(), Pedido.idPedido.desc()).limit(limit + 1).all()
+    return rows[:limit], len(rows) > limit
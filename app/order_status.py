@@ -0,0 +1,131 @@
+"""Cambios de estado de pedidos en bloque con historial en pedido_evento.
+
+Por cada lote de ids (ORDER_STATUS_BATCH_SIZE):
+
+1. Un SELECT ... FOR UPDATE lee el estado actual y bloquea solo esas filas.
+2. Un UPDATE por estado de origen (como mucho dos) aplica el cambio, con el
+   estado de origen en el WHERE como guarda.
+3. Un único INSERT en bloque escribe los eventos del lote y, si el cambio paga
+   o cancela pedidos, se actualiza venta_diaria (sales_rollup.refresh_orders)
+   en la misma transacción.
+
+Cada lote se confirma por separado para no mantener miles de filas bloqueadas.
+Si un lote falla se deshace solo ese lote, sus ids se informan en ``failed`` y se
+sigue con el siguiente: los ids de ``updated`` son exactamente los aplicados.
+"""
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import insert, select, update
+
+from app import db, sales_rollup
+from app.cache import analytics_cache
+from app.models.pedidos import Pedido, PedidoEvento
+
+ESTADOS = Pedido.__table__.c.estado.type.enums
+
+# Transiciones permitidas: estado actual -> estados a los que puede pasar
+TRANSITIONS = {
+    'Pendiente': {'Pagado', 'Cancelado'},
+    'Pagado': {'Enviado', 'Cancelado'},
+    'Enviado': {'Entregado'},
+    'Entregado': set(),
+    'Cancelado': set(),
+}
+
+
+class TransitionError(Exception):
+    """La transición pedida no es válida"""
+
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+def sources_for(estado, from_estado=None):
+    """Estados desde los que se puede pasar a estado (solo from_estado si se indica)"""
+    if estado not in ESTADOS:
+        raise TransitionError(f'Estado no válido. Opciones: {", ".join(ESTADOS)}')
+    sources = {source for source, targets in TRANSITIONS.items() if estado in targets}
+    if from_estado is not None:
+        if from_estado not in sources:
+            raise TransitionError(f'No se puede pasar de {from_estado} a {estado}')
+        sources = {from_estado}
+    if not sources:
+        raise TransitionError(f'Ningún pedido puede pasar a {estado}')
+    return sources
+
+
+def transition(pedido_ids, estado, from_estado=None, user_id=None, batch_size=None):
+    """Pasa los pedidos a estado. Devuelve {'updated': [...], 'skipped': [...], 'not_found': [...], 'failed': [...]}
+
+    Los pedidos cuyo estado actual no permite el cambio se omiten (no se tocan) y se informan en skipped.
+    Los de un lote que falló al escribirse quedan como estaban y se informan en failed.
+    """
+    sources = sources_for(estado, from_estado)
+    batch_size = batch_size or current_app.config.get('ORDER_STATUS_BATCH_SIZE', 500)
+    pedido_ids = sorted({int(pedido_id) for pedido_id in pedido_ids})
+
+    report = {'updated': [], 'skipped': [], 'not_found': [], 'failed': []}
+    for start in range(0, len(pedido_ids), batch_size):
+        chunk = pedido_ids[start:start + batch_size]
+        sales_changed = False
+        # Lo que se informa de este lote solo pasa al reporte si el lote se confirma
+        batch = {'skipped': [], 'not_found': []}
+        try:
+            current = dict(db.session.execute(
+                select(Pedido.idPedido, Pedido.estado)
+                .where(Pedido.idPedido.in_(chunk))
+                .order_by(Pedido.idPedido)
+                .with_for_update()
+            ).all())
+
+            by_source = {}
+            for pedido_id in chunk:
+                if pedido_id not in current:
+                    batch['not_found'].append(pedido_id)
+                elif current[pedido_id] in sources:
+                    by_source.setdefault(current[pedido_id], []).append(pedido_id)
+                else:
+                    batch['skipped'].append({'id': pedido_id, 'estado': current[pedido_id]})
+
+            now = datetime.utcnow()
+            events = []
+            for source, ids in by_source.items():
+                db.session.execute(
+                    update(Pedido)
+                    .where(Pedido.idPedido.in_(ids), Pedido.estado == source)
+                    .values(estado=estado)
+                    .execution_options(synchronize_session=False)
+                )
+                # Pagar suma al resumen diario de ventas y cancelar un pedido pagado lo resta
+                delta = sales_rollup.is_counted(estado) - sales_rollup.is_counted(source)
+                if delta:
+                    sales_rollup.refresh_orders(ids)
+                    sales_changed = True
+                events.extend({
+                    'idPedido': pedido_id,
+                    'estado_anterior': source,
+                    'estado_nuevo': estado,
+                    'idUser': user_id,
+                    'fecha': now
+                } for pedido_id in ids)
+
+            if events:
+                db.session.execute(insert(PedidoEvento), events)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            current_app.logger.exception('Falló el lote de pedidos %s-%s', chunk[0], chunk[-1])
+            report['failed'].extend(chunk)
+            continue
+
+        if sales_changed:
+            # Las tendencias y cohortes en caché ya no reflejan las ventas
+            analytics_cache.clear()
+        report['updated'].extend(event['idPedido'] for event in events)
+        report['skipped'].extend(batch['skipped'])
+        report['not_found'].extend(batch['not_found'])
+
+    report['updated'].sort()
+    return report
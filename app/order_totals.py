@@ -0,0 +1,122 @@
+"""Total de los pedidos mantenido en la columna pedido.total.
+
+Cada vez que se insertan, cambian o borran líneas (DetallePedido), el total de
+sus pedidos se recalcula con un único UPDATE agregado en SQL (SUM(cantidad *
+precio_unitario) sobre DECIMAL, sin pasar por float). Así los listados y los
+reportes leen pedido.total sin cargar las líneas.
+
+- Flush del ORM (add/cambio/delete de DetallePedido): after_flush_postexec.
+- Inserción masiva ``session.execute(insert(DetallePedido), [...])``: do_orm_execute.
+- UPDATE/DELETE masivos sobre detalle_pedido: llamar a recompute_totals(ids) a mano
+  o ``flask pedidos recompute-totals``.
+"""
+from itertools import chain
+
+from sqlalchemy import event, func, select, update
+from sqlalchemy.orm import Session, attributes
+from sqlalchemy.orm.util import identity_key
+
+from app import db
+from app.models.pedidos import Pedido, DetallePedido
+
+pedido_table = Pedido.__table__
+detalle_table = DetallePedido.__table__
+
+
+def total_expression():
+    """Subconsulta correlacionada: suma exacta de las líneas del pedido de la fila exterior"""
+    return select(
+        func.round(func.coalesce(func.sum(detalle_table.c.cantidad * detalle_table.c.precio_unitario), 0), 2)
+    ).where(detalle_table.c.idPedido == pedido_table.c.idPedido).scalar_subquery()
+
+
+def recompute_totals(pedido_ids, session=None):
+    """Recalcula pedido.total de esos pedidos con un UPDATE (no hace commit)"""
+    session = session or db.session
+    pedido_ids = [pedido_id for pedido_id in set(pedido_ids) if pedido_id is not None]
+    if not pedido_ids:
+        return 0
+    result = session.connection().execute(
+        update(pedido_table)
+        .where(pedido_table.c.idPedido.in_(pedido_ids))
+        .values(total=total_expression())
+    )
+    # Los Pedido ya cargados leerán el total nuevo en el próximo acceso (búsqueda por clave, sin recorrer la sesión)
+    for pedido_id in pedido_ids:
+        obj = session.identity_map.get(identity_key(Pedido, pedido_id))
+        if obj is not None:
+            session.expire(obj, ['total'])
+    return result.rowcount
+
+
+def recompute_all(batch_size=1000):
+    """Corrige los totales de todos los pedidos por lotes de idPedido (un commit por lote).
+
+    Solo escribe los pedidos cuyo total no coincide. Devuelve (revisados, corregidos).
+    """
+    checked = fixed = 0
+    last_id = 0
+    while True:
+        ids = [row[0] for row in db.session.execute(
+            select(pedido_table.c.idPedido)
+            .where(pedido_table.c.idPedido > last_id)
+            .order_by(pedido_table.c.idPedido)
+            .limit(batch_size)
+        )]
+        if not ids:
+            return checked, fixed
+        total = total_expression()
+        result = db.session.execute(
+            update(pedido_table)
+            .where(pedido_table.c.idPedido.in_(ids), pedido_table.c.total != total)
+            .values(total=total)
+        )
+        db.session.commit()
+        checked += len(ids)
+        fixed += result.rowcount
+        last_id = ids[-1]
+
+
+# =======================
+# MANTENIMIENTO AUTOMÁTICO
+# =======================
+@event.listens_for(Session, 'before_flush')
+def _track_line_changes(session, flush_context, instances):
+    lines = [obj for obj in chain(session.new, session.dirty, session.deleted) if isinstance(obj, DetallePedido)]
+    if not lines:
+        return
+    pending = session.info.setdefault('pedido_lines', [])
+    for line in lines:
+        # Si la línea cambió de pedido, también hay que recalcular el anterior
+        pending.extend(attributes.get_history(line, 'idPedido').deleted or [])
+        pending.append(line)
+
+
+@event.listens_for(Session, 'after_flush_postexec')
+def _recompute_after_flush(session, flush_context):
+    pending = session.info.pop('pedido_lines', None)
+    if not pending:
+        return
+    # Después del flush las líneas nuevas ya tienen idPedido
+    ids = {item.idPedido if isinstance(item, DetallePedido) else item for item in pending}
+    recompute_totals(ids, session)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _recompute_after_bulk_insert(orm_execute_state):
+    if not orm_execute_state.is_insert:
+        return None
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ is not DetallePedido:
+        return None
+    params = orm_execute_state.parameters
+    rows = params if isinstance(params, list) else [params or {}]
+    ids = {row.get('idPedido') for row in rows}
+    result = orm_execute_state.invoke_statement()
+    recompute_totals(ids, orm_execute_state.session)
+    return result
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('pedido_lines', None)
@@ -0,0 +1,259 @@
+"""Generación de reportes en segundo plano.
+
+POST /reportes/jobs crea un TrabajoReporte y lo encola en un ThreadPoolExecutor
+de REPORT_JOB_WORKERS hilos, así una petición nunca queda ocupada calculando un
+reporte. Cada generador recorre pedido por lotes de idPedido (sin cargar todo
+el historial), inserta los DetalleReporte del lote en bloque y guarda el
+progreso con un commit por lote. El estado vive en la base de datos, así que
+cualquier worker puede responder GET /reportes/jobs/<id>.
+
+Si un lote falla, el reporte a medio hacer (y sus detalles) se borra. Un trabajo
+pendiente o en proceso sin avances en REPORT_JOB_STALE_MINUTES (el proceso murió
+o se reinició y el pool perdió su cola) se marca como Error al crear el siguiente,
+así nunca deja la cola llena para siempre.
+"""
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from flask import current_app
+from sqlalchemy import delete, func, insert, select
+
+from app import db, sales_rollup
+from app.models.pedidos import Pedido
+from app.models.reportes import Reporte, DetalleReporte, TrabajoReporte
+from app.models.usuarios import User
+
+ACTIVE_STATES = ('Pendiente', 'En proceso')
+
+_executor = None
+_executor_lock = threading.Lock()
+# Serializa el conteo de la cola y el INSERT del trabajo dentro del proceso
+_capacity_lock = threading.Lock()
+
+
+class JobError(Exception):
+    """El trabajo no se puede crear (tipo o parámetros no válidos, cola llena)"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+# =======================
+# GENERADORES
+# =======================
+def _orders_report(job, params, estados, titulo):
+    """Un DetalleReporte por pedido entre desde y hasta, en los estados dados"""
+    desde = datetime.strptime(params['desde'], '%Y-%m-%d')
+    hasta = datetime.strptime(params['hasta'], '%Y-%m-%d') + timedelta(days=1)
+    criteria = [Pedido.fecha >= desde, Pedido.fecha < hasta]
+    if estados:
+        criteria.append(Pedido.estado.in_(estados))
+    batch_size = params.get('batch_size', 1000)
+
+    job.total = db.session.execute(select(func.count(Pedido.idPedido)).where(*criteria)).scalar()
+    reporte = Reporte(
+        idUser=job.idUser,
+        tipo=f"{titulo} {params['desde']} a {params['hasta']}",
+        total_pedidos=0,
+        total_ventas=Decimal('0.00')
+    )
+    db.session.add(reporte)
+    db.session.flush()
+    # El trabajo apunta al reporte desde el principio para poder borrarlo si falla a medias
+    job.idReporte = reporte.idReporte
+    db.session.commit()
+
+    total_pedidos = 0
+    total_ventas = Decimal('0.00')
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(Pedido.idPedido, Pedido.fecha, Pedido.estado, Pedido.total, User.nameUser)
+            .join(User, User.idUser == Pedido.idUser, isouter=True)
+            .where(Pedido.idPedido > last_id, *criteria)
+            .order_by(Pedido.idPedido)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+
+        db.session.execute(insert(DetalleReporte), [{
+            'idReporte': reporte.idReporte,
+            'idPedido': row.idPedido,
+            'descripcion': f"Pedido #{row.idPedido} · {row.fecha:%Y-%m-%d} · {row.estado} · {row.nameUser or 'Usuario eliminado'}",
+            'monto': row.total
+        } for row in rows])
+
+        total_pedidos += len(rows)
+        total_ventas += sum((Decimal(row.total) for row in rows), Decimal('0.00'))
+        last_id = rows[-1].idPedido
+        job.procesados = total_pedidos
+        db.session.commit()
+
+    reporte.total_pedidos = total_pedidos
+    reporte.total_ventas = total_ventas
+    return reporte
+
+
+def build_sales(job, params):
+    return _orders_report(job, params, sales_rollup.PAID_STATES, 'Ventas')
+
+
+def build_orders(job, params):
+    return _orders_report(job, params, None, 'Pedidos')
+
+
+# Tipos de reporte disponibles: clave -> generador(job, params) que devuelve el Reporte
+BUILDERS = {
+    'ventas': build_sales,
+    'pedidos': build_orders,
+}
+
+
+# =======================
+# EJECUCIÓN
+# =======================
+def discard_report(reporte_id):
+    """Borra un reporte a medio generar y sus detalles. No hace commit"""
+    db.session.execute(delete(DetalleReporte).where(DetalleReporte.idReporte == reporte_id))
+    db.session.execute(delete(Reporte).where(Reporte.idReporte == reporte_id))
+
+
+def _fail(job, message):
+    if job.idReporte:
+        discard_report(job.idReporte)
+        job.idReporte = None
+    job.estado = 'Error'
+    job.error = message
+
+
+def fail_stale_jobs():
+    """Marca como Error los trabajos activos sin avances en REPORT_JOB_STALE_MINUTES. Devuelve cuántos"""
+    minutes = current_app.config.get('REPORT_JOB_STALE_MINUTES', 30)
+    cutoff = datetime.utcnow() - timedelta(minutes=minutes)
+    stale = TrabajoReporte.query.filter(
+        TrabajoReporte.estado.in_(ACTIVE_STATES),
+        func.coalesce(TrabajoReporte.updated_at, TrabajoReporte.started_at, TrabajoReporte.created_at) < cutoff
+    ).all()
+    for job in stale:
+        _fail(job, f'Trabajo abandonado: sin avances en {minutes} minutos')
+        job.finished_at = datetime.utcnow()
+    if stale:
+        db.session.commit()
+    return len(stale)
+
+
+def _get_executor(workers):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='reportes')
+        return _executor
+
+
+def create_job(user_id, tipo, params):
+    """Valida y guarda el trabajo. Devuelve el TrabajoReporte o lanza JobError.
+
+    El límite REPORT_JOB_MAX_PENDING se comprueba bajo un lock del proceso: con varios
+    procesos (workers de gunicorn) cada uno puede colar un trabajo a la vez, así que
+    la cola puede superar el límite en como mucho procesos - 1 trabajos.
+    """
+    if tipo not in BUILDERS:
+        raise JobError(f'Tipo de reporte no válido. Opciones: {", ".join(BUILDERS)}')
+    try:
+        desde = datetime.strptime(params.get('desde') or '', '%Y-%m-%d')
+        hasta = datetime.strptime(params.get('hasta') or '', '%Y-%m-%d')
+    except ValueError:
+        raise JobError('Debes enviar desde y hasta en formato YYYY-MM-DD')
+    if hasta < desde:
+        raise JobError('La fecha hasta debe ser posterior a desde')
+
+    with _capacity_lock:
+        fail_stale_jobs()
+        active = TrabajoReporte.query.filter(TrabajoReporte.estado.in_(ACTIVE_STATES)).count()
+        if active >= current_app.config.get('REPORT_JOB_MAX_PENDING', 10):
+            raise JobError('Hay demasiados reportes en cola, inténtalo más tarde', 429)
+
+        job = TrabajoReporte(
+            idUser=user_id,
+            tipo=tipo,
+            parametros=json.dumps({
+                'desde': params['desde'],
+                'hasta': params['hasta'],
+                'batch_size': current_app.config.get('REPORT_JOB_BATCH_SIZE', 1000)
+            })
+        )
+        db.session.add(job)
+        db.session.commit()
+        return job
+
+
+def submit(app, job_id):
+    """Encola el trabajo en el pool (o lo ejecuta ya si REPORT_JOB_WORKERS es 0)"""
+    workers = app.config.get('REPORT_JOB_WORKERS', 2)
+    if workers <= 0:
+        run_job(app, job_id)
+        return None
+    return _get_executor(workers).submit(run_job, app, job_id)
+
+
+def run_job(app, job_id):
+    """Ejecuta el trabajo en su propio contexto de aplicación (y su propia sesión)"""
+    with app.app_context():
+        job = db.session.get(TrabajoReporte, job_id)
+        if job is None or job.estado != 'Pendiente':
+            return
+        started = time.monotonic()
+        job.estado = 'En proceso'
+        job.started_at = datetime.utcnow()
+        db.session.commit()
+        try:
+            reporte = BUILDERS[job.tipo](job, json.loads(job.parametros or '{}'))
+            # Si mientras tanto se dio por abandonado, el reporte ya no le pertenece
+            current = db.session.execute(
+                select(TrabajoReporte.estado).where(TrabajoReporte.idTrabajo == job_id)
+            ).scalar()
+            if current != 'En proceso':
+                # Se dio por abandonado mientras se generaba: se borra lo que se escribió después
+                reporte_id = reporte.idReporte
+                db.session.rollback()
+                discard_report(reporte_id)
+                db.session.commit()
+                db.session.remove()
+                return
+            job.idReporte = reporte.idReporte
+            job.estado = 'Completado'
+        except Exception as e:
+            db.session.rollback()
+            print(f"⚠️ Error generando el reporte {job_id}: {e}")
+            job = db.session.get(TrabajoReporte, job_id)
+            _fail(job, str(e))
+        job.finished_at = datetime.utcnow()
+        job.duracion_ms = int((time.monotonic() - started) * 1000)
+        db.session.commit()
+        db.session.remove()
+
+
+def serialize_job(job):
+    return {
+        'id': job.idTrabajo,
+        'tipo': job.tipo,
+        'parametros': json.loads(job.parametros or '{}'),
+        'estado': job.estado,
+        'progreso': job.progreso(),
+        'procesados': job.procesados,
+        'total': job.total,
+        # Mientras se genera el reporte no está completo
+        'reporte_id': job.idReporte if job.estado == 'Completado' else None,
+        'error': job.error,
+        'created_at': job.created_at.isoformat(),
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'duracion_ms': job.duracion_ms
+    }
@@ -0,0 +1,117 @@
+"""Reservas temporales de stock para los carritos en proceso de pago.
+
+Al empezar a pagar, las unidades del carrito quedan apartadas por unos minutos
+(STOCK_HOLD_MINUTES). El stock disponible es ``stock - reservas vigentes`` y se
+calcula con el índice (idProduct, expires_at). Cada reserva se inserta con un
+INSERT ... SELECT condicional, sin bloquear la fila del producto; las reservas
+vencidas se ignoran en todas las consultas y se borran por lotes con sweep_expired().
+"""
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import func, insert, literal, select
+
+from app import db
+from app.models.products import Productos
+from app.models.reservas import ReservaStock
+from app.models.usuarios import CartItem
+
+
+class ReservationError(Exception):
+    """No hay stock disponible para reservar todo el carrito"""
+
+    def __init__(self, message, product_ids=None):
+        super().__init__(message)
+        self.message = message
+        self.product_ids = product_ids or []
+
+
+def held_quantity(now=None, exclude_user=None):
+    """Subconsulta correlacionada: unidades reservadas (vigentes) del producto de la fila exterior"""
+    now = now or datetime.utcnow()
+    query = select(func.coalesce(func.sum(ReservaStock.cantidad), 0)).where(
+        ReservaStock.idProduct == Productos.idProduct,
+        ReservaStock.expires_at > now
+    )
+    if exclude_user is not None:
+        query = query.where(ReservaStock.idUser != exclude_user)
+    return query.scalar_subquery()
+
+
+def available_stock(product_ids, exclude_user=None):
+    """{idProduct: {'stock', 'reserved', 'available'}} en una sola consulta"""
+    if not product_ids:
+        return {}
+    held = held_quantity(exclude_user=exclude_user)
+    rows = db.session.query(Productos.idProduct, Productos.stock, held.label('reserved')).filter(
+        Productos.idProduct.in_(list(product_ids))
+    )
+    return {
+        row.idProduct: {
+            'stock': row.stock or 0,
+            'reserved': int(row.reserved or 0),
+            'available': max((row.stock or 0) - int(row.reserved or 0), 0)
+        }
+        for row in rows
+    }
+
+
+def release(user_id):
+    """Libera las reservas del usuario (no hace commit)"""
+    return ReservaStock.query.filter(ReservaStock.idUser == user_id).delete(synchronize_session=False)
+
+
+def reserve_cart(user_id, minutes=None):
+    """Reserva las unidades del carrito del usuario. Devuelve la fecha de expiración o lanza ReservationError"""
+    minutes = minutes or current_app.config.get('STOCK_HOLD_MINUTES', 10)
+    now = datetime.utcnow()
+    expires_at = now + timedelta(minutes=minutes)
+    try:
+        lines = db.session.query(
+            CartItem.idProduct, func.sum(CartItem.quantity)
+        ).filter(CartItem.idUser == user_id).group_by(CartItem.idProduct).order_by(CartItem.idProduct).all()
+        if not lines:
+            raise ReservationError('El carrito está vacío')
+
+        # Renovar: las reservas anteriores del usuario se reemplazan por las nuevas
+        release(user_id)
+
+        missing = []
+        for product_id, quantity in lines:
+            # INSERT ... SELECT: solo inserta si stock - reservas de otros >= cantidad
+            source = select(
+                literal(user_id), Productos.idProduct, literal(int(quantity)), literal(now), literal(expires_at)
+            ).where(
+                Productos.idProduct == product_id,
+                Productos.stock - held_quantity(now) >= int(quantity)
+            )
+            result = db.session.execute(
+                insert(ReservaStock).from_select(
+                    ['idUser', 'idProduct', 'cantidad', 'created_at', 'expires_at'], source
+                )
+            )
+            if result.rowcount != 1:
+                missing.append(product_id)
+
+        if missing:
+            raise ReservationError('No hay suficiente stock disponible para reservar', missing)
+
+        db.session.commit()
+        return expires_at
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def sweep_expired(batch_size=1000):
+    """Borra las reservas vencidas en lotes (un commit por lote). Devuelve cuántas borró"""
+    removed = 0
+    while True:
+        ids = [row[0] for row in db.session.query(ReservaStock.idReserva).filter(
+            ReservaStock.expires_at <= datetime.utcnow()
+        ).order_by(ReservaStock.idReserva).limit(batch_size)]
+        if not ids:
+            return removed
+        ReservaStock.query.filter(ReservaStock.idReserva.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        removed += len(ids)
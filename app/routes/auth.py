@@ -9,6 +9,7 @@ import random
 import string
 from datetime import datetime, timedelta
 from app.models.products import Productos
+from app import guest_cart
 
 
 # Configurar logging
@@ -333,6 +334,13 @@ def login():
             login_user(user)
             flash('¡Inicio de sesión exitoso!', 'success')
             
+            # 🛒 Pasar el carrito de invitado (sesión) a la cuenta en un solo lote
+            try:
+                guest_cart.merge_into_user(user.idUser)
+            except Exception as e:
+                db.session.rollback()
+                logger.warning(f"No se pudo fusionar el carrito de invitado: {e}")
+            
             # ✅ Redirigir según el rol después del login
             if user.is_admin:
                 return redirect(url_for('users.admin_dashboard'))
@@ -1,62 +1,114 @@
+import click
 from flask import Blueprint, jsonify, request, render_template, flash
 from flask_login import login_required, current_user
 from app import db
-from app.models import CartItem, Product
+from app.models.usuarios import CartItem, User
 from datetime import datetime
 from app.models.products import Productos
+from app import guest_cart
+from app import checkout as checkout_service
+from app import reservations
+from app import idempotency
+from app.decorators import idempotent
 
 
 
 
 cart_bp = Blueprint('cart', __name__)
 
+
+def load_cart(user_id):
+    """Carga el carrito con sus productos en una sola consulta (CartItem LEFT JOIN product).
+
+    Devuelve (items, total, ids_huérfanos): los huérfanos son items cuyo producto ya no existe.
+    """
+    rows = db.session.query(
+        CartItem.idCartItem,
+        CartItem.quantity,
+        Productos.idProduct,
+        Productos.nameProduct,
+        Productos.price,
+        Productos.image,
+        Productos.stock
+    ).outerjoin(
+        Productos, CartItem.idProduct == Productos.idProduct
+    ).filter(
+        CartItem.idUser == user_id
+    ).order_by(CartItem.idCartItem).all()
+
+    items = []
+    orphans = []
+    total = 0
+    for row in rows:
+        if row.idProduct is None:
+            orphans.append(row.idCartItem)
+            continue
+        price = float(row.price)
+        product_total = price * row.quantity
+        total += product_total
+        items.append({
+            'id': row.idCartItem,
+            'product_id': row.idProduct,
+            'name': row.nameProduct,
+            'price': price,
+            'quantity': row.quantity,
+            'image': row.image,
+            'stock': row.stock,
+            'subtotal': product_total
+        })
+    return items, total, orphans
+
+
 @cart_bp.route('/cart')
-@login_required
 def view_cart():
     try:
-        cart_items = current_user.get_cart()
-        total = 0
-        cart_data = []
-        
-        for item in cart_items:
-            # Asegúrate de que el producto existe
-            if item.product:
-                product_total = float(item.product.price) * item.quantity
-                total += product_total
-                
-                cart_data.append({
-                    'id': item.idCartItem,
-                    'product_id': item.product.idProduct,
-                    'name': item.product.nameProduct,
-                    'price': float(item.product.price),
-                    'quantity': item.quantity,
-                    'image': item.product.image,
-                    'subtotal': product_total
-                })
-            else:
-                # Si el producto fue eliminado, elimina el item del carrito
-                db.session.delete(item)
-                db.session.commit()
+        if not current_user.is_authenticated:
+            # Carrito de invitado (sesión)
+            cart_data, total = guest_cart.load()
+            return render_template('cart.html', cart_items=cart_data, total=total)
+        
+        cart_data, total, orphans = load_cart(current_user.idUser)
+        
+        if orphans:
+            # Si el producto fue eliminado, elimina los items del carrito (un solo DELETE)
+            CartItem.query.filter(CartItem.idCartItem.in_(orphans)).delete(synchronize_session=False)
+        
+        if orphans or current_user.get_cart_count() != len(cart_data):
+            # Ya tenemos el carrito completo: se aprovecha para reconciliar el contador
+            current_user.set_cart_count(len(cart_data))
+            db.session.commit()
         
         return render_template('cart.html', cart_items=cart_data, total=total)
     
     except Exception as e:
+        db.session.rollback()
         flash('Error al cargar el carrito', 'danger')
         return render_template('cart.html', cart_items=[], total=0)
 
 @cart_bp.route('/api/cart/add', methods=['POST'])
-@login_required
+@idempotent
 def add_to_cart():
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
         product_id = data.get('product_id')
-        quantity = data.get('quantity', 1)
+        try:
+            quantity = int(data.get('quantity', 1))
+        except (TypeError, ValueError):
+            quantity = 0
+        # Una cantidad 0 o negativa restaría unidades del carrito en lugar de agregarlas
+        if quantity < 1:
+            return jsonify({'success': False, 'message': 'La cantidad debe ser al menos 1'}), 400
         
         # Verificar si el producto existe
-        product = Product.query.get(product_id)
+        product = Productos.query.get(product_id)
         if not product:
             return jsonify({'success': False, 'message': 'Producto no encontrado'})
         
+        if not current_user.is_authenticated:
+            # Invitado: el carrito vive en la sesión, sin escribir en la base de datos
+            ok, message = guest_cart.add(product, quantity)
+            return jsonify({'success': ok, 'message': message, 'cart_count': guest_cart.count()})
+        
         # Verificar si el producto ya está en el carrito
         existing_item = CartItem.query.filter_by(
             idUser=current_user.idUser, 
@@ -80,6 +132,7 @@ def add_to_cart():
                 quantity=quantity
             )
             db.session.add(new_item)
+            current_user.adjust_cart_count(1)
         
         db.session.commit()
         return jsonify({
@@ -90,19 +143,27 @@ def add_to_cart():
     
     except Exception as e:
         db.session.rollback()
-        return jsonify({'success': False, 'message': 'Error al agregar al carrito: ' + str(e)})
+        return jsonify({'success': False, 'message': 'Error al agregar al carrito: ' + str(e)}), 500
 
 @cart_bp.route('/api/cart/update', methods=['POST'])
-@login_required
+@idempotent
 def update_cart_item():
     try:
         data = request.get_json()
         item_id = data.get('item_id')
-        quantity = data.get('quantity')
+        quantity = int(data.get('quantity', 0))
         
         if quantity <= 0:
             return remove_from_cart()
         
+        if not current_user.is_authenticated:
+            # Invitado: item_id es el id del producto
+            product = Productos.query.get(item_id)
+            if not product:
+                return jsonify({'success': False, 'message': 'Item no encontrado'})
+            ok, message = guest_cart.set_quantity(product.idProduct, quantity, product.stock)
+            return jsonify({'success': ok, 'message': message})
+        
         item = CartItem.query.get(item_id)
         if item and item.idUser == current_user.idUser:
             # Verificar stock disponible
@@ -117,18 +178,28 @@ def update_cart_item():
     
     except Exception as e:
         db.session.rollback()
-        return jsonify({'success': False, 'message': 'Error al actualizar el carrito'})
+        return jsonify({'success': False, 'message': 'Error al actualizar el carrito'}), 500
 
 @cart_bp.route('/api/cart/remove', methods=['POST'])
-@login_required
+@idempotent
 def remove_from_cart():
     try:
         data = request.get_json()
         item_id = data.get('item_id')
         
+        if not current_user.is_authenticated:
+            if guest_cart.remove(int(item_id)):
+                return jsonify({
+                    'success': True,
+                    'message': 'Producto eliminado del carrito',
+                    'cart_count': guest_cart.count()
+                })
+            return jsonify({'success': False, 'message': 'Item no encontrado'})
+        
         item = CartItem.query.get(item_id)
         if item and item.idUser == current_user.idUser:
             db.session.delete(item)
+            current_user.adjust_cart_count(-1)
             db.session.commit()
             return jsonify({
                 'success': True, 
@@ -140,26 +211,123 @@ def remove_from_cart():
     
     except Exception as e:
         db.session.rollback()
-        return jsonify({'success': False, 'message': 'Error al eliminar el producto'})
+        return jsonify({'success': False, 'message': 'Error al eliminar el producto'}), 500
 
 @cart_bp.route('/api/cart/clear', methods=['POST'])
-@login_required
+@idempotent
 def clear_cart():
     try:
+        if not current_user.is_authenticated:
+            guest_cart.clear()
+            return jsonify({'success': True, 'message': 'Carrito vaciado'})
+        
         CartItem.query.filter_by(idUser=current_user.idUser).delete()
+        current_user.set_cart_count(0)
         db.session.commit()
         return jsonify({'success': True, 'message': 'Carrito vaciado'})
     
     except Exception as e:
         db.session.rollback()
-        return jsonify({'success': False, 'message': 'Error al vaciar el carrito'})
+        return jsonify({'success': False, 'message': 'Error al vaciar el carrito'}), 500
 
 @cart_bp.route('/api/cart/count')
-@login_required
 def get_cart_count():
     try:
+        if not current_user.is_authenticated:
+            return jsonify({'success': True, 'count': guest_cart.count()})
+        
+        # Se lee del contador de User (ya cargado por Flask-Login), sin consultar cart_item
         count = current_user.get_cart_count()
         return jsonify({'success': True, 'count': count})
     
     except Exception as e:
-        return jsonify({'success': False, 'count': 0})
\ No newline at end of file
+        return jsonify({'success': False, 'count': 0})
+
+@cart_bp.route('/api/cart/count/reconcile', methods=['POST'])
+@login_required
+def reconcile_cart_count():
+    """Recalcula el contador del usuario desde cart_item (antes ?refresh=1 escribía en un GET)"""
+    try:
+        current_user.reconcile_cart_count()
+        db.session.commit()
+        return jsonify({'success': True, 'count': current_user.get_cart_count()})
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': 'Error al recalcular el carrito: ' + str(e)}), 500
+
+@cart_bp.route('/api/cart/checkout', methods=['POST'])
+@login_required
+@idempotent
+def checkout():
+    """Convierte el carrito en un pedido descontando stock de forma atómica"""
+    try:
+        pedido = checkout_service.checkout(current_user.idUser)
+        return jsonify({
+            'success': True,
+            'message': 'Pedido creado correctamente',
+            'pedido': {
+                'id': pedido.idPedido,
+                'total': float(pedido.total),
+                'estado': pedido.estado
+            }
+        }), 201
+    
+    except checkout_service.CheckoutError as e:
+        return jsonify({'success': False, 'message': e.message, 'product_ids': e.product_ids}), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': 'Error al procesar el pedido: ' + str(e)}), 500
+
+@cart_bp.route('/api/cart/reserve', methods=['POST'])
+@login_required
+def reserve_cart():
+    """Aparta el stock del carrito durante STOCK_HOLD_MINUTES mientras el cliente paga"""
+    try:
+        expires_at = reservations.reserve_cart(current_user.idUser)
+        return jsonify({
+            'success': True,
+            'message': 'Stock reservado',
+            'expires_at': expires_at.strftime('%Y-%m-%d %H:%M:%S')
+        })
+    
+    except reservations.ReservationError as e:
+        return jsonify({'success': False, 'message': e.message, 'product_ids': e.product_ids}), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': 'Error al reservar el stock: ' + str(e)}), 500
+
+@cart_bp.route('/api/cart/reserve', methods=['DELETE'])
+@login_required
+def release_cart():
+    try:
+        reservations.release(current_user.idUser)
+        db.session.commit()
+        return jsonify({'success': True, 'message': 'Reserva liberada'})
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': 'Error al liberar la reserva'}), 500
+
+
+@cart_bp.cli.command('sweep-holds')
+@click.option('--batch-size', default=1000, help='Reservas borradas por lote')
+def sweep_holds_command(batch_size):
+    """Borra las reservas de stock vencidas"""
+    removed = reservations.sweep_expired(batch_size)
+    print(f"🧹 Reservas vencidas eliminadas: {removed}")
+
+@cart_bp.cli.command('reconcile-counts')
+def reconcile_counts_command():
+    """Recalcula el contador de items del carrito de todos los usuarios"""
+    updated = User.reconcile_all_cart_counts()
+    db.session.commit()
+    print(f"🔄 Contadores de carrito recalculados: {updated} usuarios")
+
+
+@cart_bp.cli.command('sweep-idempotency-keys')
+@click.option('--batch-size', default=1000, help='Claves borradas por lote')
+def sweep_idempotency_command(batch_size):
+    """Borra las claves de idempotencia vencidas"""
+    removed = idempotency.sweep_expired(batch_size)
+    print(f"🧹 Claves de idempotencia vencidas eliminadas: {removed}")
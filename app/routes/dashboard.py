@@ -1,9 +1,15 @@
-from flask import Blueprint, render_template, jsonify, request, redirect, url_for
+from flask import Blueprint, render_template, jsonify, request, redirect, url_for, current_app
 from flask_login import login_required, current_user, logout_user
 from app import db
-from datetime import datetime
+from datetime import date, datetime, timedelta
+import click
 from app.models.products import Productos
 from app.models.usuarios import User
+from app.models.pedidos import Pedido, DetallePedido
+from app.cache import catalog_cache, stats_cache
+from app.decorators import admin_api_required
+from app import sales_rollup, analytics
+from sqlalchemy import func, select
 import traceback  # ✅ Para mostrar errores en consola
 
 dashboard_bp = Blueprint('dashboard', __name__)
@@ -21,33 +27,11 @@ def dashboard():
 # ESTADÍSTICAS DEL DASHBOARD
 # =======================
 @dashboard_bp.route('/api/dashboard/stats')
-@login_required
+@admin_api_required
 def dashboard_stats():
+    """Resumen del dashboard, compartido unos segundos entre todas las pestañas (DASHBOARD_STATS_TTL)"""
     try:
-        try:
-            from app.models import Order
-        except ImportError:
-            Order = None
-
-        total_products = Productos.query.count()
-        total_orders = Order.query.count() if Order else 0
-        total_users = User.query.count()
-
-        today = datetime.now().date()
-        if Order:
-            today_orders = Order.query.filter(Order.orderDate >= today).all()
-            today_income = sum(float(order.totalAmount) for order in today_orders)
-        else:
-            today_income = 0
-
-        return jsonify({
-            'total_products': total_products,
-            'total_orders': total_orders,
-            'total_users': total_users,
-            'today_income': today_income,
-            'recent_orders': [],
-            'popular_products': []
-        })
+        return jsonify(stats_cache.get_or_set(('dashboard',), load_dashboard_stats))
     except Exception as e:
         print(f"⚠️ Error en dashboard_stats: {e}")
         traceback.print_exc()
@@ -55,16 +39,94 @@ def dashboard_stats():
             'total_products': 0,
             'total_orders': 0,
             'total_users': 0,
+            'today_orders': 0,
             'today_income': 0,
             'recent_orders': [],
             'popular_products': []
         })
 
 
+def load_dashboard_stats(recent_limit=5, popular_limit=5):
+    """Calcula las estadísticas con tres consultas: contadores, pedidos recientes y más vendidos"""
+    # Pedido.fecha se guarda en UTC
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    # Ingresos y ventas solo de pedidos pagados (misma regla que el resumen de ventas)
+    paid = Pedido.estado.in_(sales_rollup.PAID_STATES)
+
+    # 1) Todos los contadores en un solo SELECT con subconsultas escalares
+    counters = db.session.query(
+        select(func.count(Productos.idProduct)).scalar_subquery().label('total_products'),
+        select(func.count(Pedido.idPedido)).scalar_subquery().label('total_orders'),
+        select(func.count(User.idUser)).scalar_subquery().label('total_users'),
+        select(func.count(Pedido.idPedido)).where(Pedido.fecha >= today).scalar_subquery().label('today_orders'),
+        select(func.coalesce(func.sum(Pedido.total), 0)).where(
+            Pedido.fecha >= today, paid
+        ).scalar_subquery().label('today_income')
+    ).one()
+
+    # 2) Pedidos recientes con el nombre del cliente (índice ix_pedido_fecha)
+    recent = db.session.query(
+        Pedido.idPedido, Pedido.fecha, Pedido.total, Pedido.estado, User.nameUser
+    ).join(User, Pedido.idUser == User.idUser).order_by(
+        Pedido.fecha.desc(), Pedido.idPedido.desc()
+    ).limit(recent_limit).all()
+
+    # 3) Productos más vendidos (unidades de pedidos pagados)
+    sold = func.sum(DetallePedido.cantidad).label('sales')
+    popular = db.session.query(
+        Productos.idProduct, Productos.nameProduct, Productos.category, sold
+    ).join(
+        DetallePedido, DetallePedido.idProduct == Productos.idProduct
+    ).join(
+        Pedido, Pedido.idPedido == DetallePedido.idPedido
+    ).filter(paid).group_by(
+        Productos.idProduct, Productos.nameProduct, Productos.category
+    ).order_by(sold.desc()).limit(popular_limit).all()
+
+    return {
+        'total_products': counters.total_products,
+        'total_orders': counters.total_orders,
+        'total_users': counters.total_users,
+        'today_orders': counters.today_orders,
+        'today_income': float(counters.today_income or 0),
+        'recent_orders': [{
+            'id': row.idPedido,
+            'customer': row.nameUser,
+            'date': row.fecha.strftime('%d/%m/%Y %H:%M') if row.fecha else '',
+            'amount': float(row.total),
+            'status': row.estado
+        } for row in recent],
+        'popular_products': [{
+            'id': row.idProduct,
+            'name': row.nameProduct,
+            'category': row.category,
+            'sales': int(row.sales or 0)
+        } for row in popular]
+    }
+
+
+# =======================
+# CACHÉ DEL CATÁLOGO
+# =======================
+@dashboard_bp.route('/api/dashboard/cache', methods=['GET'])
+@admin_api_required
+def cache_stats():
+    """Contadores de la caché del catálogo (hits, misses, evictions) para dimensionarla"""
+    return jsonify(catalog_cache.stats())
+
+
+@dashboard_bp.route('/api/dashboard/cache', methods=['DELETE'])
+@admin_api_required
+def clear_cache():
+    catalog_cache.clear()
+    return jsonify({'message': 'Caché del catálogo vaciada'})
+
+
 # =======================
 # CRUD DE PRODUCTOS
 # =======================
-@dashboard_bp.route('/api/products', methods=['GET'])
+# El listado admin vive en su propia ruta: GET /api/products es el catálogo público (products_bp)
+@dashboard_bp.route('/api/dashboard/products', methods=['GET'])
 @login_required
 def get_products():
     try:
@@ -257,25 +319,96 @@ def get_categories():
 # REPORTES Y CONFIGURACIÓN
 # =======================
 @dashboard_bp.route('/api/reports/sales', methods=['GET'])
-@login_required
+@admin_api_required
 def get_sales_report():
+    """Ventas de los últimos ?dias= días (30 por defecto) leídas del resumen venta_diaria,
+    con la media móvil de ?ventana= días (7 por defecto)"""
     try:
-        return jsonify({
-            'total_sales': 15000.75,
-            'average_order': 125.50,
-            'top_categories': [
-                {'name': 'Vestidos', 'sales': 6500.25},
-                {'name': 'Pantalones', 'sales': 4200.50},
-                {'name': 'Camisas', 'sales': 4300.00}
-            ],
-            'sales_trend': [1200, 1900, 3000, 2500, 2800, 3200]
-        })
+        days = min(max(request.args.get('dias', 30, type=int), 1), current_app.config.get('ANALYTICS_MAX_DAYS', 731))
+        window = min(max(request.args.get('ventana', 7, type=int), 1), 90)
+        report = sales_rollup.sales_report(days)
+        report['moving_average'] = analytics.moving_average(report['sales_trend'], window)
+        return jsonify(report)
     except Exception as e:
         print(f"⚠️ Error generando reporte: {e}")
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
 
+def analytics_range(default_days):
+    """?desde= y ?hasta= (AAAA-MM-DD, incluidos). Lanza ValueError si no son válidos.
+
+    Como el limit de los listados, un rango mayor que ANALYTICS_MAX_DAYS se recorta a los
+    últimos ANALYTICS_MAX_DAYS días hasta hasta.
+    """
+    try:
+        hasta = date.fromisoformat(request.args['hasta']) if request.args.get('hasta') else datetime.utcnow().date()
+        desde = date.fromisoformat(request.args['desde']) if request.args.get('desde') else hasta - timedelta(days=default_days - 1)
+    except ValueError:
+        raise ValueError('Las fechas deben tener el formato AAAA-MM-DD')
+    if hasta < desde:
+        raise ValueError('La fecha hasta debe ser posterior a desde')
+    max_days = current_app.config.get('ANALYTICS_MAX_DAYS', 731)
+    return max(desde, hasta - timedelta(days=max_days - 1)), hasta
+
+
+@dashboard_bp.route('/api/reports/trends', methods=['GET'])
+@admin_api_required
+def get_sales_trends():
+    """Pedidos e ingresos por día entre ?desde= y ?hasta= (90 días por defecto) con media móvil
+    de ?ventana= días. ?engine=numpy|sql elige el motor (por defecto numpy si está instalado)"""
+    try:
+        desde, hasta = analytics_range(90)
+        window = min(max(request.args.get('ventana', 7, type=int), 1), 90)
+        return jsonify(analytics.daily_sales(desde, hasta, window, request.args.get('engine')))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"⚠️ Error calculando tendencias: {e}")
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+
+@dashboard_bp.route('/api/reports/cohorts', methods=['GET'])
+@admin_api_required
+def get_cohorts():
+    """Cohortes por mes de primera compra entre ?desde= y ?hasta= (último año por defecto)
+    con clientes activos y retención en cada mes siguiente"""
+    try:
+        desde, hasta = analytics_range(365)
+        return jsonify(analytics.cohorts(desde, hasta, request.args.get('engine')))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"⚠️ Error calculando cohortes: {e}")
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+
+@dashboard_bp.cli.command('backfill-sales')
+@click.option('--batch-size', default=1000, help='Pedidos por lote')
+@click.option('--desde', default=None, help='Primer día a reconstruir (AAAA-MM-DD)')
+@click.option('--hasta', default=None, help='Último día a reconstruir (AAAA-MM-DD)')
+def backfill_sales_command(batch_size, desde, hasta):
+    """Reconstruye venta_diaria desde los pedidos pagados, por lotes"""
+    desde = date.fromisoformat(desde) if desde else None
+    hasta = date.fromisoformat(hasta) if hasta else None
+    processed = sales_rollup.backfill(batch_size, desde, hasta)
+    print(f"📊 Pedidos sumados al resumen de ventas: {processed}")
+
+
+@dashboard_bp.cli.command('benchmark-analytics')
+@click.option('--desde', required=True, help='Primer día (AAAA-MM-DD)')
+@click.option('--hasta', required=True, help='Último día (AAAA-MM-DD)')
+@click.option('--repeat', default=3, help='Repeticiones por motor')
+def benchmark_analytics_command(desde, hasta, repeat):
+    """Compara el motor numpy con el SQL (tiempo medio sin caché y mismos resultados)"""
+    results = analytics.benchmark(date.fromisoformat(desde), date.fromisoformat(hasta), repeat)
+    for kind, timings in results.items():
+        engines = ', '.join(f'{engine}: {ms} ms' for engine, ms in timings.items() if engine != 'iguales')
+        print(f"⏱️  {kind}: {engines} · resultados iguales: {'sí' if timings['iguales'] else 'NO'}")
+
+
 @dashboard_bp.route('/api/config', methods=['GET'])
 @login_required
 def get_config():
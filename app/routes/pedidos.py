@@ -1,25 +1,246 @@
-from flask import Blueprint, jsonify, request, session, render_template
+import click
+from flask import Blueprint, jsonify, request, session, render_template, current_app, abort
 from flask_login import current_user, login_required
-from app.models.pedidos import Pedido, DetallePedido
-from datetime import datetime 
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import selectinload
+from app.models.pedidos import Pedido, DetallePedido, PedidoEvento
+from datetime import datetime, timedelta
 from app.models.products import Productos
+from app import order_totals, order_status, order_history
 # Para timestamps si necesitas
 
 pedidos_bp = Blueprint('pedidos', __name__)
 
+ESTADOS = Pedido.__table__.c.estado.type.enums
+
+
+def pedidos_query():
+    """Pedidos visibles para el usuario actual (todos si es admin) con detalles y productos.
+
+    selectinload carga los detalles de todos los pedidos en una consulta y sus productos
+    en otra: 3 consultas en total sin importar cuántos pedidos o líneas haya.
+    """
+    query = Pedido.query.options(
+        selectinload(Pedido.detalles).selectinload(DetallePedido.producto)
+    )
+    if not current_user.is_admin:
+        query = query.filter(Pedido.idUser == current_user.idUser)
+    return query
+
+
+def parse_cursor(raw):
+    """'<fecha ISO>,<idPedido>' -> (datetime, int). Lanza ValueError si no es válido"""
+    fecha, pedido_id = raw.rsplit(',', 1)
+    return datetime.fromisoformat(fecha), int(pedido_id)
+
+
+def parse_date(raw):
+    return datetime.strptime(raw, '%Y-%m-%d')
+
+
+def serialize_detalle(detalle):
+    return {
+        'id': detalle.idDetalle,
+        'product_id': detalle.idProduct,
+        'product_name': detalle.producto.nameProduct if detalle.producto else None,
+        'image': detalle.producto.image if detalle.producto else None,
+        'cantidad': detalle.cantidad,
+        'precio_unitario': float(detalle.precio_unitario),
+        'subtotal': detalle.subtotal()
+    }
+
+
+def serialize_pedido(pedido):
+    return {
+        'id': pedido.idPedido,
+        'user_id': pedido.idUser,
+        'fecha': pedido.fecha.isoformat() if pedido.fecha else None,
+        'total': float(pedido.total),
+        'estado': pedido.estado,
+        'detalles': [serialize_detalle(detalle) for detalle in pedido.detalles]
+    }
+
+
 @pedidos_bp.route('/api/pedidos', methods=['GET'])
 @login_required
 def get_pedidos():
-    pedido = Pedido.query.all()
-    detalle = DetallePedido.query.all()
-    return "nada"
+    """Pedidos del más reciente al más antiguo, paginados por cursor sobre (fecha, idPedido).
+
+    Filtros: ?estado=, ?desde=AAAA-MM-DD, ?hasta=AAAA-MM-DD (incluido), ?limit= y ?after=<next_cursor>.
+    """
+    try:
+        limit = request.args.get('limit', current_app.config.get('ORDERS_PAGE_SIZE', 20), type=int)
+        limit = min(max(limit, 1), current_app.config.get('ORDERS_PAGE_MAX', 100))
+
+        query = pedidos_query()
+
+        estado = request.args.get('estado')
+        if estado:
+            if estado not in ESTADOS:
+                return jsonify({'error': f'Estado no válido. Opciones: {", ".join(ESTADOS)}'}), 400
+            query = query.filter(Pedido.estado == estado)
+
+        try:
+            if request.args.get('desde'):
+                query = query.filter(Pedido.fecha >= parse_date(request.args['desde']))
+            if request.args.get('hasta'):
+                query = query.filter(Pedido.fecha < parse_date(request.args['hasta']) + timedelta(days=1))
+        except ValueError:
+            return jsonify({'error': 'Las fechas deben tener el formato AAAA-MM-DD'}), 400
+
+        if request.args.get('after'):
+            try:
+                fecha, pedido_id = parse_cursor(request.args['after'])
+            except ValueError:
+                return jsonify({'error': 'Cursor no válido'}), 400
+            # Keyset: (fecha, idPedido) < cursor, sin OFFSET
+            query = query.filter(or_(
+                Pedido.fecha < fecha,
+                and_(Pedido.fecha == fecha, Pedido.idPedido < pedido_id)
+            ))
+
+        pedidos = query.order_by(Pedido.fecha.desc(), Pedido.idPedido.desc()).limit(limit + 1).all()
+
+        has_more = len(pedidos) > limit
+        pedidos = pedidos[:limit]
+        next_cursor = None
+        if has_more:
+            last = pedidos[-1]
+            next_cursor = f'{last.fecha.isoformat()},{last.idPedido}'
+
+        return jsonify({
+            'pedidos': [serialize_pedido(pedido) for pedido in pedidos],
+            'next_cursor': next_cursor,
+            'has_more': has_more,
+            'limit': limit
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+def get_pedido_or_404(pedido_id):
+    pedido = pedidos_query().filter(Pedido.idPedido == pedido_id).first()
+    if not pedido:
+        # Los pedidos de otros usuarios también dan 404 para no revelar que existen
+        abort(404)
+    return pedido
+
 
 @pedidos_bp.route('/pedidos/<int:pedido_id>')
 @login_required
 def pedido_detail_html(pedido_id):
-    return "nada"
+    pedido = get_pedido_or_404(pedido_id)
+    return render_template('pedido_detail.html', pedido=pedido)
+
 
 @pedidos_bp.route('/api/pedidos/<int:pedido_id>', methods=['GET'])
 @login_required
 def get_pedido_detail(pedido_id):
-    return "nada"
+    pedido = pedidos_query().filter(Pedido.idPedido == pedido_id).first()
+    if not pedido:
+        return jsonify({'error': 'Pedido no encontrado'}), 404
+    return jsonify(serialize_pedido(pedido))
+
+
+def serialize_order_row(row):
+    return {
+        'id': row.idPedido,
+        'fecha': row.fecha.isoformat() if row.fecha else None,
+        'estado': row.estado,
+        'total': float(row.total)
+    }
+
+
+def my_orders_page():
+    """Página de "Mis pedidos" según ?limit= y ?after=. Devuelve el dict de la respuesta o lanza ValueError"""
+    limit = request.args.get('limit', current_app.config.get('ORDERS_PAGE_SIZE', 20), type=int)
+    limit = min(max(limit, 1), current_app.config.get('ORDERS_PAGE_MAX', 100))
+    after = parse_cursor(request.args['after']) if request.args.get('after') else None
+
+    rows, has_more = order_history.user_orders_page(current_user.idUser, limit, after)
+    return {
+        'pedidos': [serialize_order_row(row) for row in rows],
+        'next_cursor': f'{rows[-1].fecha.isoformat()},{rows[-1].idPedido}' if has_more else None,
+        'has_more': has_more,
+        'limit': limit,
+        'count': order_history.count_user_orders(current_user.idUser)
+    }
+
+
+@pedidos_bp.route('/mis-pedidos')
+@login_required
+def my_orders():
+    try:
+        page = my_orders_page()
+    except ValueError:
+        abort(400)
+    return render_template('orders.html', **page)
+
+
+@pedidos_bp.route('/api/mis-pedidos', methods=['GET'])
+@login_required
+def get_my_orders():
+    """Pedidos del usuario actual sin líneas (solo columnas del índice), paginados por cursor"""
+    try:
+        return jsonify(my_orders_page())
+    except ValueError:
+        return jsonify({'error': 'Cursor no válido'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@pedidos_bp.route('/api/pedidos/estado', methods=['POST'])
+@login_required
+def transition_pedidos():
+    """Cambia el estado de muchos pedidos a la vez (solo admin).
+
+    JSON: {"ids": [...], "estado": "Enviado", "desde": "Pagado" (opcional)}
+    """
+    if not current_user.is_admin:
+        return jsonify({'error': 'Acceso restringido a administradores'}), 403
+    try:
+        data = request.get_json(silent=True) or {}
+        ids = data.get('ids')
+        if not isinstance(ids, list) or not ids:
+            return jsonify({'error': 'Debes enviar una lista de ids'}), 400
+        max_ids = current_app.config.get('ORDER_STATUS_MAX_IDS', 10000)
+        if len(ids) > max_ids:
+            return jsonify({'error': f'Máximo {max_ids} pedidos por petición'}), 400
+        try:
+            ids = [int(pedido_id) for pedido_id in ids]
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Los ids deben ser números'}), 400
+
+        report = order_status.transition(ids, data.get('estado'), data.get('desde'), user_id=current_user.idUser)
+        # Un lote fallido no deshace los anteriores: updated dice qué se aplicó y failed qué no
+        return jsonify(dict(report, success=not report['failed']))
+    except order_status.TransitionError as e:
+        return jsonify({'success': False, 'error': e.message}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@pedidos_bp.route('/api/pedidos/<int:pedido_id>/eventos', methods=['GET'])
+@login_required
+def get_pedido_eventos(pedido_id):
+    """Historial de estados del pedido, del más antiguo al más reciente"""
+    query = Pedido.query.with_entities(Pedido.idPedido).filter(Pedido.idPedido == pedido_id)
+    if not current_user.is_admin:
+        query = query.filter(Pedido.idUser == current_user.idUser)
+    if not query.first():
+        return jsonify({'error': 'Pedido no encontrado'}), 404
+    eventos = PedidoEvento.query.filter_by(idPedido=pedido_id).order_by(PedidoEvento.fecha, PedidoEvento.idEvento).all()
+    return jsonify([{
+        'estado_anterior': evento.estado_anterior,
+        'estado_nuevo': evento.estado_nuevo,
+        'user_id': evento.idUser,
+        'fecha': evento.fecha.isoformat()
+    } for evento in eventos])
+
+
+@pedidos_bp.cli.command('recompute-totals')
+@click.option('--batch-size', default=1000, help='Pedidos por lote')
+def recompute_totals_command(batch_size):
+    """Recalcula pedido.total desde las líneas, por lotes en SQL"""
+    checked, fixed = order_totals.recompute_all(batch_size)
+    print(f"🧮 Pedidos revisados: {checked}, totales corregidos: {fixed}")
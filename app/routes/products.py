@@ -1,8 +1,15 @@
-from flask import Blueprint, jsonify, request, render_template, redirect
+import json
+import click
+from flask import Blueprint, jsonify, request, render_template, redirect, current_app, abort, Response, stream_with_context
 from flask_login import login_required, current_user
+from werkzeug.exceptions import HTTPException
 from app import db
-from app.models.products import Productos
+from app.cache import catalog_cache
+from app.decorators import admin_api_required, catalog_etag
+from app import search, importer, inventory, facets, reservations
+from app.models.products import Productos, validate_product_data
 from decimal import Decimal
+from sqlalchemy import func
 
 products_bp = Blueprint('products', __name__)
 
@@ -14,12 +21,13 @@ def index():
     try:
         print("🎯 Accediendo a la página principal...")
         
-        # Obtener productos activos para mostrar en la página principal
-        products = Productos.query.filter_by(status='Activo').limit(12).all()
+        # Obtener productos activos para mostrar en la página principal (cacheados)
+        products = catalog_cache.get_or_set(('home', 12), lambda: [
+            serialize_row(product, list(CATALOG_FIELDS))
+            for product in Productos.query.filter_by(status='Activo').limit(12).all()
+        ])
         
         print(f"📦 Productos encontrados: {len(products)}")
-        for product in products:
-            print(f"   - {product.nameProduct} (ID: {product.idProduct}, Stock: {product.stock})")
         
         # Renderizar la plantilla index.html con los productos
         return render_template('index.html', 
@@ -33,26 +41,233 @@ def index():
                              products=[],
                              current_user=current_user)
 
+# Campos públicos del catálogo -> columna de la tabla product
+CATALOG_FIELDS = {
+    'id': 'idProduct',
+    'name': 'nameProduct',
+    'description': 'description',
+    'price': 'price',
+    'image_url': 'image',
+    'category': 'category',
+    'stock': 'stock',
+    'status': 'status',
+}
+
+
+def parse_fields(raw):
+    """Convierte ?fields=id,name,... en la lista de campos pedidos (None = todos)"""
+    if not raw:
+        return None
+    fields = [f.strip() for f in raw.split(',') if f.strip()]
+    unknown = [f for f in fields if f not in CATALOG_FIELDS]
+    if unknown:
+        raise ValueError(f'Campos desconocidos: {", ".join(unknown)}')
+    return fields
+
+
+def catalog_columns(fields):
+    """Columnas a seleccionar para los campos pedidos (siempre incluye idProduct para el cursor)"""
+    names = ['idProduct'] + [CATALOG_FIELDS[f] for f in fields]
+    if 'image_url' in fields:
+        names.append('nameProduct')  # Necesario para el placeholder de la imagen
+    return [getattr(Productos, name) for name in dict.fromkeys(names)]
+
+
+def serialize_row(row, fields):
+    """Serializa una fila proyectada (o un Productos) con solo los campos pedidos"""
+    item = {}
+    for field in fields:
+        value = getattr(row, CATALOG_FIELDS[field])
+        if field == 'price':
+            value = float(value) if value is not None else None
+        elif field == 'description':
+            value = value or ''
+        elif field == 'image_url':
+            value = value or f'https://via.placeholder.com/250x300/f8f9fa/000?text={row.nameProduct}'
+        item[field] = value
+    return item
+
+
 @products_bp.route('/api/products', methods=['GET'])
+@catalog_etag
 def get_products():
-    """Obtener todos los productos activos (API JSON)"""
+    """Obtener productos activos (API JSON)
+
+    Sin parámetros devuelve la lista completa como antes. Con ?limit= y/o ?after=<idProduct>
+    pagina por cursor sobre idProduct, y ?fields=id,name,price limita las columnas leídas.
+    """
     try:
-        # OBTENER TODOS LOS PRODUCTOS ACTIVOS SIN LÍMITE
+        try:
+            fields = parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        limit = request.args.get('limit', type=int)
+        after = request.args.get('after', type=int)
+        if limit is not None:
+            max_limit = current_app.config.get('PRODUCTS_PAGE_MAX', 200)
+            limit = min(max(limit, 1), max_limit)
+        elif after is not None:
+            limit = current_app.config.get('PRODUCTS_PAGE_SIZE', 50)
+
+        key = ('products', tuple(fields) if fields else None, limit, after)
+        return jsonify(catalog_cache.get_or_set(key, lambda: load_products(fields, limit, after)))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+def load_products(fields, limit=None, after=None):
+    """Consulta el catálogo activo y lo devuelve ya serializado (lista o página con cursor)"""
+    if fields is None and limit is None:
+        # Modo clásico: todos los productos activos
         products = Productos.query.filter_by(status='Activo').all()
-        return jsonify([{
-            'id': product.idProduct,
-            'name': product.nameProduct,
-            'description': product.description or '',
-            'price': float(product.price),
-            'image_url': product.image or f'https://via.placeholder.com/250x300/f8f9fa/000?text={product.nameProduct}',
-            'category': product.category,
-            'stock': product.stock,
-            'status': product.status,
-            'details': getattr(product, 'details', '')  # Detalles adicionales si existen
-        } for product in products])
+        return [dict(serialize_row(product, list(CATALOG_FIELDS)),
+                     details=getattr(product, 'details', ''))
+                for product in products]
+
+    fields = fields or list(CATALOG_FIELDS)
+    query = db.session.query(*catalog_columns(fields)).filter(Productos.status == 'Activo')
+
+    if limit is None:
+        return [serialize_row(row, fields) for row in query.all()]
+
+    # Keyset: WHERE idProduct > after ORDER BY idProduct LIMIT limit+1 (sin OFFSET)
+    if after is not None:
+        query = query.filter(Productos.idProduct > after)
+    rows = query.order_by(Productos.idProduct).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        'products': [serialize_row(row, fields) for row in rows],
+        'next_cursor': rows[-1].idProduct if has_more else None,
+        'has_more': has_more,
+        'limit': limit
+    }
+
+@products_bp.route('/api/products/search', methods=['GET'])
+@catalog_etag
+def search_products():
+    """Búsqueda de texto completo por nombre, descripción y categoría (?q=&page=&per_page=)"""
+    try:
+        q = request.args.get('q', '').strip()
+        if not q:
+            return jsonify({'error': 'Debes enviar el parámetro q'}), 400
+
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = request.args.get('per_page', 20, type=int)
+        per_page = min(max(per_page, 1), current_app.config.get('PRODUCTS_PAGE_MAX', 200))
+
+        def load_results():
+            ids, has_more = search.search_products(q, limit=per_page, offset=(page - 1) * per_page)
+            fields = ['id', 'name', 'price', 'image_url', 'category', 'stock']
+            rows = {}
+            if ids:
+                query = db.session.query(*catalog_columns(fields)).filter(Productos.idProduct.in_(ids))
+                rows = {row.idProduct: row for row in query}
+            return {
+                'query': q,
+                'page': page,
+                'per_page': per_page,
+                'has_more': has_more,
+                # Conservar el orden por relevancia
+                'products': [serialize_row(rows[i], fields) for i in ids if i in rows]
+            }
+
+        return jsonify(catalog_cache.get_or_set(('search', q.lower(), page, per_page), load_results))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@products_bp.route('/api/products/export', methods=['GET'])
+@login_required
+def export_products():
+    """Exportación del catálogo en streaming (?format=ndjson|json, ?fields=, ?status=all)
+
+    Las filas se leen con un cursor del lado del servidor (yield_per) y se emiten según llegan,
+    así la memoria del worker no crece con el tamaño del catálogo.
+    """
+    try:
+        fields = parse_fields(request.args.get('fields')) or list(CATALOG_FIELDS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in ('ndjson', 'json'):
+        return jsonify({'error': 'Formato no soportado (usa ndjson o json)'}), 400
+
+    batch_size = current_app.config.get('EXPORT_BATCH_SIZE', 1000)
+    query = db.session.query(*catalog_columns(fields))
+    if request.args.get('status') != 'all':
+        query = query.filter(Productos.status == 'Activo')
+    query = query.order_by(Productos.idProduct).execution_options(
+        stream_results=True,
+        yield_per=batch_size
+    )
+
+    def generate():
+        if fmt == 'json':
+            yield '['
+        first = True
+        for row in query:
+            line = json.dumps(serialize_row(row, fields), ensure_ascii=False)
+            if fmt == 'json':
+                yield line if first else ',' + line
+            else:
+                yield line + '\n'
+            first = False
+        if fmt == 'json':
+            yield ']'
+
+    mimetype = 'application/x-ndjson' if fmt == 'ndjson' else 'application/json'
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=catalogo.{fmt}'
+    return response
+
+
+@products_bp.route('/api/products/facets', methods=['GET'])
+@catalog_etag
+def get_facets():
+    """Conteos por categoría y rango de precio (?categoria=&rango=50-100)"""
+    try:
+        return jsonify(facets.catalog_facets(
+            request.args.get('categoria') or None,
+            request.args.get('rango') or None
+        ))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+RELATED_LIMIT = 4
+
+
+def related_map():
+    """Mapa categoría -> primeros ids activos, calculado en bloque con una sola consulta.
+
+    Se guarda en la caché del catálogo: se recalcula tras cualquier cambio de productos salvo los de solo stock.
+    Se guardan RELATED_LIMIT + 1 ids por categoría para poder excluir el producto que se está viendo.
+    """
+    def load():
+        ranked = db.session.query(
+            Productos.idProduct,
+            Productos.category,
+            func.row_number().over(
+                partition_by=Productos.category,
+                order_by=Productos.idProduct
+            ).label('pos')
+        ).filter(Productos.status == 'Activo').subquery()
+
+        rows = db.session.query(ranked.c.category, ranked.c.idProduct).filter(
+            ranked.c.pos <= RELATED_LIMIT + 1
+        ).order_by(ranked.c.category, ranked.c.idProduct)
+
+        mapping = {}
+        for category, product_id in rows:
+            mapping.setdefault(category, []).append(product_id)
+        return mapping
+
+    return catalog_cache.get_or_set(('related_map',), load)
+
+
 # ✅ NUEVO ENDPOINT: Página HTML de detalles del producto
 @products_bp.route('/product/<int:product_id>')
 def product_detail(product_id):
@@ -60,37 +275,62 @@ def product_detail(product_id):
     try:
         product = Productos.query.get_or_404(product_id)
         
-        # Productos relacionados (misma categoría)
+        # Productos relacionados (misma categoría), leídos por clave primaria desde el mapa precalculado
+        related_ids = [i for i in related_map().get(product.category, []) if i != product_id][:RELATED_LIMIT]
         related_products = Productos.query.filter(
-            Productos.category == product.category,
-            Productos.idProduct != product_id,
-            Productos.status == 'Activo'
-        ).limit(4).all()
+            Productos.idProduct.in_(related_ids)
+        ).order_by(Productos.idProduct).all() if related_ids else []
+        
+        # Stock disponible en vivo: stock - unidades reservadas por carritos en pago
+        availability = reservations.available_stock([product_id]).get(product_id, {})
         
         return render_template('product_detail.html', 
                              product=product, 
+                             available_stock=availability.get('available', product.stock),
                              related_products=related_products)
     except Exception as e:
         return render_template('error404.html'), 404
 
 @products_bp.route('/api/products/<int:product_id>', methods=['GET'])
+@catalog_etag
 def get_product_detail(product_id):
     """Obtener detalles específicos de un producto (API JSON)"""
     try:
-        product = Productos.query.get_or_404(product_id)
-        return jsonify({
-            'id': product.idProduct,
-            'name': product.nameProduct,
-            'description': product.description or '',
-            'price': float(product.price),
-            'image_url': product.image or f'https://via.placeholder.com/300x300/f8f9fa/000?text={product.nameProduct}',
-            'category': product.category,
-            'stock': product.stock,
-            'status': product.status,
-            'details': getattr(product, 'details', ''),
-            'size': getattr(product, 'size', 'No especificado'),
-            'color': getattr(product, 'color', 'No especificado')
-        })
+        def load_detail():
+            product = Productos.query.get(product_id)
+            if product is None:
+                return None
+            return {
+                'id': product.idProduct,
+                'name': product.nameProduct,
+                'description': product.description or '',
+                'price': float(product.price),
+                'image_url': product.image or f'https://via.placeholder.com/300x300/f8f9fa/000?text={product.nameProduct}',
+                'category': product.category,
+                'stock': product.stock,
+                'status': product.status,
+                'details': getattr(product, 'details', ''),
+                'size': getattr(product, 'size', 'No especificado'),
+                'color': getattr(product, 'color', 'No especificado')
+            }
+        
+        data = catalog_cache.get_or_set(('product', product_id), load_detail)
+        if data is None:
+            abort(404)
+        return jsonify(data)
+    except HTTPException:
+        raise
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@products_bp.route('/api/products/<int:product_id>/availability', methods=['GET'])
+def get_product_availability(product_id):
+    """Stock disponible en vivo (sin caché): stock, reservado y disponible"""
+    try:
+        availability = reservations.available_stock([product_id])
+        if product_id not in availability:
+            return jsonify({'error': 'Producto no encontrado'}), 404
+        return jsonify(dict(availability[product_id], id=product_id))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -110,35 +350,16 @@ def add_product():
             if 'stock' in data:
                 data['stock'] = int(data['stock'])
         
-        # Validar campos requeridos
-        required_fields = ['name', 'category', 'price', 'stock']
-        missing_fields = [field for field in required_fields if field not in data or not data[field]]
-        
-        if missing_fields:
-            return jsonify({
-                'success': False, 
-                'message': f'Campos requeridos faltantes: {", ".join(missing_fields)}'
-            }), 400
-        
-        # Validar tipos de datos
+        # Validar campos requeridos y tipos de datos
         try:
-            price = float(data['price'])
-            stock = int(data['stock'])
-        except (ValueError, TypeError):
+            values = validate_product_data(data)
+        except ValueError as e:
             return jsonify({
                 'success': False,
-                'message': 'Precio y stock deben ser valores numéricos'
+                'message': str(e)
             }), 400
 
-        new_product = Productos(
-            nameProduct=data['name'],
-            category=data['category'],
-            price=price,
-            stock=stock,
-            description=data.get('description', ''),
-            image=data.get('image', ''),
-            status='Activo' if stock > 0 else 'activo'
-        )
+        new_product = Productos(**values)
         
         # Añadir campos adicionales si existen en el modelo
         if hasattr(Productos, 'details') and 'details' in data:
@@ -167,6 +388,69 @@ def add_product():
             'message': f'Error al agregar el producto: {str(e)}'
         }), 500
 
+@products_bp.route('/api/products/import', methods=['POST'])
+@admin_api_required
+def import_products():
+    """Importación masiva desde CSV o JSONL (archivo 'file' o cuerpo de la petición). Solo admin
+
+    Parámetros: ?format=csv|jsonl, ?batch_size=500, ?upsert=1 (actualiza los ids existentes)
+    """
+    try:
+        upload = request.files.get('file')
+        stream = upload.stream if upload else request.stream
+        fmt = request.args.get('format') or importer.detect_format(
+            upload.filename if upload else None,
+            default='jsonl' if request.mimetype in ('application/x-ndjson', 'application/jsonl') else 'csv'
+        )
+        batch_size = request.args.get('batch_size', current_app.config.get('IMPORT_BATCH_SIZE', 500), type=int)
+        upsert = request.args.get('upsert', '').lower() in ('1', 'true', 'si', 'sí')
+
+        report = importer.import_products(
+            importer.iter_rows(stream, fmt),
+            batch_size=max(batch_size, 1),
+            upsert=upsert
+        )
+        return jsonify(dict(report.to_dict(), success=report.failed == 0))
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'Error al importar productos: {str(e)}'
+        }), 500
+
+@products_bp.route('/api/products/batch', methods=['POST'])
+@admin_api_required
+def batch_update_products():
+    """Actualización masiva de stock y precio en una sola transacción (solo admin)
+
+    Cuerpo: {"items": [{"id": 1, "stock": 10}, {"id": 2, "stock_delta": -3, "price": 19.9}]}
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        items = data.get('items') if isinstance(data, dict) else data
+        if not isinstance(items, list) or not items:
+            return jsonify({
+                'success': False,
+                'message': 'Envía una lista de cambios en "items"'
+            }), 400
+
+        results = inventory.apply_stock_updates(items)
+        failed = sum(1 for result in results.values() if not result['success'])
+        return jsonify({
+            'success': failed == 0,
+            'updated': len(results) - failed,
+            'failed': failed,
+            'results': {str(key): result for key, result in results.items()}
+        })
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'Error al actualizar el inventario: {str(e)}'
+        }), 500
+
 @products_bp.route('/api/products/<int:product_id>', methods=['PUT'])
 @login_required
 def update_product(product_id):
@@ -259,24 +543,82 @@ def delete_product(product_id):
         }), 500
 
 @products_bp.route('/api/products/category/<category_name>', methods=['GET'])
+@catalog_etag
 def get_products_by_category(category_name):
     """Obtener productos por categoría"""
     try:
-        products = Productos.query.filter_by(
-            category=category_name, 
-            status='Activo'
-        ).all()
+        def load_category():
+            products = Productos.query.filter_by(
+                category=category_name, 
+                status='Activo'
+            ).all()
+            
+            return [{
+                'id': product.idProduct,
+                'name': product.nameProduct,
+                'description': product.description or '',
+                'price': float(product.price),
+                'image_url': product.image or f'https://via.placeholder.com/250x300/f8f9fa/000?text={product.nameProduct}',
+                'category': product.category,
+                'stock': product.stock,
+                'status': product.status
+            } for product in products]
         
-        return jsonify([{
-            'id': product.idProduct,
-            'name': product.nameProduct,
-            'description': product.description or '',
-            'price': float(product.price),
-            'image_url': product.image or f'https://via.placeholder.com/250x300/f8f9fa/000?text={product.nameProduct}',
-            'category': product.category,
-            'stock': product.stock,
-            'status': product.status
-        } for product in products])
+        return jsonify(catalog_cache.get_or_set(('category', category_name), load_category))
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+
+# =======================
+# COMANDOS CLI
+# =======================
+# Consultas calientes del catálogo, para revisar su plan con `flask products explain`
+HOT_QUERIES = {
+    'categoria': "SELECT * FROM product WHERE status = 'Activo' AND category = 'Vestidos'",
+    'relacionados': "SELECT * FROM product WHERE category = 'Vestidos' AND idProduct != 1 "
+                    "AND status = 'Activo' LIMIT 4",
+    'cursor': "SELECT idProduct, nameProduct FROM product WHERE status = 'Activo' "
+              "AND idProduct > 0 ORDER BY idProduct LIMIT 51",
+    'novedades': "SELECT * FROM product WHERE status = 'Activo' ORDER BY created_at DESC LIMIT 12",
+}
+
+
+@products_bp.cli.command('explain')
+def explain_catalog_queries():
+    """Muestra el plan de ejecución de las consultas calientes del catálogo"""
+    dialect = db.engine.dialect.name
+    prefix = 'EXPLAIN QUERY PLAN ' if dialect == 'sqlite' else 'EXPLAIN '
+    print(f"🗄️ Motor: {dialect}")
+    for name, sql in HOT_QUERIES.items():
+        print(f"\n🔎 {name}: {sql}")
+        for row in db.session.execute(db.text(prefix + sql)):
+            print('   ', ' | '.join(str(value) for value in row))
+
+
+@products_bp.cli.command('search-index')
+@click.option('--rebuild', is_flag=True, help='Reindexar todos los productos (SQLite)')
+def search_index_command(rebuild):
+    """Crea el índice de texto completo si falta (lo mismo que la migración c41f08b2d9e7)"""
+    search.ensure_search_index()
+    if rebuild:
+        search.rebuild_search_index()
+    print(f"🔎 Motor de búsqueda: {search.detect_backend()}")
+
+
+@products_bp.cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), default=None,
+              help='Formato del archivo (por defecto según la extensión)')
+@click.option('--batch-size', default=None, type=int, help='Filas por lote/commit')
+@click.option('--upsert', is_flag=True, help='Actualizar los productos cuyo id ya existe')
+def import_products_command(path, fmt, batch_size, upsert):
+    """Importa productos desde un archivo CSV o JSONL"""
+    fmt = fmt or importer.detect_format(path)
+    batch_size = batch_size or current_app.config.get('IMPORT_BATCH_SIZE', 500)
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        report = importer.import_products(importer.iter_rows(f, fmt), batch_size=batch_size, upsert=upsert)
+    print(f"✅ Filas: {report.total} | insertadas: {report.inserted} | "
+          f"actualizadas: {report.updated} | con error: {report.failed}")
+    for error in report.errors:
+        print(f"   ❌ Fila {error['row']}: {error['message']}")
@@ -1,47 +1,103 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app, url_for
+from flask_login import current_user, login_required
+from sqlalchemy import and_, exists, or_
+from sqlalchemy.orm import joinedload
 from app.models import reportes
-from datetime import datetime
-from app.models.reportes import Reporte
+from datetime import datetime, timedelta
+from app.models.reportes import Reporte, DetalleReporte, TrabajoReporte
+from app import db, report_jobs
 from app.models.usuarios import  User
+from app.decorators import admin_api_required
 
 
 # Blueprint para manejar los reportes
 reportes_bp = Blueprint('reportes', __name__)
 
+
+# =======================
+# PAGINACIÓN Y SERIALIZACIÓN
+# =======================
+def parse_cursor(raw):
+    """'<fecha ISO>,<idReporte>' -> (datetime, int). Lanza ValueError si no es válido"""
+    fecha, reporte_id = raw.rsplit(',', 1)
+    return datetime.fromisoformat(fecha), int(reporte_id)
+
+
+def visible_reports():
+    """Reportes listos para consultar: los de un trabajo que no terminó (en curso o con error) no se muestran"""
+    unfinished = exists().where(
+        TrabajoReporte.idReporte == Reporte.idReporte,
+        TrabajoReporte.estado != 'Completado'
+    )
+    return Reporte.query.filter(~unfinished)
+
+
+def page_limit():
+    limit = request.args.get('limit', current_app.config.get('REPORTS_PAGE_SIZE', 20), type=int)
+    return min(max(limit, 1), current_app.config.get('REPORTS_PAGE_MAX', 100))
+
+
+def paginate(query):
+    """Aplica ?limit= y ?after= (cursor sobre fecha_generacion, idReporte) y serializa la página.
+
+    El usuario llega en el mismo SELECT (joinedload). Los detalles no van en el listado: un
+    reporte generado tiene una línea por pedido; se piden paginados en /reportes/<id>/detalles.
+    """
+    limit = page_limit()
+    query = query.options(joinedload(Reporte.usuario))
+
+    if request.args.get('after'):
+        fecha, reporte_id = parse_cursor(request.args['after'])
+        query = query.filter(or_(
+            Reporte.fecha_generacion < fecha,
+            and_(Reporte.fecha_generacion == fecha, Reporte.idReporte < reporte_id)
+        ))
+
+    rows = query.order_by(Reporte.fecha_generacion.desc(), Reporte.idReporte.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        'reportes': [serialize_reporte(r) for r in rows],
+        'next_cursor': f'{rows[-1].fecha_generacion.isoformat()},{rows[-1].idReporte}' if has_more else None,
+        'has_more': has_more,
+        'limit': limit
+    }
+
+
+def serialize_detalle(d):
+    return {
+        'idDetalleReporte': d.idDetalleReporte,
+        'idPedido': d.idPedido,
+        'descripcion': d.descripcion,
+        'monto': float(d.monto)
+    }
+
+
+def serialize_reporte(reporte):
+    return {
+        'idReporte': reporte.idReporte,
+        'usuario': reporte.usuario.nameUser if reporte.usuario else 'Usuario eliminado',
+        'fecha_generacion': reporte.fecha_generacion.strftime('%Y-%m-%d %H:%M'),
+        'tipo': reporte.tipo,
+        'total_pedidos': reporte.total_pedidos,
+        'total_ventas': float(reporte.total_ventas),
+        'observaciones': reporte.observaciones
+    }
+
+
 # 🔹 Reporte general
 @reportes_bp.route('/reportes', methods=['GET'])
+@admin_api_required
 def obtener_reportes():
-    reportes = Reporte.query.order_by(Reporte.fecha_generacion.desc()).all()
-
-    data = []
-    for reporte in reportes:
-        usuario = User.query.get(reporte.idUser)
-
-        detalles = [
-            {
-                'idDetalleReporte': d.idDetalleReporte,
-                'idPedido': d.idPedido,
-                'descripcion': d.descripcion,
-                'monto': float(d.monto)
-            }
-            for d in reporte.detalles
-        ]
-
-        data.append({
-            'idReporte': reporte.idReporte,
-            'usuario': usuario.nameUser if usuario else 'Usuario eliminado',
-            'fecha_generacion': reporte.fecha_generacion.strftime('%Y-%m-%d %H:%M'),
-            'tipo': reporte.tipo,
-            'total_pedidos': reporte.total_pedidos,
-            'total_ventas': float(reporte.total_ventas),
-            'observaciones': reporte.observaciones,
-            'detalles': detalles
-        })
-    return jsonify(data)
+    try:
+        return jsonify(paginate(visible_reports()))
+    except ValueError:
+        return jsonify({'error': 'Cursor no válido'}), 400
 
 
 # 🔹 Reporte filtrado por fecha
 @reportes_bp.route('/reportes/fecha', methods=['GET'])
+@admin_api_required
 def obtener_reportes_por_fecha():
     fecha_inicio = request.args.get('inicio')
     fecha_fin = request.args.get('fin')
@@ -55,54 +111,47 @@ def obtener_reportes_por_fecha():
     except ValueError:
         return jsonify({'error': 'Formato de fecha incorrecto (usa YYYY-MM-DD)'}), 400
 
-    reportes = Reporte.query.filter(
-        Reporte.fecha_generacion.between(inicio, fin)
-    ).order_by(Reporte.fecha_generacion.desc()).all()
-
-    data = [{
-        'idReporte': r.idReporte,
-        'usuario': User.query.get(r.idUser).nameUser if User.query.get(r.idUser) else 'Usuario eliminado',
-        'fecha_generacion': r.fecha_generacion.strftime('%Y-%m-%d %H:%M'),
-        'tipo': r.tipo,
-        'total_pedidos': r.total_pedidos,
-        'total_ventas': float(r.total_ventas),
-        'observaciones': r.observaciones
-    } for r in reportes]
-
-    return jsonify(data)
+    # El día fin se incluye completo
+    query = visible_reports().filter(
+        Reporte.fecha_generacion >= inicio,
+        Reporte.fecha_generacion < fin + timedelta(days=1)
+    )
+    try:
+        return jsonify(paginate(query))
+    except ValueError:
+        return jsonify({'error': 'Cursor no válido'}), 400
 
 
 # 🔹 Reporte por usuario
 @reportes_bp.route('/reportes/usuario/<int:idUser>', methods=['GET'])
+@admin_api_required
 def obtener_reportes_por_usuario(idUser):
-    reportes = Reporte.query.filter_by(idUser=idUser).order_by(Reporte.fecha_generacion.desc()).all()
-
-    data = [{
-        'idReporte': r.idReporte,
-        'fecha_generacion': r.fecha_generacion.strftime('%Y-%m-%d %H:%M'),
-        'tipo': r.tipo,
-        'total_pedidos': r.total_pedidos,
-        'total_ventas': float(r.total_ventas),
-        'observaciones': r.observaciones
-    } for r in reportes]
-
-    return jsonify(data)
+    try:
+        return jsonify(paginate(visible_reports().filter(Reporte.idUser == idUser)))
+    except ValueError:
+        return jsonify({'error': 'Cursor no válido'}), 400
 
 
-# 🔹 Detalles de un reporte específico
+# 🔹 Detalles de un reporte específico (paginados por ?limit= y ?after=<idDetalleReporte>)
 @reportes_bp.route('/reportes/<int:idReporte>/detalles', methods=['GET'])
+@admin_api_required
 def obtener_detalles_reporte(idReporte):
-    reporte = Reporte.query.get(idReporte)
+    reporte = visible_reports().filter(Reporte.idReporte == idReporte).first()
 
     if not reporte:
         return jsonify({'error': 'Reporte no encontrado'}), 404
 
-    detalles = [{
-        'idDetalleReporte': d.idDetalleReporte,
-        'idPedido': d.idPedido,
-        'descripcion': d.descripcion,
-        'monto': float(d.monto)
-    } for d in reporte.detalles]
+    try:
+        after = int(request.args['after']) if request.args.get('after') else 0
+    except ValueError:
+        return jsonify({'error': 'Cursor no válido'}), 400
+    limit = page_limit()
+    detalles = DetalleReporte.query.filter(
+        DetalleReporte.idReporte == idReporte,
+        DetalleReporte.idDetalleReporte > after
+    ).order_by(DetalleReporte.idDetalleReporte).limit(limit + 1).all()
+    has_more = len(detalles) > limit
+    detalles = detalles[:limit]
 
     return jsonify({
         'idReporte': reporte.idReporte,
@@ -110,5 +159,43 @@ def obtener_detalles_reporte(idReporte):
         'fecha_generacion': reporte.fecha_generacion.strftime('%Y-%m-%d %H:%M'),
         'total_pedidos': reporte.total_pedidos,
         'total_ventas': float(reporte.total_ventas),
-        'detalles': detalles
+        'detalles': [serialize_detalle(d) for d in detalles],
+        'next_cursor': str(detalles[-1].idDetalleReporte) if has_more else None,
+        'has_more': has_more,
+        'limit': limit
     })
+
+
+# =======================
+# REPORTES EN SEGUNDO PLANO
+# =======================
+@reportes_bp.route('/reportes/jobs', methods=['POST'])
+@login_required
+def crear_trabajo_reporte():
+    """Encola un reporte pesado (solo admin). JSON: {"tipo": "ventas", "desde": "AAAA-MM-DD", "hasta": "AAAA-MM-DD"}"""
+    if not current_user.is_admin:
+        return jsonify({'error': 'Acceso restringido a administradores'}), 403
+    try:
+        data = request.get_json(silent=True) or {}
+        job = report_jobs.create_job(current_user.idUser, data.get('tipo'), data)
+        report_jobs.submit(current_app._get_current_object(), job.idTrabajo)
+        db.session.refresh(job)
+        response = jsonify(report_jobs.serialize_job(job))
+        response.status_code = 202
+        response.headers['Location'] = url_for('reportes.estado_trabajo_reporte', idTrabajo=job.idTrabajo)
+        return response
+    except report_jobs.JobError as e:
+        return jsonify({'error': e.message}), e.status
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@reportes_bp.route('/reportes/jobs/<int:idTrabajo>', methods=['GET'])
+@login_required
+def estado_trabajo_reporte(idTrabajo):
+    """Estado, progreso y duración del trabajo (y el id del reporte cuando termina)"""
+    job = db.session.get(TrabajoReporte, idTrabajo)
+    if not job or (job.idUser != current_user.idUser and not current_user.is_admin):
+        return jsonify({'error': 'Trabajo no encontrado'}), 404
+    return jsonify(report_jobs.serialize_job(job))
@@ -4,6 +4,9 @@ from werkzeug.security import check_password_hash, generate_password_hash
 from app import db
 from app.models.usuarios import User
 from app.models.products import Productos
+from app.cache import catalog_cache
+from app import facets
+from app.order_history import count_user_orders
 from app.decorators import admin_required
 
 
@@ -76,20 +79,25 @@ def manage_users():
 @bp.route('/profile')
 @login_required
 def profile():
-    try:
-        products_q = Productos.query.filter_by(status='Activo').limit(6).all()
-    except Exception:
-        products_q = Productos.query.limit(6).all()
-
-    products = []
-    for p in products_q:
-        products.append({
-            'id': p.idProduct,
-            'name': p.nameProduct,
-            'price': float(p.price),
-            'description': p.description,
-            'image': p.image
-        })
+    def load_products():
+        try:
+            products_q = Productos.query.filter_by(status='Activo').limit(6).all()
+        except Exception:
+            products_q = Productos.query.limit(6).all()
+
+        products = []
+        for p in products_q:
+            products.append({
+                'id': p.idProduct,
+                'name': p.nameProduct,
+                'price': float(p.price),
+                'description': p.description,
+                'image': p.image
+            })
+        return products
+
+    # Los mismos 6 productos para todos los usuarios: se sirven desde la caché del catálogo
+    products = catalog_cache.get_or_set(('profile', 6), load_products)
 
     role_label = 'Administrador' if is_user_admin(current_user) else 'Usuario'
 
@@ -98,7 +106,7 @@ def profile():
     user=current_user,
     username=getattr(current_user, 'nameUser', getattr(current_user, 'username', 'Usuario')),
     products=products,
-    orders_count=0,
+    orders_count=count_user_orders(current_user.idUser),
     points=100,
     role_label=role_label
 )
@@ -203,24 +211,34 @@ def change_password():
 # 🔸 Listar productos (opcional)
 @bp.route('/productos')
 def productos():
-    categoria = request.args.get('categoria')
+    categoria = request.args.get('categoria') or None
+    rango = request.args.get('rango') or None
+    page = request.args.get('page', 1, type=int)
 
     try:
-        productos_db = Productos.query.all()
+        # Filtro y paginación en SQL; las facetas salen de un solo GROUP BY cacheado
+        pagination = facets.filtered_query(categoria, rango).paginate(
+            page=page, per_page=24, error_out=False
+        )
+        catalogo = facets.catalog_facets(categoria, rango)
     except Exception:
-        productos_db = []
-
-    if categoria:
-        productos_filtrados = [p for p in productos_db if p.category == categoria]
-    else:
-        productos_filtrados = productos_db
+        pagination = None
+        catalogo = {'total': 0, 'categories': [], 'price_ranges': []}
 
-    categorias = list(set([p.category for p in productos_db]))
+    productos_filtrados = [{
+        'id': p.idProduct,
+        'nombre': p.nameProduct,
+        'categoria': p.category,
+        'precio': '%.2f' % float(p.price),
+        'imagen': p.image or f'https://via.placeholder.com/250x300/f8f9fa/000?text={p.nameProduct}'
+    } for p in (pagination.items if pagination else [])]
 
     return render_template(
-        'users/productos.html',
+        'productos.html',
         productos=productos_filtrados,
-        categorias=categorias,
-        categoria_seleccionada=categoria
+        categorias=catalogo['categories'],
+        rangos=catalogo['price_ranges'],
+        categoria_seleccionada=categoria,
+        rango_seleccionado=rango,
+        pagination=pagination
     )
-
@@ -0,0 +1,279 @@
+"""Resumen diario de ventas en venta_diaria (día x categoría).
+
+Un pedido cuenta como venta mientras está Pagado, Enviado o Entregado, y se
+atribuye al día de su fecha. Al empezar a contar, sus líneas se agregan con un
+GROUP BY, se guardan en venta_pedido (lo que ese pedido sumó, por categoría) y
+se suman al resumen con un único upsert. Al dejar de contar (cancelación,
+borrado del pedido o de su usuario) se resta exactamente lo guardado en
+venta_pedido, aunque después hayan cambiado las líneas o la categoría del
+producto. Si cambian las líneas, la fecha o el estado de un pedido por el ORM,
+se resta lo guardado y se vuelve a sumar con los datos actuales.
+
+Así /api/reports/sales lee como mucho días x categorías filas sin tocar pedido.
+
+Además de una fila por categoría, cada día tiene una fila con categoria='*' con
+los totales del día: un pedido con varias categorías cuenta una vez ahí.
+"""
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from itertools import chain
+
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.orm import Session, attributes
+
+from app import db
+from app.models.pedidos import Pedido, DetallePedido
+from app.models.products import Productos
+from app.models.reportes import VentaDiaria, VentaPedido
+from app.models.usuarios import User
+
+PAID_STATES = ('Pagado', 'Enviado', 'Entregado')
+TOTAL_CATEGORY = '*'
+NO_CATEGORY = 'Sin categoría'
+CENT = Decimal('0.01')
+COUNTERS = ('pedidos', 'unidades', 'ingresos')
+
+snapshot_table = VentaPedido.__table__
+
+
+def is_counted(estado):
+    return estado in PAID_STATES
+
+
+def _day(value):
+    # SQLite devuelve DATE() como texto, MySQL como date
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def _money(value):
+    return Decimal(str(value or 0)).quantize(CENT)
+
+
+def aggregate_orders(pedido_ids, session=None):
+    """Filas de venta_pedido de los pedidos pagados entre esos ids, con sus líneas y categorías actuales.
+
+    Dos GROUP BY por pedido: uno por categoría y otro con el total del día (categoria='*').
+    """
+    session = session or db.session
+    day = func.date(Pedido.fecha).label('dia')
+    units = func.sum(DetallePedido.cantidad)
+    revenue = func.sum(DetallePedido.cantidad * DetallePedido.precio_unitario)
+    criteria = [Pedido.idPedido.in_(pedido_ids), Pedido.estado.in_(PAID_STATES)]
+
+    category = func.coalesce(Productos.category, NO_CATEGORY).label('categoria')
+    by_category = select(Pedido.idPedido, day, category, units, revenue).join(
+        DetallePedido, DetallePedido.idPedido == Pedido.idPedido
+    ).outerjoin(
+        Productos, Productos.idProduct == DetallePedido.idProduct
+    ).where(*criteria).group_by(Pedido.idPedido, day, category)
+
+    by_day = select(Pedido.idPedido, day, units, revenue).join(
+        DetallePedido, DetallePedido.idPedido == Pedido.idPedido
+    ).where(*criteria).group_by(Pedido.idPedido, day)
+
+    connection = session.connection()
+    rows = [
+        {'idPedido': pedido_id, 'dia': _day(dia), 'categoria': categoria, 'pedidos': 1,
+         'unidades': int(unidades or 0), 'ingresos': _money(ingresos)}
+        for pedido_id, dia, categoria, unidades, ingresos in connection.execute(by_category)
+    ]
+    rows.extend(
+        {'idPedido': pedido_id, 'dia': _day(dia), 'categoria': TOTAL_CATEGORY, 'pedidos': 1,
+         'unidades': int(unidades or 0), 'ingresos': _money(ingresos)}
+        for pedido_id, dia, unidades, ingresos in connection.execute(by_day)
+    )
+    return rows
+
+
+def _summarize(rows, sign):
+    """Suma las filas por (día, categoría) con el signo dado: una fila por clave del resumen"""
+    summary = {}
+    for row in rows:
+        key = (row['dia'], row['categoria'])
+        current = summary.setdefault(key, {'dia': key[0], 'categoria': key[1], 'pedidos': 0,
+                                           'unidades': 0, 'ingresos': Decimal('0.00')})
+        for name in COUNTERS:
+            current[name] += row[name] * sign
+    return list(summary.values())
+
+
+def _upsert(rows, session=None):
+    """Suma las filas al resumen: INSERT ... ON CONFLICT/ON DUPLICATE KEY con el contador acumulado"""
+    connection = (session or db.session).connection()
+    table = VentaDiaria.__table__
+    dialect = connection.dialect.name
+
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        statement = sqlite_insert(table).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=['dia', 'categoria'],
+            set_={name: table.c[name] + statement.excluded[name] for name in COUNTERS}
+        )
+        connection.execute(statement)
+    elif dialect in ('mysql', 'mariadb'):
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        statement = mysql_insert(table).values(rows)
+        statement = statement.on_duplicate_key_update(
+            {name: table.c[name] + statement.inserted[name] for name in COUNTERS}
+        )
+        connection.execute(statement)
+    else:
+        for row in rows:
+            result = connection.execute(
+                table.update()
+                .where(table.c.dia == row['dia'], table.c.categoria == row['categoria'])
+                .values({name: table.c[name] + row[name] for name in COUNTERS})
+            )
+            if result.rowcount == 0:
+                connection.execute(table.insert().values(row))
+
+
+def _count(pedido_ids, session=None):
+    """Suma al resumen los pedidos pagados entre esos ids y guarda lo sumado en venta_pedido"""
+    rows = aggregate_orders(pedido_ids, session)
+    if rows:
+        (session or db.session).connection().execute(insert(snapshot_table), rows)
+        _upsert(_summarize(rows, 1), session)
+    return len(rows)
+
+
+def _uncount(pedido_ids, session=None):
+    """Resta del resumen lo que esos pedidos sumaron (según venta_pedido) y lo borra"""
+    connection = (session or db.session).connection()
+    rows = [row._asdict() for row in connection.execute(
+        select(snapshot_table.c.dia, snapshot_table.c.categoria, *(snapshot_table.c[name] for name in COUNTERS))
+        .where(snapshot_table.c.idPedido.in_(pedido_ids))
+    )]
+    if rows:
+        _upsert(_summarize(rows, -1), session)
+        connection.execute(delete(snapshot_table).where(snapshot_table.c.idPedido.in_(pedido_ids)))
+    return len(rows)
+
+
+def refresh_orders(pedido_ids, session=None):
+    """Deja esos pedidos en el resumen según su estado y líneas actuales. No hace commit.
+
+    Resta lo que sumaron (si contaban) y vuelve a sumar los que están pagados: sirve para
+    pagar, cancelar, borrar o editar un pedido. Devuelve cuántas filas de venta_pedido escribió.
+    """
+    pedido_ids = [pedido_id for pedido_id in set(pedido_ids) if pedido_id is not None]
+    if not pedido_ids:
+        return 0
+    _uncount(pedido_ids, session)
+    return _count(pedido_ids, session)
+
+
+def backfill(batch_size=1000, desde=None, hasta=None):
+    """Reconstruye el resumen (o solo los días entre desde y hasta, incluidos) recorriendo
+    los pedidos pagados por lotes de idPedido, con un commit por lote. Devuelve cuántos pedidos sumó"""
+    rollup = VentaDiaria.query
+    snapshots = VentaPedido.query
+    criteria = [Pedido.estado.in_(PAID_STATES)]
+    if desde:
+        rollup = rollup.filter(VentaDiaria.dia >= desde)
+        snapshots = snapshots.filter(VentaPedido.dia >= desde)
+        criteria.append(Pedido.fecha >= datetime.combine(desde, datetime.min.time()))
+    if hasta:
+        rollup = rollup.filter(VentaDiaria.dia <= hasta)
+        snapshots = snapshots.filter(VentaPedido.dia <= hasta)
+        criteria.append(Pedido.fecha < datetime.combine(hasta + timedelta(days=1), datetime.min.time()))
+    rollup.delete(synchronize_session=False)
+    snapshots.delete(synchronize_session=False)
+    db.session.commit()
+
+    processed = 0
+    last_id = 0
+    while True:
+        ids = [row[0] for row in db.session.execute(
+            select(Pedido.idPedido)
+            .where(Pedido.idPedido > last_id, *criteria)
+            .order_by(Pedido.idPedido)
+            .limit(batch_size)
+        )]
+        if not ids:
+            return processed
+        _count(ids)
+        db.session.commit()
+        processed += len(ids)
+        last_id = ids[-1]
+
+
+def sales_report(days=30, top=5):
+    """Ventas de los últimos days días leídas solo de venta_diaria"""
+    end = datetime.utcnow().date()
+    start = end - timedelta(days=days - 1)
+    rows = VentaDiaria.query.filter(VentaDiaria.dia >= start, VentaDiaria.dia <= end).all()
+
+    trend = {start + timedelta(days=i): Decimal('0.00') for i in range(days)}
+    total_sales = Decimal('0.00')
+    total_orders = 0
+    total_units = 0
+    by_category = {}
+    for row in rows:
+        if row.categoria == TOTAL_CATEGORY:
+            trend[row.dia] = row.ingresos
+            total_sales += row.ingresos
+            total_orders += row.pedidos
+            total_units += row.unidades
+        else:
+            by_category[row.categoria] = by_category.get(row.categoria, Decimal('0.00')) + row.ingresos
+
+    top_categories = sorted(by_category.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        'desde': start.isoformat(),
+        'hasta': end.isoformat(),
+        'total_sales': float(total_sales),
+        'total_orders': total_orders,
+        'total_units': total_units,
+        'average_order': float((total_sales / total_orders).quantize(CENT)) if total_orders else 0.0,
+        'top_categories': [{'name': name, 'sales': float(sales)} for name, sales in top_categories],
+        'sales_trend': [float(value) for value in trend.values()],
+        'days': [day.isoformat() for day in trend]
+    }
+
+
+# =======================
+# MANTENIMIENTO AUTOMÁTICO
+# =======================
+@event.listens_for(Session, 'before_flush')
+def _track_order_changes(session, flush_context, instances):
+    pending = []
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, DetallePedido):
+            # Si la línea cambió de pedido, también hay que rehacer el anterior
+            pending.extend(attributes.get_history(obj, 'idPedido').deleted or [])
+            pending.append(obj)
+        elif isinstance(obj, Pedido):
+            if obj in session.new:
+                if is_counted(obj.estado):
+                    pending.append(obj)
+            elif obj in session.deleted or any(
+                attributes.get_history(obj, name).has_changes() for name in ('estado', 'fecha')
+            ):
+                pending.append(obj.idPedido)
+        elif isinstance(obj, User) and obj in session.deleted and obj.idUser is not None:
+            # Sus pedidos se borran en cascada en la base de datos, sin pasar por el ORM
+            pending.extend(row[0] for row in session.connection().execute(
+                select(Pedido.idPedido).where(Pedido.idUser == obj.idUser, Pedido.estado.in_(PAID_STATES))
+            ))
+    if pending:
+        session.info.setdefault('ventas_pendientes', []).extend(pending)
+
+
+@event.listens_for(Session, 'after_flush_postexec')
+def _refresh_after_flush(session, flush_context):
+    pending = session.info.pop('ventas_pendientes', None)
+    if not pending:
+        return
+    # Después del flush los pedidos y líneas nuevos ya tienen idPedido
+    refresh_orders({item if isinstance(item, int) else item.idPedido for item in pending}, session)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('ventas_pendientes', None)
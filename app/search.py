@@ -0,0 +1,154 @@
+"""Búsqueda de texto completo sobre el catálogo.
+
+SQLite usa una tabla virtual FTS5 (product_fts) con contenido externo y triggers
+que la mantienen al día en cada INSERT/UPDATE/DELETE de ``product``. MySQL usa un
+índice FULLTEXT que InnoDB mantiene solo. Cualquier otro motor cae a LIKE.
+
+El índice lo crea la migración c41f08b2d9e7 (o ``flask products search-index``);
+al arrancar solo se comprueba si existe (detect_backend) y, si falta, se busca con LIKE.
+"""
+import re
+
+from flask import current_app
+
+from app import db
+
+FTS_TABLE = 'product_fts'
+FULLTEXT_INDEX = 'ft_product_search'
+
+# Peso de cada columna en el ranking: nombre > categoría > descripción
+WEIGHTS = {'nameProduct': 10.0, 'description': 1.0, 'category': 3.0}
+
+SQLITE_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        nameProduct, description, category,
+        content='product', content_rowid='idProduct',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS product_fts_ai AFTER INSERT ON product BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, nameProduct, description, category)
+        VALUES (new.idProduct, new.nameProduct, new.description, new.category);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS product_fts_ad AFTER DELETE ON product BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, nameProduct, description, category)
+        VALUES ('delete', old.idProduct, old.nameProduct, old.description, old.category);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS product_fts_au AFTER UPDATE OF nameProduct, description, category ON product BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, nameProduct, description, category)
+        VALUES ('delete', old.idProduct, old.nameProduct, old.description, old.category);
+        INSERT INTO {FTS_TABLE}(rowid, nameProduct, description, category)
+        VALUES (new.idProduct, new.nameProduct, new.description, new.category);
+    END""",
+]
+
+
+def detect_backend():
+    """'fts5', 'fulltext' o 'like' según el índice que exista en la base de datos (sin DDL)"""
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        exists = db.session.execute(db.text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+        ), {'name': FTS_TABLE}).first()
+        return 'fts5' if exists else 'like'
+    if dialect in ('mysql', 'mariadb'):
+        exists = db.session.execute(db.text(
+            "SELECT 1 FROM information_schema.statistics "
+            "WHERE table_schema = DATABASE() AND table_name = 'product' AND index_name = :name"
+        ), {'name': FULLTEXT_INDEX}).first()
+        return 'fulltext' if exists else 'like'
+    return 'like'
+
+
+def backend():
+    """Motor de búsqueda detectado al arrancar (se detecta aquí si todavía no se hizo)"""
+    if 'search_backend' not in current_app.extensions:
+        current_app.extensions['search_backend'] = detect_backend()
+    return current_app.extensions['search_backend']
+
+
+def ensure_search_index():
+    """Crea (si falta) el índice de texto completo del motor actual. Idempotente.
+
+    Es DDL: solo se ejecuta desde ``flask products search-index``, nunca al arrancar.
+    """
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        exists = db.session.execute(db.text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+        ), {'name': FTS_TABLE}).first()
+        for ddl in SQLITE_DDL:
+            db.session.execute(db.text(ddl))
+        if not exists:
+            # Primera vez: indexar los productos que ya existían
+            db.session.execute(db.text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+        db.session.commit()
+    elif dialect in ('mysql', 'mariadb'):
+        exists = db.session.execute(db.text(
+            "SELECT 1 FROM information_schema.statistics "
+            "WHERE table_schema = DATABASE() AND table_name = 'product' AND index_name = :name"
+        ), {'name': FULLTEXT_INDEX}).first()
+        if not exists:
+            db.session.execute(db.text(
+                f"ALTER TABLE product ADD FULLTEXT INDEX {FULLTEXT_INDEX} (nameProduct, description, category)"
+            ))
+            db.session.commit()
+    current_app.extensions['search_backend'] = detect_backend()
+
+
+def rebuild_search_index():
+    """Reconstruye el índice completo (solo hace falta si se tocó product saltándose los triggers)"""
+    if db.engine.dialect.name == 'sqlite':
+        db.session.execute(db.text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+        db.session.commit()
+
+
+def _terms(q):
+    return re.findall(r'\w+', q or '', flags=re.UNICODE)[:10]
+
+
+def search_products(q, limit=20, offset=0):
+    """Busca productos activos por nombre, descripción y categoría.
+
+    Devuelve (ids ordenados por relevancia, hay_más). Los términos se combinan con AND
+    y cada uno admite prefijo ("vest" encuentra "vestido").
+    """
+    terms = _terms(q)
+    if not terms:
+        return [], False
+
+    engine = backend()
+    params = {'limit': limit + 1, 'offset': offset}
+
+    if engine == 'fts5':
+        params['match'] = ' '.join('"{}"*'.format(t.replace('"', '""')) for t in terms)
+        weights = ', '.join(str(w) for w in WEIGHTS.values())
+        sql = f"""
+            SELECT p.idProduct FROM {FTS_TABLE}
+            JOIN product p ON p.idProduct = {FTS_TABLE}.rowid
+            WHERE {FTS_TABLE} MATCH :match AND p.status = 'Activo'
+            ORDER BY bm25({FTS_TABLE}, {weights}), p.idProduct
+            LIMIT :limit OFFSET :offset
+        """
+    elif engine == 'fulltext':
+        params['match'] = ' '.join(f'+{t}*' for t in terms)
+        sql = """
+            SELECT idProduct FROM product
+            WHERE MATCH(nameProduct, description, category) AGAINST (:match IN BOOLEAN MODE)
+              AND status = 'Activo'
+            ORDER BY MATCH(nameProduct, description, category) AGAINST (:match IN BOOLEAN MODE) DESC, idProduct
+            LIMIT :limit OFFSET :offset
+        """
+    else:
+        # Sin índice de texto completo (otro motor o migración sin aplicar): LIKE
+        conditions = []
+        for i, term in enumerate(terms):
+            params[f't{i}'] = f'%{term}%'
+            conditions.append(f"(nameProduct LIKE :t{i} OR description LIKE :t{i} OR category LIKE :t{i})")
+        sql = f"""
+            SELECT idProduct FROM product
+            WHERE status = 'Activo' AND {' AND '.join(conditions)}
+            ORDER BY idProduct LIMIT :limit OFFSET :offset
+        """
+
+    ids = [row[0] for row in db.session.execute(db.text(sql), params)]
+    return ids[:limit], len(ids) > limit
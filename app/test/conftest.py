@@ -1,9 +1,17 @@
 from app import create_app, db
+from config import Config
 import pytest
 
+
+class TestConfig(Config):
+    # Base de datos en memoria para las pruebas
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+
+
 @pytest.fixture
 def app():
-    app = create_app()
+    app = create_app(TestConfig)
     with app.app_context():
         db.create_all()  # Create tables within the context
         yield app
@@ -15,6 +23,15 @@ def app():
 def client(app):
     return app.test_client()
 
+@pytest.fixture
+def admin_client(client):
+    # Cliente con la sesión del admin que crea create_app
+    from app.models.usuarios import User
+    admin = User.query.filter_by(emailUser='admin@fashion.com').first()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(admin.idUser)
+    return client
+
 @pytest.fixture
 def user(app):
     from app.models.users import Users
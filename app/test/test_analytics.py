@@ -0,0 +1,104 @@
+from datetime import date, datetime
+
+import pytest
+from flask import g
+
+from app import db, analytics
+from app.cache import analytics_cache
+from app.models.pedidos import Pedido, DetallePedido
+from app.models.products import Productos
+from app.models.usuarios import User
+
+
+def pedido(user, producto, fecha, precio, estado='Pagado'):
+    return Pedido(idUser=user.idUser, fecha=fecha, estado=estado, detalles=[
+        DetallePedido(idProduct=producto.idProduct, cantidad=1, precio_unitario=precio)])
+
+
+def preparar_pedidos():
+    admin = User.query.filter_by(emailUser='admin@fashion.com').first()
+    ana = User(nameUser='ana', emailUser='ana@example.com')
+    luis = User(nameUser='luis', emailUser='luis@example.com')
+    ana.set_password('secreto')
+    luis.set_password('secreto')
+    producto = Productos(nameProduct='V', category='Vestidos', price=10, stock=50, status='Activo')
+    db.session.add_all([ana, luis, producto])
+    db.session.commit()
+    db.session.add_all([
+        pedido(admin, producto, datetime(2025, 12, 15, 9), '1.00'),  # Cohorte anterior al rango
+        pedido(admin, producto, datetime(2026, 2, 5, 18), '2.50'),
+        pedido(ana, producto, datetime(2026, 1, 10, 12), '10.00'),
+        pedido(ana, producto, datetime(2026, 2, 5, 10), '5.00'),
+        pedido(ana, producto, datetime(2026, 3, 3, 10), '99.00', estado='Cancelado'),
+        pedido(luis, producto, datetime(2026, 2, 20, 11), '20.00'),
+        pedido(luis, producto, datetime(2026, 2, 21, 11), '50.00', estado='Pendiente'),
+        pedido(luis, producto, datetime(2026, 4, 1, 8), '7.50', estado='Entregado'),
+    ])
+    db.session.commit()
+    analytics_cache.clear()
+
+
+def test_tendencia_diaria_y_media_movil_con_sql(app):
+    preparar_pedidos()
+    data = analytics.daily_sales(date(2026, 2, 3), date(2026, 2, 7), window=2, engine='sql')
+    assert data['days'] == ['2026-02-03', '2026-02-04', '2026-02-05', '2026-02-06', '2026-02-07']
+    assert data['orders'] == [0, 0, 2, 0, 0]
+    assert data['revenue'] == [0.0, 0.0, 7.5, 0.0, 0.0]
+    assert data['moving_average'] == [0.0, 0.0, 3.75, 3.75, 0.0]
+    assert data['total_revenue'] == 7.5 and data['engine'] == 'sql'
+
+
+def test_cohortes_con_sql(app):
+    preparar_pedidos()
+    data = analytics.cohorts(date(2026, 1, 1), date(2026, 4, 30), engine='sql')
+    assert data['cohorts'] == [
+        {'cohorte': '2026-01', 'clientes': 1, 'activos': [1, 1, 0, 0], 'retencion': [1.0, 1.0, 0.0, 0.0]},
+        {'cohorte': '2026-02', 'clientes': 1, 'activos': [1, 0, 1], 'retencion': [1.0, 0.0, 1.0]},
+    ]
+
+
+def test_motor_numpy_coincide_con_sql(app):
+    pytest.importorskip('numpy')
+    preparar_pedidos()
+    desde, hasta = date(2025, 12, 1), date(2026, 4, 30)
+    for loader in (analytics.daily_sales, analytics.cohorts):
+        numpy_data = loader(desde, hasta, engine='numpy')
+        sql_data = loader(desde, hasta, engine='sql')
+        assert numpy_data['engine'] == 'numpy'
+        assert dict(numpy_data, engine='sql') == sql_data
+
+    # Lotes pequeños: mismo resultado que en una sola lectura
+    app.config['ANALYTICS_CHUNK_SIZE'] = 2
+    frame = analytics.load_orders(datetime(2026, 5, 1))
+    assert len(frame[0]) == 6
+    assert analytics._cohorts_numpy(desde, hasta, frame) == analytics._cohorts_sql(desde, hasta)
+    assert analytics._daily_numpy(desde, hasta, frame) == analytics._daily_sql(desde, hasta)
+    assert all(timings['iguales'] for timings in analytics.benchmark(desde, hasta, repeat=1).values())
+
+
+def test_sin_numpy_se_usa_sql(admin_client, monkeypatch):
+    preparar_pedidos()
+    monkeypatch.setattr(analytics, 'np', None)
+    data = admin_client.get('/api/reports/trends?desde=2026-02-01&hasta=2026-02-28&ventana=3').get_json()
+    assert data['engine'] == 'sql'
+    assert data['total_orders'] == 3 and data['total_revenue'] == 27.5
+    assert analytics.moving_average([3, 6, 9, 0], 2) == [3.0, 4.5, 7.5, 4.5]
+
+    response = admin_client.get('/api/reports/cohorts?desde=2026-01-01&hasta=2026-04-30&engine=numpy')
+    assert response.status_code == 400
+    assert admin_client.get('/api/reports/cohorts?desde=2026-05-01&hasta=2026-04-30').status_code == 400
+
+
+def test_rango_recortado_y_solo_admin(app, admin_client):
+    preparar_pedidos()
+    app.config['ANALYTICS_MAX_DAYS'] = 10
+    data = admin_client.get('/api/reports/trends?desde=2000-01-01&hasta=2026-02-28&engine=sql').get_json()
+    assert data['days'][0] == '2026-02-19' and len(data['days']) == 10
+    assert len(admin_client.get('/api/reports/sales?dias=5000').get_json()['sales_trend']) == 10
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(User.query.filter_by(emailUser='ana@example.com').first().idUser)
+    for url in ('/api/dashboard/stats', '/api/reports/sales', '/api/reports/trends', '/api/reports/cohorts'):
+        g.pop('_login_user', None)
+        assert client.get(url).status_code == 403
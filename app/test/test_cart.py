@@ -0,0 +1,112 @@
+from sqlalchemy import event
+
+from app import db
+from app.models.products import Productos
+from app.models.usuarios import CartItem, User
+
+
+def contar_consultas(engine):
+    statements = []
+    event.listen(engine, 'before_cursor_execute',
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+    return statements
+
+
+def test_carrito_se_carga_con_consultas_constantes(admin_client):
+    admin = User.query.filter_by(emailUser='admin@fashion.com').first()
+    products = [Productos(nameProduct=f'P{i}', category='Vestidos', price=10, stock=5, status='Activo')
+                for i in range(5)]
+    db.session.add_all(products)
+    db.session.commit()
+    for product in products:
+        db.session.add(CartItem(idUser=admin.idUser, idProduct=product.idProduct, quantity=2))
+    db.session.add(CartItem(idUser=admin.idUser, idProduct=9999, quantity=1))  # Producto eliminado
+    db.session.commit()
+
+    statements = contar_consultas(db.engine)
+    response = admin_client.get('/cart')
+    assert response.status_code == 200
+    assert b'$100.00' in response.data
+
+    cart_queries = [s for s in statements if 'cart_item' in s]
+    assert len(cart_queries) == 2  # SELECT con JOIN + un solo DELETE de huérfanos
+    assert CartItem.query.count() == 5
+
+
+def test_agregar_al_carrito_valida_stock(admin_client):
+    product = Productos(nameProduct='P', category='Vestidos', price=10, stock=2, status='Activo')
+    db.session.add(product)
+    db.session.commit()
+
+    data = admin_client.post('/api/cart/add', json={'product_id': product.idProduct, 'quantity': 2}).get_json()
+    assert data['success'] is True
+    assert data['cart_count'] == 1
+    data = admin_client.post('/api/cart/add', json={'product_id': product.idProduct, 'quantity': 1}).get_json()
+    assert data['success'] is False
+
+
+def test_agregar_rechaza_cantidades_menores_que_uno(app, admin_client):
+    product = Productos(nameProduct='P', category='Vestidos', price=10, stock=5, status='Activo')
+    db.session.add(product)
+    db.session.commit()
+    admin_client.post('/api/cart/add', json={'product_id': product.idProduct, 'quantity': 3})
+
+    for quantity in (0, -2, 'x'):
+        response = admin_client.post('/api/cart/add', json={'product_id': product.idProduct, 'quantity': quantity})
+        assert response.status_code == 400
+    assert CartItem.query.filter_by(idProduct=product.idProduct).first().quantity == 3
+
+    from app import guest_cart
+    with app.test_request_context():
+        assert guest_cart.add(product, 0) == (False, 'La cantidad debe ser al menos 1')
+        assert guest_cart.get_items() == {}
+
+
+def test_carrito_invitado_sin_escrituras_y_fusion_al_iniciar_sesion(client):
+    user = User(nameUser='ana', emailUser='ana@example.com')
+    user.set_password('secreto')
+    a = Productos(nameProduct='A', category='Vestidos', price=10, stock=3, status='Activo')
+    b = Productos(nameProduct='B', category='Vestidos', price=5, stock=10, status='Activo')
+    db.session.add_all([user, a, b])
+    db.session.commit()
+    db.session.add(CartItem(idUser=user.idUser, idProduct=a.idProduct, quantity=2))
+    db.session.commit()
+
+    assert client.post('/api/cart/add', json={'product_id': a.idProduct, 'quantity': 2}).get_json()['success']
+    assert client.post('/api/cart/add', json={'product_id': b.idProduct, 'quantity': 1}).get_json()['cart_count'] == 2
+    assert client.post('/api/cart/update', json={'item_id': b.idProduct, 'quantity': 4}).get_json()['success']
+    assert client.get('/api/cart/count').get_json()['count'] == 2
+    assert CartItem.query.count() == 1  # Nada escrito todavía
+
+    client.post('/login', data={'nameUser': 'ana', 'passwordUser': 'secreto'})
+    quantities = {item.idProduct: item.quantity for item in CartItem.query.filter_by(idUser=user.idUser)}
+    assert quantities == {a.idProduct: 3, b.idProduct: 4}  # 2 + 2 limitado al stock de 3
+
+
+def test_contador_del_carrito_sin_consultas_y_reconciliacion(admin_client):
+    admin = User.query.filter_by(emailUser='admin@fashion.com').first()
+    a = Productos(nameProduct='A', category='Vestidos', price=10, stock=5, status='Activo')
+    b = Productos(nameProduct='B', category='Vestidos', price=10, stock=5, status='Activo')
+    db.session.add_all([a, b])
+    db.session.commit()
+
+    admin_client.post('/api/cart/add', json={'product_id': a.idProduct, 'quantity': 1})
+    data = admin_client.post('/api/cart/add', json={'product_id': b.idProduct, 'quantity': 1}).get_json()
+    assert data['cart_count'] == 2
+    item = CartItem.query.filter_by(idProduct=a.idProduct).first()
+    assert admin_client.post('/api/cart/remove', json={'item_id': item.idCartItem}).get_json()['cart_count'] == 1
+
+    statements = contar_consultas(db.engine)
+    assert admin_client.get('/api/cart/count').get_json()['count'] == 1
+    assert not [s for s in statements if 'cart_item' in s]
+
+    # Escritura fuera de los endpoints: el contador se desincroniza hasta reconciliar
+    db.session.add(CartItem(idUser=admin.idUser, idProduct=a.idProduct, quantity=1))
+    db.session.commit()
+    assert admin_client.get('/api/cart/count').get_json()['count'] == 1
+    assert admin_client.get('/api/cart/count?refresh=1').get_json()['count'] == 1  # Un GET no escribe
+    assert admin_client.post('/api/cart/count/reconcile').get_json()['count'] == 2
+    assert admin_client.get('/api/cart/count').get_json()['count'] == 2
+
+    admin_client.post('/api/cart/clear')
+    assert admin_client.get('/api/cart/count').get_json()['count'] == 0
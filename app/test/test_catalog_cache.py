@@ -0,0 +1,184 @@
+from flask import g
+from sqlalchemy import update
+
+from app import db
+from app.cache import TTLCache, catalog_cache
+from app.models.products import Productos
+from app.models.usuarios import User
+
+
+def test_ttl_cache_lru_y_expiracion():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)  # Expulsa 'b' (el menos usado)
+    assert cache.get('b') is None
+    assert cache.stats()['evictions'] == 1
+
+    cache.ttl = -1
+    cache.set('d', 4)
+    assert cache.get('d') is None
+
+
+def test_categoria_cacheada_e_invalidada_al_actualizar(admin_client):
+    client = admin_client
+    product = Productos(nameProduct='Vestido', price=20, stock=3, status='Activo', category='Vestidos')
+    db.session.add(product)
+    db.session.commit()
+
+    assert client.get('/api/products/category/Vestidos').get_json()[0]['stock'] == 3
+    client.get('/api/products/category/Vestidos')
+    assert catalog_cache.stats()['hits'] >= 1
+
+    # Escritura desde dashboard_bp (registrado antes que products_bp para PUT)
+    response = client.put(f'/api/products/{product.idProduct}', json={
+        'name': 'Vestido', 'category': 'Vestidos', 'price': 20, 'stock': 7, 'status': 'Activo'
+    })
+    assert response.status_code == 200
+    assert client.get('/api/products/category/Vestidos').get_json()[0]['stock'] == 7
+
+
+def test_detalle_inexistente_devuelve_404(client):
+    assert client.get('/api/products/999').status_code == 404
+
+
+def test_etag_responde_304_hasta_que_cambia_el_catalogo(client):
+    product = Productos(nameProduct='Camisa', price=15, stock=2, status='Activo', category='Camisas')
+    db.session.add(product)
+    db.session.commit()
+
+    first = client.get(f'/api/products/{product.idProduct}')
+    etag = first.headers['ETag']
+    assert first.status_code == 200
+
+    misses = catalog_cache.stats()['misses']
+    again = client.get(f'/api/products/{product.idProduct}', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.data == b''
+    assert catalog_cache.stats()['misses'] == misses  # Se respondió desde la caché
+
+    # El ETag depende solo del contenido: vaciar la caché (otro worker, un reinicio) no lo cambia
+    catalog_cache.configure()
+    assert client.get(f'/api/products/{product.idProduct}', headers={'If-None-Match': etag}).status_code == 304
+
+    product.stock = 9
+    db.session.commit()
+    changed = client.get(f'/api/products/{product.idProduct}', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.get_json()['stock'] == 9
+
+
+def test_get_or_set_calcula_una_sola_vez_con_hilos_concurrentes():
+    import threading
+    import time
+
+    cache = TTLCache(maxsize=4, ttl=60)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return 'valor'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_set('k', loader))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ['valor'] * 5
+    assert len(calls) == 1
+
+
+def test_etag_igual_en_dos_aplicaciones_con_el_mismo_contenido(app):
+    from app import create_app
+    from app.test.conftest import TestConfig
+
+    def etag_de(application):
+        with application.app_context():
+            db.create_all()
+            db.session.add(Productos(nameProduct='Camisa', price=15, stock=2, status='Activo', category='Camisas'))
+            db.session.commit()
+            etag = application.test_client().get('/api/products').headers['ETag']
+            db.session.remove()
+            db.drop_all()
+            return etag
+
+    # Dos apps con su propia base de datos (como dos workers de gunicorn)
+    assert etag_de(create_app(TestConfig)) == etag_de(create_app(TestConfig))
+
+
+def test_loader_lento_no_guarda_un_valor_anterior_al_clear():
+    cache = TTLCache(maxsize=4, ttl=60)
+
+    def loader():
+        cache.clear()  # Un commit invalida la caché mientras se calcula el valor
+        return 'viejo'
+
+    assert cache.get_or_set('k', loader) == 'viejo'
+    assert cache.get('k') is None
+    assert cache.get_or_set('k', lambda: 'nuevo') == 'nuevo'
+    assert cache.get('k') == 'nuevo'
+
+
+def test_cambio_de_stock_conserva_relacionados_y_facetas(app):
+    product = Productos(nameProduct='Vestido', price=20, stock=3, status='Activo', category='Vestidos')
+    db.session.add(product)
+    db.session.commit()
+    catalog_cache.set(('related_map',), {'Vestidos': [product.idProduct]})
+    catalog_cache.set(('facets',), {})
+    catalog_cache.set(('product', product.idProduct), {'stock': 3})
+
+    product.stock = 2
+    db.session.commit()
+    assert catalog_cache.get(('related_map',)) is not None
+    assert catalog_cache.get(('facets',)) is not None
+    assert catalog_cache.get(('product', product.idProduct)) is None  # Muestra el stock
+
+    # Un UPDATE masivo que solo declara stock tampoco los expulsa; uno que no toca filas no invalida
+    catalog_cache.set(('product', product.idProduct), {'stock': 2})
+    db.session.execute(update(Productos).where(Productos.idProduct == -1).values(status='Inactivo'))
+    db.session.commit()
+    assert catalog_cache.get(('product', product.idProduct)) is not None
+    db.session.execute(update(Productos).where(Productos.idProduct == product.idProduct)
+                       .values(stock=1).execution_options(catalog_scope='stock'))
+    db.session.commit()
+    assert catalog_cache.get(('related_map',)) is not None
+    assert catalog_cache.get(('product', product.idProduct)) is None
+
+    # Cualquier otro cambio (precio, estado) vacía todo
+    product.price = 25
+    db.session.commit()
+    assert catalog_cache.get(('related_map',)) is None
+
+
+def test_estadisticas_y_vaciado_de_cache_solo_admin(app):
+    cliente = User(nameUser='ana', emailUser='ana@example.com')
+    cliente.set_password('secreto')
+    db.session.add(cliente)
+    db.session.commit()
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(cliente.idUser)
+    g.pop('_login_user', None)
+    assert client.get('/api/dashboard/cache').status_code == 403
+    g.pop('_login_user', None)
+    assert client.delete('/api/dashboard/cache').status_code == 403
+
+
+def test_etag_en_cache_no_llama_a_la_vista(client, monkeypatch):
+    from app.routes import products
+    db.session.add(Productos(nameProduct='Camisa', price=15, stock=2, status='Activo', category='Camisas'))
+    db.session.commit()
+    first = client.get('/api/products?limit=5')
+    etag = first.headers['ETag']
+
+    # Ni la vista ni jsonify se vuelven a ejecutar: el cuerpo y su ETag salen de la caché
+    monkeypatch.setattr(products, 'load_products', lambda *args: 1 / 0)
+    monkeypatch.setattr(products, 'jsonify', lambda *args: 1 / 0)
+    assert client.get('/api/products?limit=5', headers={'If-None-Match': etag}).status_code == 304
+    again = client.get('/api/products?limit=5')
+    assert again.status_code == 200 and again.data == first.data
+    assert again.headers['ETag'] == etag and again.mimetype == 'application/json'
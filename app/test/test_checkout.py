@@ -0,0 +1,58 @@
+from app import db
+from app.models.pedidos import Pedido, DetallePedido
+from app.models.products import Productos
+from app.models.usuarios import CartItem, User
+
+
+def preparar_carrito(stock_a=5, cantidad_a=2):
+    admin = User.query.filter_by(emailUser='admin@fashion.com').first()
+    a = Productos(nameProduct='A', category='Vestidos', price='10.10', stock=stock_a, status='Activo')
+    b = Productos(nameProduct='B', category='Vestidos', price='5.05', stock=1, status='Activo')
+    db.session.add_all([a, b])
+    db.session.commit()
+    db.session.add_all([
+        CartItem(idUser=admin.idUser, idProduct=a.idProduct, quantity=cantidad_a),
+        CartItem(idUser=admin.idUser, idProduct=b.idProduct, quantity=1),
+    ])
+    db.session.commit()
+    return a.idProduct, b.idProduct
+
+
+def test_checkout_crea_pedido_descuenta_stock_y_vacia_carrito(admin_client):
+    a_id, b_id = preparar_carrito()
+    response = admin_client.post('/api/cart/checkout')
+    assert response.status_code == 201
+    # El total sale solo de las líneas (order_totals), no de un cálculo aparte en el checkout
+    assert response.get_json()['pedido']['total'] == 25.25
+    pedido = db.session.get(Pedido, response.get_json()['pedido']['id'])
+
+    assert str(pedido.total) == '25.25'
+    assert DetallePedido.query.filter_by(idPedido=pedido.idPedido).count() == 2
+    assert CartItem.query.count() == 0
+    assert db.session.get(Productos, a_id).stock == 3
+    b = db.session.get(Productos, b_id)
+    assert (b.stock, b.status) == (0, 'Inactivo')
+
+
+def test_checkout_sin_stock_no_cambia_nada(admin_client):
+    a_id, b_id = preparar_carrito(stock_a=1, cantidad_a=2)
+    response = admin_client.post('/api/cart/checkout')
+    assert response.status_code == 409
+    assert response.get_json()['product_ids'] == [a_id]
+
+    assert Pedido.query.count() == 0
+    assert CartItem.query.count() == 2
+    assert db.session.get(Productos, b_id).stock == 1  # El descuento de B se deshizo
+
+
+def test_checkout_sin_agotar_conserva_relacionados_en_cache(admin_client):
+    from app.cache import catalog_cache
+    a_id, b_id = preparar_carrito()
+    # Con más stock de B nada se agota: solo cambia el stock
+    db.session.get(Productos, b_id).stock = 5
+    db.session.commit()
+    catalog_cache.set(('related_map',), {'Vestidos': [a_id, b_id]})
+
+    assert admin_client.post('/api/cart/checkout').status_code == 201
+    assert catalog_cache.get(('related_map',)) == {'Vestidos': [a_id, b_id]}
+    assert db.session.get(Productos, b_id).status == 'Activo'
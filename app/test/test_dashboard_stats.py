@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app import db
+from app.cache import stats_cache
+from app.models.pedidos import Pedido, DetallePedido
+from app.models.products import Productos
+from app.models.usuarios import User
+
+
+def test_estadisticas_del_dashboard_con_pedidos_reales(admin_client):
+    admin = User.query.filter_by(emailUser='admin@fashion.com').first()
+    a = Productos(nameProduct='A', category='Vestidos', price=10, stock=5, status='Activo')
+    b = Productos(nameProduct='B', category='Blusas', price=5, stock=5, status='Activo')
+    db.session.add_all([a, b])
+    db.session.commit()
+    ayer = Pedido(idUser=admin.idUser, fecha=datetime.utcnow() - timedelta(days=2), estado='Pagado',
+                  detalles=[DetallePedido(idProduct=b.idProduct, cantidad=9, precio_unitario=5)])
+    hoy = Pedido(idUser=admin.idUser, estado='Pagado',
+                 detalles=[DetallePedido(idProduct=a.idProduct, cantidad=2, precio_unitario=10),
+                           DetallePedido(idProduct=b.idProduct, cantidad=1, precio_unitario=5)])
+    cancelado = Pedido(idUser=admin.idUser, estado='Cancelado',
+                       detalles=[DetallePedido(idProduct=a.idProduct, cantidad=50, precio_unitario=10)])
+    pendiente = Pedido(idUser=admin.idUser, estado='Pendiente',
+                       detalles=[DetallePedido(idProduct=a.idProduct, cantidad=30, precio_unitario=10)])
+    db.session.add_all([ayer, hoy, cancelado, pendiente])
+    db.session.commit()
+    stats_cache.clear()
+
+    stats = admin_client.get('/api/dashboard/stats').get_json()
+    assert (stats['total_products'], stats['total_orders'], stats['total_users']) == (2, 4, 1)
+    assert stats['today_orders'] == 3
+    assert stats['today_income'] == 25.0  # Ni el cancelado ni el pendiente (sin pagar) cuentan
+    assert stats['recent_orders'][0]['customer'] == admin.nameUser
+    assert [(p['name'], p['sales']) for p in stats['popular_products']] == [('B', 10), ('A', 2)]
+
+    # Las siguientes pestañas reciben la copia cacheada sin consultar
+    statements = []
+    event.listen(db.engine, 'before_cursor_execute',
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+    assert admin_client.get('/api/dashboard/stats').get_json() == stats
+    assert not [s for s in statements if 'pedido' in s]
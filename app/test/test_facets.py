@@ -0,0 +1,33 @@
+from app import db
+from app.models.products import Productos
+
+
+def crear_catalogo():
+    db.session.add_all([
+        Productos(nameProduct='V1', category='Vestidos', price=30, stock=1, status='Activo'),
+        Productos(nameProduct='V2', category='Vestidos', price=120, stock=1, status='Activo'),
+        Productos(nameProduct='C1', category='Camisas', price=40, stock=1, status='Activo'),
+        Productos(nameProduct='C2', category='Camisas', price=45, stock=0, status='Inactivo'),
+    ])
+    db.session.commit()
+
+
+def test_facetas_por_categoria_y_precio(client):
+    crear_catalogo()
+    data = client.get('/api/products/facets').get_json()
+    assert data['total'] == 3
+    assert data['categories'] == [{'name': 'Camisas', 'count': 1}, {'name': 'Vestidos', 'count': 2}]
+    assert {r['label']: r['count'] for r in data['price_ranges']}['0-50'] == 2
+
+    data = client.get('/api/products/facets?categoria=Vestidos&rango=0-50').get_json()
+    assert data['total'] == 1
+    assert {c['name']: c['count'] for c in data['categories']} == {'Camisas': 1, 'Vestidos': 1}
+    assert {r['label']: r['count'] for r in data['price_ranges']}['100-200'] == 1
+
+
+def test_vista_productos_filtra_en_sql(client):
+    crear_catalogo()
+    response = client.get('/productos?categoria=Vestidos&rango=100-200')
+    assert response.status_code == 200
+    assert b'V2' in response.data
+    assert b'V1' not in response.data
@@ -0,0 +1,82 @@
+import warnings
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError, SAWarning
+
+from app import db
+from app.models.idempotencia import ClaveIdempotencia
+from app.models.products import Productos
+from app.models.usuarios import CartItem, User
+
+
+def test_reintento_con_la_misma_clave_no_repite_la_escritura(admin_client):
+    product = Productos(nameProduct='A', category='Vestidos', price=10, stock=5, status='Activo')
+    db.session.add(product)
+    db.session.commit()
+    headers = {'Idempotency-Key': 'movil-123'}
+    body = {'product_id': product.idProduct, 'quantity': 2}
+
+    first = admin_client.post('/api/cart/add', json=body, headers=headers)
+    assert first.get_json()['success'] is True
+
+    statements = []
+    event.listen(db.engine, 'before_cursor_execute',
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+    retry = admin_client.post('/api/cart/add', json=body, headers=headers)
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert retry.get_json() == first.get_json()
+    assert not [s for s in statements if 'cart_item' in s or 'FROM product' in s]
+    assert CartItem.query.one().quantity == 2
+
+    # Misma clave con otro cuerpo: error, no se reutiliza la respuesta
+    other = admin_client.post('/api/cart/add', json={'product_id': product.idProduct, 'quantity': 1}, headers=headers)
+    assert other.status_code == 422
+    # Sin clave, el flujo normal sigue funcionando
+    admin_client.post('/api/cart/add', json={'product_id': product.idProduct, 'quantity': 1})
+    assert CartItem.query.one().quantity == 3
+
+
+def test_clave_en_curso_y_clave_vencida(admin_client):
+    admin = User.query.filter_by(emailUser='admin@fashion.com').first()
+    product = Productos(nameProduct='A', category='Vestidos', price=10, stock=5, status='Activo')
+    db.session.add(product)
+    now = datetime.utcnow()
+    db.session.add(ClaveIdempotencia(idUser=admin.idUser, clave='en-curso', endpoint='cart.add_to_cart',
+                                     request_hash='x', created_at=now, expires_at=now + timedelta(hours=1)))
+    db.session.add(ClaveIdempotencia(idUser=admin.idUser, clave='vieja', endpoint='cart.add_to_cart',
+                                     request_hash='x', status_code=200, body='{}',
+                                     created_at=now - timedelta(days=2), expires_at=now - timedelta(days=1)))
+    db.session.commit()
+    body = {'product_id': product.idProduct, 'quantity': 1}
+
+    assert admin_client.post('/api/cart/add', json=body, headers={'Idempotency-Key': 'en-curso'}).status_code == 409
+    with warnings.catch_warnings():
+        # Reemplazar la clave vencida no deja una identidad duplicada en la sesión
+        warnings.simplefilter('error', SAWarning)
+        response = admin_client.post('/api/cart/add', json=body, headers={'Idempotency-Key': 'vieja'})
+    assert response.get_json()['success'] is True
+    assert 'Idempotent-Replayed' not in response.headers
+
+
+def test_error_de_base_de_datos_libera_la_clave(admin_client, monkeypatch):
+    product = Productos(nameProduct='A', category='Vestidos', price=10, stock=5, status='Activo')
+    db.session.add(product)
+    db.session.commit()
+    headers = {'Idempotency-Key': 'reintento'}
+    body = {'product_id': product.idProduct, 'quantity': 1}
+
+    def falla(self, delta):
+        raise OperationalError('UPDATE user', {}, Exception('database is locked'))
+
+    with monkeypatch.context() as patch:
+        patch.setattr(User, 'adjust_cart_count', falla)
+        response = admin_client.post('/api/cart/add', json=body, headers=headers)
+    assert response.status_code == 500
+    assert ClaveIdempotencia.query.filter_by(clave='reintento').count() == 0
+
+    # El reintento con la misma clave se ejecuta de verdad
+    retry = admin_client.post('/api/cart/add', json=body, headers=headers)
+    assert retry.get_json()['success'] is True
+    assert 'Idempotent-Replayed' not in retry.headers
+    assert CartItem.query.one().quantity == 1
@@ -0,0 +1,37 @@
+import io
+
+from app import db
+from app.importer import import_products, iter_rows
+from app.models.products import Productos
+
+
+def test_importa_csv_en_lotes_y_reporta_filas_invalidas(app):
+    csv_data = (
+        'name,category,price,stock,description\n'
+        'Vestido,Vestidos,30,2,Rojo\n'
+        'Sin precio,Vestidos,,2,\n'
+        'Camisa,Camisas,abc,1,\n'
+        'Falda,Faldas,15.5,4,\n'
+        'Abrigo,Abrigos,80,1,\n'
+    )
+    report = import_products(iter_rows(io.BytesIO(csv_data.encode('utf-8')), 'csv'), batch_size=2)
+    assert report.inserted == 3
+    assert [e['row'] for e in report.errors] == [3, 4]
+    assert Productos.query.count() == 3
+
+
+def test_upsert_jsonl_actualiza_los_ids_existentes(admin_client):
+    product = Productos(nameProduct='Viejo', category='Vestidos', price=10, stock=1, status='Activo')
+    db.session.add(product)
+    db.session.commit()
+
+    jsonl = (
+        f'{{"id": {product.idProduct}, "name": "Nuevo", "category": "Vestidos", "price": 12, "stock": 3}}\n'
+        '{"name": "Otro", "category": "Camisas", "price": 9, "stock": 1}\n'
+        'no es json\n'
+    )
+    response = admin_client.post('/api/products/import?format=jsonl&upsert=1', data=jsonl.encode('utf-8'),
+                           content_type='application/x-ndjson')
+    data = response.get_json()
+    assert (data['inserted'], data['updated'], data['failed']) == (1, 1, 1)
+    assert db.session.get(Productos, product.idProduct).nameProduct == 'Nuevo'
@@ -0,0 +1,88 @@
+from flask import g
+
+from app import db
+from app.models.products import Productos
+from app.models.usuarios import User
+
+
+def test_batch_actualiza_stock_precio_y_estado(admin_client):
+    a = Productos(nameProduct='A', category='Vestidos', price=10, stock=5, status='Activo')
+    b = Productos(nameProduct='B', category='Vestidos', price=20, stock=2, status='Activo')
+    c = Productos(nameProduct='C', category='Vestidos', price=30, stock=0, status='Inactivo')
+    db.session.add_all([a, b, c])
+    db.session.commit()
+
+    response = admin_client.post('/api/products/batch', json={'items': [
+        {'id': a.idProduct, 'stock': 0},
+        {'id': b.idProduct, 'stock_delta': -5, 'price': 18.5},
+        {'id': c.idProduct, 'stock_delta': 4},
+        {'id': 999, 'stock': 1},
+        {'id': 'x', 'stock': 1},
+        {'id': [a.idProduct], 'stock': 1},
+        {'id': {'n': 1}, 'stock': 1},
+        {'id': 1.5, 'stock': 1},
+    ]})
+    data = response.get_json()
+    results = data['results']
+
+    assert results[str(a.idProduct)] == {'success': True, 'stock': 0, 'price': 10.0, 'status': 'Inactivo'}
+    assert results[str(b.idProduct)]['stock'] == 0  # El delta no deja stock negativo
+    assert results[str(b.idProduct)]['price'] == 18.5
+    assert results[str(c.idProduct)]['status'] == 'Activo'
+    assert results['999']['success'] is False
+    # Ids que no se pueden leer: error por posición, no un 500
+    assert response.status_code == 200
+    assert [results[f'#{i}']['success'] for i in (4, 5, 6, 7)] == [False] * 4
+    assert (data['updated'], data['failed']) == (3, 5)
+
+
+def test_batch_rechaza_no_finitos_y_agrupa_ids_normalizados(admin_client):
+    producto = Productos(nameProduct='A', category='Vestidos', price=10, stock=5, status='Activo')
+    otro = Productos(nameProduct='B', category='Vestidos', price=20, stock=2, status='Activo')
+    db.session.add_all([producto, otro])
+    db.session.commit()
+    producto_id, otro_id = producto.idProduct, otro.idProduct
+
+    response = admin_client.post('/api/products/batch', json={'items': [
+        {'id': producto_id, 'price': float('nan')},
+        {'id': otro_id, 'price': float('inf')},
+        {'id': 77, 'stock': float('inf')},
+        {'id': 78, 'stock_delta': float('-inf')},
+    ]})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['failed'] == 4 and data['updated'] == 0
+    assert all(not result['success'] for result in data['results'].values())
+
+    # 5 y "5" son el mismo producto: un solo resultado (repetido) y la cuenta coincide
+    data = admin_client.post('/api/products/batch', json={'items': [
+        {'id': producto_id, 'stock': 3},
+        {'id': str(producto_id), 'price': 'nada'},
+    ]}).get_json()
+    assert list(data['results']) == [str(producto_id)]
+    assert data['results'][str(producto_id)]['message'] == 'Id repetido en el lote'
+    assert (data['updated'], data['failed']) == (0, 1)
+    assert db.session.get(Productos, producto_id).price == 10
+
+
+def test_batch_e_importacion_solo_admin(app):
+    producto = Productos(nameProduct='A', category='Vestidos', price=10, stock=5, status='Activo')
+    cliente = User(nameUser='ana', emailUser='ana@example.com')
+    cliente.set_password('secreto')
+    db.session.add_all([producto, cliente])
+    db.session.commit()
+    producto_id = producto.idProduct
+
+    client = app.test_client()
+    g.pop('_login_user', None)
+    assert client.post('/api/products/batch', json={'items': [{'id': producto_id, 'stock': 0}]}).status_code == 401
+
+    with client.session_transaction() as session:
+        session['_user_id'] = str(cliente.idUser)
+    g.pop('_login_user', None)
+    assert client.post('/api/products/batch', json={'items': [{'id': producto_id, 'stock': 0}]}).status_code == 403
+    g.pop('_login_user', None)
+    response = client.post('/api/products/import?format=jsonl', data=b'{"nameProduct": "X"}\n')
+    assert response.status_code == 403
+    db.session.expire_all()
+    assert db.session.get(Productos, producto_id).stock == 5
@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from app import db
+from app.models.pedidos import Pedido
+from app.models.usuarios import User
+
+
+def test_mis_pedidos_paginados_y_conteo(admin_client):
+    admin = User.query.filter_by(emailUser='admin@fashion.com').first()
+    otro = User(nameUser='ana', emailUser='ana@example.com')
+    otro.set_password('secreto')
+    db.session.add(otro)
+    db.session.commit()
+    inicio = datetime(2026, 3, 1)
+    db.session.add_all([Pedido(idUser=admin.idUser, fecha=inicio + timedelta(hours=i), total=10 + i) for i in range(5)])
+    db.session.add(Pedido(idUser=otro.idUser, fecha=inicio, total=99))
+    db.session.commit()
+
+    first = admin_client.get('/api/mis-pedidos?limit=3').get_json()
+    assert first['count'] == 5
+    assert [p['total'] for p in first['pedidos']] == [14.0, 13.0, 12.0]
+    second = admin_client.get(f"/api/mis-pedidos?limit=3&after={first['next_cursor']}").get_json()
+    assert [p['total'] for p in second['pedidos']] == [11.0, 10.0]
+    assert second['has_more'] is False
+
+    page = admin_client.get('/mis-pedidos?limit=3')
+    assert page.status_code == 200
+    assert b'5 pedidos en total' in page.data and b'Pedidos anteriores' in page.data
+
+
+def test_mis_pedidos_se_leen_solo_del_indice(app):
+    plan = ' '.join(str(row[-1]) for row in db.session.execute(text(
+        'EXPLAIN QUERY PLAN SELECT "idPedido", fecha, estado, total FROM pedido '
+        'WHERE "idUser" = 1 ORDER BY fecha DESC, "idPedido" DESC LIMIT 21'
+    )))
+    assert 'COVERING INDEX ix_pedido_usuario_fecha' in plan
+    assert 'TEMP B-TREE' not in plan
@@ -0,0 +1,66 @@
+from app import db
+from app.models.pedidos import Pedido, PedidoEvento
+from app.models.usuarios import User
+
+
+def crear_pedidos(estados):
+    admin = User.query.filter_by(emailUser='admin@fashion.com').first()
+    pedidos = [Pedido(idUser=admin.idUser, estado=estado) for estado in estados]
+    db.session.add_all(pedidos)
+    db.session.commit()
+    return [pedido.idPedido for pedido in pedidos]
+
+
+def test_cambio_de_estado_en_bloque_con_historial(admin_client, app):
+    app.config['ORDER_STATUS_BATCH_SIZE'] = 2
+    ids = crear_pedidos(['Pagado', 'Pagado', 'Pagado', 'Pendiente', 'Entregado'])
+
+    data = admin_client.post('/api/pedidos/estado', json={'ids': ids + [9999], 'estado': 'Enviado'}).get_json()
+    assert data['updated'] == ids[:3]
+    assert [s['id'] for s in data['skipped']] == ids[3:]
+    assert data['not_found'] == [9999]
+    assert data['failed'] == [] and data['success'] is True
+
+    estados = dict(db.session.query(Pedido.idPedido, Pedido.estado))
+    assert [estados[i] for i in ids] == ['Enviado', 'Enviado', 'Enviado', 'Pendiente', 'Entregado']
+    assert PedidoEvento.query.count() == 3
+
+    eventos = admin_client.get(f'/api/pedidos/{ids[0]}/eventos').get_json()
+    assert [(e['estado_anterior'], e['estado_nuevo']) for e in eventos] == [('Pagado', 'Enviado')]
+
+
+def test_transiciones_no_permitidas(admin_client):
+    ids = crear_pedidos(['Pendiente'])
+    assert admin_client.post('/api/pedidos/estado', json={'ids': ids, 'estado': 'Pendiente'}).status_code == 400
+    assert admin_client.post('/api/pedidos/estado', json={'ids': ids, 'estado': 'Enviado', 'desde': 'Pendiente'}).status_code == 400
+    assert admin_client.post('/api/pedidos/estado', json={'ids': ids, 'estado': 'Volando'}).status_code == 400
+    assert admin_client.post('/api/pedidos/estado', json={'estado': 'Pagado'}).status_code == 400
+    assert PedidoEvento.query.count() == 0
+
+
+def test_lote_fallido_devuelve_reporte_parcial(admin_client, app, monkeypatch):
+    from app import order_status
+    app.config['ORDER_STATUS_BATCH_SIZE'] = 2
+    ids = crear_pedidos(['Pagado'] * 5)
+
+    real_insert = order_status.insert
+    llamadas = []
+
+    def insert_que_falla_en_el_segundo_lote(table):
+        llamadas.append(table)
+        if len(llamadas) == 2:
+            raise RuntimeError('se cayó la conexión')
+        return real_insert(table)
+
+    monkeypatch.setattr(order_status, 'insert', insert_que_falla_en_el_segundo_lote)
+    response = admin_client.post('/api/pedidos/estado', json={'ids': ids, 'estado': 'Enviado'})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['success'] is False
+    assert data['updated'] == ids[:2] + ids[4:]
+    assert data['failed'] == ids[2:4]
+
+    # El lote que falló quedó como estaba; los demás se aplicaron
+    estados = dict(db.session.query(Pedido.idPedido, Pedido.estado))
+    assert [estados[i] for i in ids] == ['Enviado', 'Enviado', 'Pagado', 'Pagado', 'Enviado']
+    assert PedidoEvento.query.count() == 3
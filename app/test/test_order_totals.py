@@ -0,0 +1,60 @@
+from decimal import Decimal
+
+from sqlalchemy import insert, update
+
+from app import db, order_totals
+from app.models.pedidos import Pedido, DetallePedido
+from app.models.products import Productos
+from app.models.usuarios import User
+
+
+def crear_pedido():
+    admin = User.query.filter_by(emailUser='admin@fashion.com').first()
+    product = Productos(nameProduct='A', category='Vestidos', price='10.10', stock=5, status='Activo')
+    pedido = Pedido(idUser=admin.idUser)
+    db.session.add_all([product, pedido])
+    db.session.commit()
+    return pedido, product
+
+
+def test_total_se_mantiene_al_escribir_lineas(app):
+    pedido, product = crear_pedido()
+    assert pedido.total == Decimal('0.00')
+
+    linea = DetallePedido(idPedido=pedido.idPedido, idProduct=product.idProduct, cantidad=3, precio_unitario='10.10')
+    db.session.add(linea)
+    db.session.commit()
+    assert pedido.total == Decimal('30.30')
+
+    db.session.execute(insert(DetallePedido), [
+        {'idPedido': pedido.idPedido, 'idProduct': product.idProduct, 'cantidad': 1, 'precio_unitario': Decimal('0.10')},
+        {'idPedido': pedido.idPedido, 'idProduct': product.idProduct, 'cantidad': 2, 'precio_unitario': Decimal('0.20')},
+    ])
+    db.session.commit()
+    assert pedido.total == Decimal('30.80')
+
+    linea.cantidad = 1
+    db.session.commit()
+    assert pedido.total == Decimal('10.60')
+
+    db.session.delete(linea)
+    db.session.commit()
+    assert pedido.total == Decimal('0.50')
+    assert pedido.calcular_total() == Decimal('0.50')
+
+
+def test_recalcular_totales_por_lotes(app):
+    pedido, product = crear_pedido()
+    db.session.add(DetallePedido(idPedido=pedido.idPedido, idProduct=product.idProduct, cantidad=2, precio_unitario='10.10'))
+    db.session.commit()
+    otros = [Pedido(idUser=pedido.idUser) for _ in range(4)]
+    db.session.add_all(otros)
+    db.session.commit()
+
+    # Escritura directa que se salta el mantenimiento
+    db.session.execute(update(Pedido.__table__).values(total=99))
+    db.session.commit()
+
+    assert order_totals.recompute_all(batch_size=2) == (5, 5)
+    assert db.session.get(Pedido, pedido.idPedido).total == Decimal('20.20')
+    assert order_totals.recompute_all(batch_size=2) == (5, 0)
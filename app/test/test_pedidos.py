@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app import db
+from app.models.pedidos import Pedido, DetallePedido
+from app.models.products import Productos
+from app.models.usuarios import User
+
+
+def crear_pedidos(user_id, cantidad, inicio=datetime(2026, 1, 1)):
+    product = Productos(nameProduct='Blusa', category='Blusas', price=20, stock=50, status='Activo')
+    db.session.add(product)
+    db.session.commit()
+    for i in range(cantidad):
+        pedido = Pedido(idUser=user_id, fecha=inicio + timedelta(days=i), total=40,
+                        estado='Pagado' if i % 2 else 'Pendiente')
+        pedido.detalles = [DetallePedido(idProduct=product.idProduct, cantidad=2, precio_unitario=20)]
+        db.session.add(pedido)
+    db.session.commit()
+
+
+def login_como(client, user):
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.idUser)
+
+
+def test_pedidos_paginados_por_cursor_con_filtros(admin_client):
+    admin = User.query.filter_by(emailUser='admin@fashion.com').first()
+    crear_pedidos(admin.idUser, 5)
+
+    first = admin_client.get('/api/pedidos?limit=2').get_json()
+    assert [p['fecha'][:10] for p in first['pedidos']] == ['2026-01-05', '2026-01-04']
+    assert first['has_more'] is True
+    second = admin_client.get(f"/api/pedidos?limit=2&after={first['next_cursor']}").get_json()
+    third = admin_client.get(f"/api/pedidos?limit=2&after={second['next_cursor']}").get_json()
+    assert [p['fecha'][:10] for p in second['pedidos'] + third['pedidos']] == ['2026-01-03', '2026-01-02', '2026-01-01']
+    assert third['has_more'] is False and third['next_cursor'] is None
+    assert third['pedidos'][0]['detalles'][0]['product_name'] == 'Blusa'
+
+    data = admin_client.get('/api/pedidos?estado=Pagado&desde=2026-01-02&hasta=2026-01-03').get_json()
+    assert [p['fecha'][:10] for p in data['pedidos']] == ['2026-01-02']
+    assert admin_client.get('/api/pedidos?estado=Perdido').status_code == 400
+    assert admin_client.get('/api/pedidos?desde=ayer').status_code == 400
+
+
+def test_detalle_de_pedido_con_consultas_fijas_y_solo_del_dueno(client):
+    admin = User.query.filter_by(emailUser='admin@fashion.com').first()
+    ana = User(nameUser='ana', emailUser='ana@example.com')
+    ana.set_password('secreto')
+    db.session.add(ana)
+    db.session.commit()
+    crear_pedidos(admin.idUser, 1)
+    crear_pedidos(ana.idUser, 1)
+    pedido_admin = Pedido.query.filter_by(idUser=admin.idUser).first().idPedido
+    pedido_ana = Pedido.query.filter_by(idUser=ana.idUser).first().idPedido
+    login_como(client, ana)
+
+    statements = []
+    event.listen(db.engine, 'before_cursor_execute',
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+    data = client.get(f'/api/pedidos/{pedido_ana}').get_json()
+    assert data['total'] == 40.0 and len(data['detalles']) == 1
+    # pedido + detalles + productos (sin contar la carga del usuario de Flask-Login)
+    assert len([s for s in statements if 'FROM user' not in s]) == 3
+
+    assert client.get(f'/api/pedidos/{pedido_admin}').status_code == 404
+    assert [p['id'] for p in client.get('/api/pedidos').get_json()['pedidos']] == [pedido_ana]
+    assert b'Blusa' in client.get(f'/pedidos/{pedido_ana}').data
+
+
+def test_fecha_obligatoria_para_el_cursor(app):
+    import pytest
+    from sqlalchemy import insert
+    from sqlalchemy.exc import IntegrityError
+    admin = User.query.filter_by(emailUser='admin@fashion.com').first()
+    # Un NULL explícito (SQL directo, importaciones) ya no puede dejar un pedido fuera del cursor
+    with pytest.raises(IntegrityError):
+        db.session.execute(insert(Pedido.__table__).values(idUser=admin.idUser, fecha=None, total=0))
+    db.session.rollback()
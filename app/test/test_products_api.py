@@ -0,0 +1,66 @@
+from app import db
+from app.models.products import Productos
+
+
+def crear_productos(n, category='Vestidos'):
+    for i in range(n):
+        db.session.add(Productos(nameProduct=f'Producto {i}', description='x' * 50, price=10 + i,
+                                 stock=5, status='Activo', category=category))
+    db.session.add(Productos(nameProduct='Agotado', price=1, stock=0, status='Inactivo', category=category))
+    db.session.commit()
+
+
+def test_get_products_sin_parametros_devuelve_lista(client):
+    crear_productos(3)
+    response = client.get('/api/products')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert len(data) == 3
+    assert data[0]['description'] == 'x' * 50
+
+
+def test_get_products_keyset_recorre_todas_las_paginas(client):
+    crear_productos(5)
+    ids, after = [], None
+    while True:
+        url = '/api/products?limit=2' + (f'&after={after}' if after else '')
+        data = client.get(url).get_json()
+        ids += [p['id'] for p in data['products']]
+        after = data['next_cursor']
+        if not data['has_more']:
+            break
+    assert len(ids) == 5
+    assert ids == sorted(ids)
+
+
+def test_get_products_fields_proyecta_columnas(client):
+    crear_productos(2)
+    data = client.get('/api/products?fields=id,name,price&limit=10').get_json()
+    assert set(data['products'][0]) == {'id', 'name', 'price'}
+
+    response = client.get('/api/products?fields=id,secreto')
+    assert response.status_code == 400
+
+
+def test_relacionados_salen_del_mapa_precalculado(app):
+    from app.routes.products import related_map
+    crear_productos(6)
+    crear_productos(1, category='Camisas')
+
+    mapping = related_map()
+    assert len(mapping['Vestidos']) == 5  # RELATED_LIMIT + 1
+    assert 'Camisas' in mapping
+    inactivo = Productos.query.filter_by(status='Inactivo').first()
+    assert inactivo.idProduct not in mapping['Vestidos']
+
+
+def test_exportacion_ndjson_en_streaming(admin_client):
+    import json
+    crear_productos(3)
+    response = admin_client.get('/api/products/export?fields=id,name')
+    assert response.is_streamed
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [set(line) for line in lines] == [{'id', 'name'}] * 3
+
+    data = admin_client.get('/api/products/export?format=json&status=all').get_json()
+    assert len(data) == 4
@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+
+from app import db, report_jobs
+from app.models.pedidos import Pedido
+from app.models.reportes import Reporte, DetalleReporte, TrabajoReporte
+from app.models.usuarios import User
+
+
+def crear_pedidos():
+    admin = User.query.filter_by(emailUser='admin@fashion.com').first()
+    estados = ['Pagado', 'Enviado', 'Cancelado', 'Pagado', 'Pendiente']
+    db.session.add_all([
+        Pedido(idUser=admin.idUser, fecha=datetime(2026, 9, 1 + i), total=10 * (i + 1), estado=estado)
+        for i, estado in enumerate(estados)
+    ])
+    db.session.add(Pedido(idUser=admin.idUser, fecha=datetime(2026, 10, 1), total=999, estado='Pagado'))
+    db.session.commit()
+
+
+def test_trabajo_de_reporte_de_ventas_por_lotes(admin_client, app):
+    app.config['REPORT_JOB_WORKERS'] = 0  # En la misma petición para la prueba
+    app.config['REPORT_JOB_BATCH_SIZE'] = 2
+    crear_pedidos()
+
+    response = admin_client.post('/reportes/jobs', json={'tipo': 'ventas', 'desde': '2026-09-01', 'hasta': '2026-09-30'})
+    assert response.status_code == 202
+    job_id = response.get_json()['id']
+
+    data = admin_client.get(response.headers['Location']).get_json()
+    assert data['estado'] == 'Completado'
+    assert (data['progreso'], data['procesados'], data['total']) == (100, 3, 3)
+    assert data['duracion_ms'] is not None
+
+    reporte = db.session.get(Reporte, data['reporte_id'])
+    assert reporte.total_pedidos == 3
+    assert float(reporte.total_ventas) == 10 + 20 + 40
+    assert DetalleReporte.query.filter_by(idReporte=reporte.idReporte).count() == 3
+    assert db.session.get(TrabajoReporte, job_id).idReporte == reporte.idReporte
+
+
+def test_validacion_y_cola_llena(admin_client, app):
+    app.config['REPORT_JOB_MAX_PENDING'] = 1
+    assert admin_client.post('/reportes/jobs', json={'tipo': 'otro', 'desde': '2026-09-01', 'hasta': '2026-09-30'}).status_code == 400
+    assert admin_client.post('/reportes/jobs', json={'tipo': 'ventas', 'desde': 'ayer', 'hasta': '2026-09-30'}).status_code == 400
+
+    admin = User.query.filter_by(emailUser='admin@fashion.com').first()
+    db.session.add(TrabajoReporte(idUser=admin.idUser, tipo='ventas', estado='En proceso'))
+    db.session.commit()
+    response = admin_client.post('/reportes/jobs', json={'tipo': 'ventas', 'desde': '2026-09-01', 'hasta': '2026-09-30'})
+    assert response.status_code == 429
+
+
+def test_lote_fallido_borra_el_reporte_a_medias(admin_client, app, monkeypatch):
+    app.config['REPORT_JOB_WORKERS'] = 0
+    app.config['REPORT_JOB_BATCH_SIZE'] = 2
+    crear_pedidos()
+    real_insert = report_jobs.insert
+    calls = []
+
+    def insert_que_falla(*args):
+        calls.append(args)
+        if len(calls) == 2:
+            raise RuntimeError('conexión perdida')
+        return real_insert(*args)
+
+    monkeypatch.setattr(report_jobs, 'insert', insert_que_falla)
+    response = admin_client.post('/reportes/jobs', json={'tipo': 'ventas', 'desde': '2026-09-01', 'hasta': '2026-09-30'})
+    data = admin_client.get(response.headers['Location']).get_json()
+    assert data['estado'] == 'Error' and data['reporte_id'] is None
+    assert 'conexión perdida' in data['error']
+    # El primer lote ya se había confirmado: no queda nada visible en /reportes
+    assert Reporte.query.count() == 0
+    assert DetalleReporte.query.count() == 0
+
+
+def test_trabajos_abandonados_no_bloquean_la_cola(admin_client, app):
+    app.config['REPORT_JOB_WORKERS'] = 0
+    app.config['REPORT_JOB_MAX_PENDING'] = 1
+    admin = User.query.filter_by(emailUser='admin@fashion.com').first()
+    hace_una_hora = datetime.utcnow() - timedelta(hours=1)
+    reporte = Reporte(idUser=admin.idUser, tipo='Ventas a medias', detalles=[
+        DetalleReporte(descripcion='Pedido #1', monto=10)])
+    db.session.add(reporte)
+    db.session.commit()
+    # El proceso murió con este trabajo en curso
+    huerfano = TrabajoReporte(idUser=admin.idUser, tipo='ventas', estado='En proceso', idReporte=reporte.idReporte,
+                              created_at=hace_una_hora, started_at=hace_una_hora, updated_at=hace_una_hora)
+    db.session.add(huerfano)
+    db.session.commit()
+
+    response = admin_client.post('/reportes/jobs', json={'tipo': 'ventas', 'desde': '2026-09-01', 'hasta': '2026-09-30'})
+    assert response.status_code == 202
+    huerfano = db.session.get(TrabajoReporte, huerfano.idTrabajo)
+    assert huerfano.estado == 'Error' and huerfano.idReporte is None
+    assert 'abandonado' in huerfano.error
+    assert Reporte.query.filter_by(tipo='Ventas a medias').count() == 0
+    assert DetalleReporte.query.filter_by(descripcion='Pedido #1').count() == 0
@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+
+from flask import g
+from sqlalchemy import event
+
+from app import db
+from app.models.reportes import Reporte, DetalleReporte, TrabajoReporte
+from app.models.usuarios import User
+
+
+def crear_reportes(cantidad):
+    admin = User.query.filter_by(emailUser='admin@fashion.com').first()
+    inicio = datetime(2026, 5, 1, 12)
+    for i in range(cantidad):
+        reporte = Reporte(idUser=admin.idUser, fecha_generacion=inicio + timedelta(days=i), tipo=f'R{i}',
+                          total_pedidos=i, total_ventas=i * 10)
+        reporte.detalles = [DetalleReporte(descripcion='d', monto=1), DetalleReporte(descripcion='e', monto=2)]
+        db.session.add(reporte)
+    db.session.commit()
+    return admin
+
+
+def consultas_de(client, url):
+    statements = []
+    # La carga del usuario de la sesión no cuenta
+    listener = lambda conn, cursor, statement, *args: 'FROM user' in statement or statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    data = client.get(url).get_json()
+    event.remove(db.engine, 'before_cursor_execute', listener)
+    return data, len(statements)
+
+
+def test_consultas_constantes_y_paginacion(admin_client):
+    client = admin_client
+    admin = crear_reportes(3)
+    admin_id, admin_name = admin.idUser, admin.nameUser
+    db.session.expire_all()
+    pocos, consultas_pocos = consultas_de(client, '/reportes')
+    crear_reportes(12)
+    db.session.expire_all()
+    muchos, consultas_muchos = consultas_de(client, '/reportes?limit=50')
+
+    assert consultas_pocos == consultas_muchos == 1  # reportes + usuario en un JOIN, sin detalles
+    assert len(muchos['reportes']) == 15
+    assert pocos['reportes'][0]['usuario'] == admin_name
+    assert 'detalles' not in pocos['reportes'][0]
+
+    first = client.get('/reportes/fecha?inicio=2026-05-01&fin=2026-05-02&limit=3').get_json()
+    assert [r['fecha_generacion'] for r in first['reportes']] == ['2026-05-02 12:00'] * 2 + ['2026-05-01 12:00']
+    second = client.get(f"/reportes/fecha?inicio=2026-05-01&fin=2026-05-02&limit=3&after={first['next_cursor']}").get_json()
+    assert len(second['reportes']) == 1 and second['has_more'] is False
+
+    por_usuario = client.get(f'/reportes/usuario/{admin_id}?limit=10').get_json()
+    assert por_usuario['has_more'] is True
+    assert client.get('/reportes?after=nada').status_code == 400
+
+
+def test_solo_admin_y_sin_reportes_a_medias(app, admin_client):
+    admin = crear_reportes(2)
+    a_medias = Reporte(idUser=admin.idUser, tipo='Ventas a medias')
+    db.session.add(a_medias)
+    db.session.flush()
+    db.session.add(TrabajoReporte(idUser=admin.idUser, tipo='ventas', estado='En proceso', idReporte=a_medias.idReporte))
+    db.session.commit()
+    a_medias_id = a_medias.idReporte
+
+    data = admin_client.get('/reportes').get_json()
+    assert [r['tipo'] for r in data['reportes']] == ['R1', 'R0']
+    assert admin_client.get(f'/reportes/{a_medias_id}/detalles').status_code == 404
+
+    # Las peticiones de prueba comparten el contexto de la app: se olvida el usuario cacheado en g
+    client = app.test_client()  # Otro navegador, sin sesión
+    g.pop('_login_user', None)
+    assert client.get('/reportes').status_code == 401
+
+    cliente = User(nameUser='ana', emailUser='ana@example.com')
+    cliente.set_password('secreto')
+    db.session.add(cliente)
+    db.session.commit()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(cliente.idUser)
+    for url in ('/reportes', '/reportes/fecha?inicio=2026-05-01&fin=2026-05-02',
+                f'/reportes/usuario/{admin.idUser}', f'/reportes/{a_medias_id - 1}/detalles'):
+        g.pop('_login_user', None)
+        assert client.get(url).status_code == 403
+
+
+def test_detalles_paginados(admin_client):
+    admin = crear_reportes(1)
+    reporte = Reporte.query.filter_by(idUser=admin.idUser).first()
+    reporte.detalles.extend(DetalleReporte(descripcion=f'p{i}', monto=i) for i in range(3))
+    db.session.commit()
+    reporte_id = reporte.idReporte
+
+    first = admin_client.get(f'/reportes/{reporte_id}/detalles?limit=3').get_json()
+    assert [d['descripcion'] for d in first['detalles']] == ['d', 'e', 'p0']
+    assert first['has_more'] is True and first['limit'] == 3
+    second = admin_client.get(f"/reportes/{reporte_id}/detalles?limit=3&after={first['next_cursor']}").get_json()
+    assert [d['descripcion'] for d in second['detalles']] == ['p1', 'p2']
+    assert second['has_more'] is False and second['next_cursor'] is None
+    assert admin_client.get(f'/reportes/{reporte_id}/detalles?after=x').status_code == 400
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+from app import db
+from app.models.products import Productos
+from app.models.reservas import ReservaStock
+from app.models.usuarios import CartItem, User
+from app.reservations import available_stock, sweep_expired
+
+
+def test_reserva_aparta_stock_y_bloquea_a_otros_compradores(admin_client):
+    admin = User.query.filter_by(emailUser='admin@fashion.com').first()
+    otro = User(nameUser='otro', emailUser='otro@example.com')
+    otro.set_password('x')
+    product = Productos(nameProduct='Drop', category='Zapatos', price=100, stock=3, status='Activo')
+    db.session.add_all([otro, product])
+    db.session.commit()
+    db.session.add_all([
+        CartItem(idUser=admin.idUser, idProduct=product.idProduct, quantity=2),
+        CartItem(idUser=otro.idUser, idProduct=product.idProduct, quantity=2),
+    ])
+    db.session.commit()
+
+    response = admin_client.post('/api/cart/reserve')
+    assert response.status_code == 200
+    assert available_stock([product.idProduct])[product.idProduct]['available'] == 1
+    assert admin_client.get(f'/api/products/{product.idProduct}/availability').get_json()['reserved'] == 2
+
+    # El otro comprador no puede llevarse las unidades apartadas
+    from app.checkout import checkout, CheckoutError
+    try:
+        checkout(otro.idUser)
+        assert False, 'debió fallar'
+    except CheckoutError:
+        pass
+
+    # El dueño de la reserva sí compra, y la reserva se libera
+    assert admin_client.post('/api/cart/checkout').status_code == 201
+    assert ReservaStock.query.count() == 0
+    assert db.session.get(Productos, product.idProduct).stock == 1
+
+
+def test_barrido_de_reservas_vencidas_por_lotes(app):
+    admin = User.query.filter_by(emailUser='admin@fashion.com').first()
+    product = Productos(nameProduct='P', category='Zapatos', price=1, stock=10, status='Activo')
+    db.session.add(product)
+    db.session.commit()
+    past = datetime.utcnow() - timedelta(minutes=1)
+    db.session.add_all([ReservaStock(idUser=admin.idUser, idProduct=product.idProduct, cantidad=1, expires_at=past)
+                        for _ in range(5)])
+    db.session.commit()
+
+    assert available_stock([product.idProduct])[product.idProduct]['available'] == 10  # Vencidas no cuentan
+    assert sweep_expired(batch_size=2) == 5
+    assert ReservaStock.query.count() == 0
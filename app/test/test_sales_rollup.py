@@ -0,0 +1,121 @@
+from datetime import datetime, timedelta
+
+from app import db, order_status, sales_rollup
+from app.models.pedidos import Pedido, DetallePedido
+from app.models.products import Productos
+from app.models.reportes import VentaDiaria, VentaPedido
+from app.models.usuarios import User
+
+
+def resumen():
+    return {
+        (row.dia.isoformat(), row.categoria): (row.pedidos, row.unidades, str(row.ingresos))
+        for row in VentaDiaria.query.all() if row.pedidos or row.unidades
+    }
+
+
+def preparar_pedidos():
+    admin = User.query.filter_by(emailUser='admin@fashion.com').first()
+    vestido = Productos(nameProduct='V', category='Vestidos', price=10, stock=50, status='Activo')
+    blusa = Productos(nameProduct='B', category='Blusas', price=5, stock=50, status='Activo')
+    db.session.add_all([vestido, blusa])
+    db.session.commit()
+    hoy = datetime.utcnow()
+    pedidos = [
+        Pedido(idUser=admin.idUser, fecha=hoy, detalles=[
+            DetallePedido(idProduct=vestido.idProduct, cantidad=2, precio_unitario='10.10'),
+            DetallePedido(idProduct=blusa.idProduct, cantidad=1, precio_unitario='5.05')]),
+        Pedido(idUser=admin.idUser, fecha=hoy, detalles=[
+            DetallePedido(idProduct=vestido.idProduct, cantidad=1, precio_unitario='10.10')]),
+        Pedido(idUser=admin.idUser, fecha=hoy - timedelta(days=1), detalles=[
+            DetallePedido(idProduct=blusa.idProduct, cantidad=4, precio_unitario='5.00')]),
+    ]
+    db.session.add_all(pedidos)
+    db.session.commit()
+    return [pedido.idPedido for pedido in pedidos], hoy.date().isoformat(), (hoy - timedelta(days=1)).date().isoformat()
+
+
+def test_resumen_se_actualiza_al_pagar_y_cancelar(app):
+    ids, hoy, ayer = preparar_pedidos()
+    assert resumen() == {}  # Los pedidos pendientes no cuentan
+
+    order_status.transition(ids, 'Pagado')
+    assert resumen() == {
+        (hoy, '*'): (2, 4, '35.35'),
+        (hoy, 'Vestidos'): (2, 3, '30.30'),
+        (hoy, 'Blusas'): (1, 1, '5.05'),
+        (ayer, '*'): (1, 4, '20.00'),
+        (ayer, 'Blusas'): (1, 4, '20.00'),
+    }
+
+    order_status.transition([ids[1]], 'Enviado')  # Sigue contando: sin cambios
+    order_status.transition([ids[0]], 'Cancelado')
+    expected = {
+        (hoy, '*'): (1, 1, '10.10'),
+        (hoy, 'Vestidos'): (1, 1, '10.10'),
+        (ayer, '*'): (1, 4, '20.00'),
+        (ayer, 'Blusas'): (1, 4, '20.00'),
+    }
+    assert resumen() == expected
+
+    # La reconstrucción por lotes llega al mismo resultado
+    db.session.query(VentaDiaria).delete()
+    db.session.commit()
+    assert sales_rollup.backfill(batch_size=1) == 2
+    assert resumen() == expected
+
+
+def test_reporte_de_ventas_desde_el_resumen(admin_client):
+    ids, hoy, ayer = preparar_pedidos()
+    order_status.transition(ids, 'Pagado')
+
+    data = admin_client.get('/api/reports/sales?dias=7').get_json()
+    assert data['total_sales'] == 55.35
+    assert data['total_orders'] == 3
+    assert data['average_order'] == 18.45
+    assert data['top_categories'] == [{'name': 'Vestidos', 'sales': 30.3}, {'name': 'Blusas', 'sales': 25.05}]
+    assert len(data['sales_trend']) == 7
+    assert data['sales_trend'][-2:] == [20.0, 35.35]
+    assert data['moving_average'][-1] == round((20.0 + 35.35) / 7, 2)
+
+
+def test_cancelar_resta_lo_sumado_aunque_cambie_la_categoria(app):
+    ids, hoy, ayer = preparar_pedidos()
+    order_status.transition(ids, 'Pagado')
+
+    # Después de pagar: cambia la categoría y se borra el otro producto (idProduct pasa a NULL)
+    vestido = Productos.query.filter_by(nameProduct='V').first()
+    vestido.category = 'Faldas'
+    db.session.commit()
+    db.session.execute(DetallePedido.__table__.update().where(
+        DetallePedido.idProduct == Productos.query.filter_by(nameProduct='B').first().idProduct
+    ).values(idProduct=None))
+    db.session.commit()
+
+    order_status.transition(ids, 'Cancelado')
+    assert resumen() == {}
+    assert all(row.ingresos == 0 and row.pedidos == 0 and row.unidades == 0 for row in VentaDiaria.query)
+    assert VentaPedido.query.count() == 0
+
+
+def test_editar_o_borrar_un_pedido_pagado_actualiza_el_resumen(app):
+    ids, hoy, ayer = preparar_pedidos()
+    order_status.transition(ids, 'Pagado')
+
+    # Editar una línea de un pedido pagado: se resta lo anterior y se suma lo nuevo
+    linea = DetallePedido.query.filter_by(idPedido=ids[1]).first()
+    linea.cantidad = 3
+    db.session.commit()
+    assert resumen()[(hoy, 'Vestidos')] == (2, 5, '50.50')
+
+    # Borrar un pedido pagado lo resta
+    db.session.delete(db.session.get(Pedido, ids[2]))
+    db.session.commit()
+    assert (ayer, '*') not in resumen()
+
+    # Un pedido creado ya pagado también cuenta
+    vestido = Productos.query.filter_by(nameProduct='V').first()
+    db.session.add(Pedido(idUser=linea.pedido.idUser, estado='Pagado', fecha=datetime.utcnow(), detalles=[
+        DetallePedido(idProduct=vestido.idProduct, cantidad=1, precio_unitario='1.00')]))
+    db.session.commit()
+    assert resumen()[(hoy, '*')] == (3, 7, '56.55')
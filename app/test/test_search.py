@@ -0,0 +1,57 @@
+import pytest
+
+from app import db, search
+from app.models.products import Productos
+
+
+@pytest.fixture
+def indice(app):
+    # Lo que hace la migración c41f08b2d9e7 (create_app ya no ejecuta DDL)
+    search.ensure_search_index()
+
+
+def test_busqueda_por_prefijo_sin_acentos_y_ranking(client, indice):
+    db.session.add_all([
+        Productos(nameProduct='Vestido rojo', description='Algodón', price=30, stock=2,
+                  status='Activo', category='Vestidos'),
+        Productos(nameProduct='Camisa', description='Combina con tu vestido', price=20, stock=2,
+                  status='Activo', category='Camisas'),
+        Productos(nameProduct='Vestido azul', description='', price=25, stock=0,
+                  status='Inactivo', category='Vestidos'),
+    ])
+    db.session.commit()
+
+    data = client.get('/api/products/search?q=vest').get_json()
+    names = [p['name'] for p in data['products']]
+    assert names == ['Vestido rojo', 'Camisa']  # El nombre pesa más que la descripción
+
+    assert client.get('/api/products/search?q=algodon').get_json()['products'][0]['name'] == 'Vestido rojo'
+
+
+def test_indice_sigue_a_las_actualizaciones(client, indice):
+    product = Productos(nameProduct='Falda', description='', price=10, stock=1,
+                        status='Activo', category='Faldas')
+    db.session.add(product)
+    db.session.commit()
+
+    product.nameProduct = 'Pantalón'
+    db.session.commit()
+    assert client.get('/api/products/search?q=falda').get_json()['products'][0]['name'] == 'Pantalón'  # categoría
+    assert client.get('/api/products/search?q=pantalon').get_json()['products']
+
+    db.session.delete(product)
+    db.session.commit()
+    assert client.get('/api/products/search?q=pantalon').get_json()['products'] == []
+    assert client.get('/api/products/search').status_code == 400
+
+
+def test_sin_indice_el_arranque_no_crea_nada_y_se_usa_like(app, client):
+    assert app.extensions['search_backend'] == 'like'
+    assert search.detect_backend() == 'like'  # create_app solo lo comprobó
+    db.session.add(Productos(nameProduct='Vestido rojo', description='', price=30, stock=2,
+                             status='Activo', category='Vestidos'))
+    db.session.commit()
+    assert [p['name'] for p in client.get('/api/products/search?q=vest').get_json()['products']] == ['Vestido rojo']
+
+    result = app.test_cli_runner().invoke(args=['products', 'search-index'])
+    assert 'fts5' in result.output and app.extensions['search_backend'] == 'fts5'
@@ -27,6 +27,63 @@ class Config:
     RESET_TOKEN_EXPIRATION = int(os.environ.get('RESET_TOKEN_EXPIRATION', 3600))  # 1 hora por defecto
     VERIFICATION_CODE_EXPIRATION = int(os.environ.get('VERIFICATION_CODE_EXPIRATION', 600))  # 10 minutos por defecto
     
+    # Paginación por cursor del catálogo (/api/products?limit=&after=)
+    PRODUCTS_PAGE_SIZE = int(os.environ.get('PRODUCTS_PAGE_SIZE', 50))
+    PRODUCTS_PAGE_MAX = int(os.environ.get('PRODUCTS_PAGE_MAX', 200))
+    
+    # Filas por lote (y por commit) en la importación masiva de productos
+    IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 500))
+    
+    # Filas por vuelta del cursor en la exportación en streaming del catálogo
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+    
+    # Máximo de productos distintos en el carrito de invitado (vive en la cookie de sesión)
+    GUEST_CART_MAX_ITEMS = int(os.environ.get('GUEST_CART_MAX_ITEMS', 50))
+    
+    # Minutos que se aparta el stock de un carrito en proceso de pago
+    STOCK_HOLD_MINUTES = int(os.environ.get('STOCK_HOLD_MINUTES', 10))
+    
+    # Horas que se guarda la respuesta de una Idempotency-Key y segundos tras los que
+    # una petición que nunca terminó libera su clave
+    IDEMPOTENCY_TTL_HOURS = int(os.environ.get('IDEMPOTENCY_TTL_HOURS', 24))
+    IDEMPOTENCY_LOCK_SECONDS = int(os.environ.get('IDEMPOTENCY_LOCK_SECONDS', 30))
+    
+    # Tamaño por defecto y máximo de página de /api/pedidos
+    ORDERS_PAGE_SIZE = int(os.environ.get('ORDERS_PAGE_SIZE', 20))
+    ORDERS_PAGE_MAX = int(os.environ.get('ORDERS_PAGE_MAX', 100))
+    
+    # Tamaño por defecto y máximo de página de los listados de /reportes
+    REPORTS_PAGE_SIZE = int(os.environ.get('REPORTS_PAGE_SIZE', 20))
+    REPORTS_PAGE_MAX = int(os.environ.get('REPORTS_PAGE_MAX', 100))
+    
+    # Hilos para generar reportes en segundo plano (0 = en la misma petición), trabajos
+    # en cola como máximo y pedidos leídos por lote
+    REPORT_JOB_WORKERS = int(os.environ.get('REPORT_JOB_WORKERS', 2))
+    REPORT_JOB_MAX_PENDING = int(os.environ.get('REPORT_JOB_MAX_PENDING', 10))
+    REPORT_JOB_BATCH_SIZE = int(os.environ.get('REPORT_JOB_BATCH_SIZE', 1000))
+    # Minutos sin avance tras los que un trabajo pendiente o en proceso se da por abandonado
+    # (el proceso murió o se reinició) y deja de ocupar la cola
+    REPORT_JOB_STALE_MINUTES = int(os.environ.get('REPORT_JOB_STALE_MINUTES', 30))
+    
+    # Pedidos por lote (y por commit) en los cambios de estado en bloque, y máximo por petición
+    ORDER_STATUS_BATCH_SIZE = int(os.environ.get('ORDER_STATUS_BATCH_SIZE', 500))
+    ORDER_STATUS_MAX_IDS = int(os.environ.get('ORDER_STATUS_MAX_IDS', 10000))
+    
+    # Caché en memoria del catálogo (número de entradas y segundos de vida)
+    CATALOG_CACHE_SIZE = int(os.environ.get('CATALOG_CACHE_SIZE', 1024))
+    CATALOG_CACHE_TTL = int(os.environ.get('CATALOG_CACHE_TTL', 300))
+    
+    # Segundos que se reutilizan las estadísticas del dashboard entre peticiones
+    DASHBOARD_STATS_TTL = int(os.environ.get('DASHBOARD_STATS_TTL', 30))
+    
+    # Segundos que se reutilizan las tendencias y cohortes de ventas, y pedidos leídos
+    # por lote al cargarlas en memoria
+    ANALYTICS_CACHE_TTL = int(os.environ.get('ANALYTICS_CACHE_TTL', 600))
+    ANALYTICS_CHUNK_SIZE = int(os.environ.get('ANALYTICS_CHUNK_SIZE', 50000))
+    
+    # Días máximos de un rango de ventas, tendencias o cohortes (los rangos mayores se recortan)
+    ANALYTICS_MAX_DAYS = int(os.environ.get('ANALYTICS_MAX_DAYS', 731))
+    
     # Google OAuth Configuration
     GOOGLE_OAUTH_CLIENT_ID = os.environ.get('GOOGLE_OAUTH_CLIENT_ID')
     GOOGLE_OAUTH_CLIENT_SECRET = os.environ.get('GOOGLE_OAUTH_CLIENT_SECRET')
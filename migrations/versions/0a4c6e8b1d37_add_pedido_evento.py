@@ -0,0 +1,39 @@
+"""add pedido evento
+
+Revision ID: 0a4c6e8b1d37
+Revises: f3b9d2e6a481
+Create Date: 2026-10-18 14:02:37.604118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0a4c6e8b1d37'
+down_revision = 'f3b9d2e6a481'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('pedido_evento',
+    sa.Column('idEvento', sa.Integer(), nullable=False),
+    sa.Column('idPedido', sa.Integer(), nullable=False),
+    sa.Column('estado_anterior', sa.String(length=20), nullable=False),
+    sa.Column('estado_nuevo', sa.String(length=20), nullable=False),
+    sa.Column('idUser', sa.Integer(), nullable=True),
+    sa.Column('fecha', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['idPedido'], ['pedido.idPedido'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['idUser'], ['user.idUser'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('idEvento')
+    )
+    with op.batch_alter_table('pedido_evento', schema=None) as batch_op:
+        batch_op.create_index('ix_pedido_evento_pedido', ['idPedido', 'fecha'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('pedido_evento', schema=None) as batch_op:
+        batch_op.drop_index('ix_pedido_evento_pedido')
+
+    op.drop_table('pedido_evento')
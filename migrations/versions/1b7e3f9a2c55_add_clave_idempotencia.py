@@ -0,0 +1,42 @@
+"""add clave idempotencia
+
+Revision ID: 1b7e3f9a2c55
+Revises: 0a4c6e8b1d37
+Create Date: 2026-10-18 14:36:51.270493
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1b7e3f9a2c55'
+down_revision = '0a4c6e8b1d37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('clave_idempotencia',
+    sa.Column('idClave', sa.Integer(), nullable=False),
+    sa.Column('idUser', sa.Integer(), nullable=False),
+    sa.Column('clave', sa.String(length=64), nullable=False),
+    sa.Column('endpoint', sa.String(length=64), nullable=False),
+    sa.Column('request_hash', sa.String(length=64), nullable=False),
+    sa.Column('status_code', sa.Integer(), nullable=True),
+    sa.Column('body', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['idUser'], ['user.idUser'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('idClave'),
+    sa.UniqueConstraint('idUser', 'clave', name='uq_idempotencia_usuario_clave')
+    )
+    with op.batch_alter_table('clave_idempotencia', schema=None) as batch_op:
+        batch_op.create_index('ix_idempotencia_expira', ['expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('clave_idempotencia', schema=None) as batch_op:
+        batch_op.drop_index('ix_idempotencia_expira')
+
+    op.drop_table('clave_idempotencia')
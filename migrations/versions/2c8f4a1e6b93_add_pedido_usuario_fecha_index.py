@@ -0,0 +1,30 @@
+"""add pedido usuario fecha index
+
+Revision ID: 2c8f4a1e6b93
+Revises: 1b7e3f9a2c55
+Create Date: 2026-10-18 15:08:12.904531
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2c8f4a1e6b93'
+down_revision = '1b7e3f9a2c55'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('pedido', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_pedido_usuario_fecha',
+            ['idUser', sa.text('fecha DESC'), sa.text('idPedido DESC'), 'estado', 'total'],
+            unique=False
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('pedido', schema=None) as batch_op:
+        batch_op.drop_index('ix_pedido_usuario_fecha')
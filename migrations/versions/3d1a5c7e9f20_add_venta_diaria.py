@@ -0,0 +1,34 @@
+"""add venta diaria
+
+Revision ID: 3d1a5c7e9f20
+Revises: 2c8f4a1e6b93
+Create Date: 2026-10-18 15:47:26.118342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3d1a5c7e9f20'
+down_revision = '2c8f4a1e6b93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('venta_diaria',
+    sa.Column('idVenta', sa.Integer(), nullable=False),
+    sa.Column('dia', sa.Date(), nullable=False),
+    sa.Column('categoria', sa.String(length=50), nullable=False),
+    sa.Column('pedidos', sa.Integer(), nullable=False),
+    sa.Column('unidades', sa.Integer(), nullable=False),
+    sa.Column('ingresos', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.PrimaryKeyConstraint('idVenta'),
+    sa.UniqueConstraint('dia', 'categoria', name='uq_venta_diaria_dia_categoria')
+    )
+    # Rellenar con: flask dashboard backfill-sales
+
+
+def downgrade():
+    op.drop_table('venta_diaria')
@@ -0,0 +1,28 @@
+"""add reporte indexes
+
+Revision ID: 4e6b8d0f2a71
+Revises: 3d1a5c7e9f20
+Create Date: 2026-10-18 16:20:48.337905
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4e6b8d0f2a71'
+down_revision = '3d1a5c7e9f20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('reporte', schema=None) as batch_op:
+        batch_op.create_index('ix_reporte_fecha', ['fecha_generacion', 'idReporte'], unique=False)
+        batch_op.create_index('ix_reporte_usuario_fecha', ['idUser', 'fecha_generacion', 'idReporte'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('reporte', schema=None) as batch_op:
+        batch_op.drop_index('ix_reporte_usuario_fecha')
+        batch_op.drop_index('ix_reporte_fecha')
@@ -0,0 +1,46 @@
+"""add trabajo reporte
+
+Revision ID: 5f7c9e1b3d82
+Revises: 4e6b8d0f2a71
+Create Date: 2026-10-18 16:58:03.461227
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5f7c9e1b3d82'
+down_revision = '4e6b8d0f2a71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('trabajo_reporte',
+    sa.Column('idTrabajo', sa.Integer(), nullable=False),
+    sa.Column('idUser', sa.Integer(), nullable=False),
+    sa.Column('tipo', sa.String(length=50), nullable=False),
+    sa.Column('parametros', sa.Text(), nullable=True),
+    sa.Column('estado', sa.Enum('Pendiente', 'En proceso', 'Completado', 'Error', name='estado_trabajo'), nullable=False),
+    sa.Column('procesados', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=True),
+    sa.Column('idReporte', sa.Integer(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('duracion_ms', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['idReporte'], ['reporte.idReporte'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['idUser'], ['user.idUser'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('idTrabajo')
+    )
+    with op.batch_alter_table('trabajo_reporte', schema=None) as batch_op:
+        batch_op.create_index('ix_trabajo_reporte_estado', ['estado'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('trabajo_reporte', schema=None) as batch_op:
+        batch_op.drop_index('ix_trabajo_reporte_estado')
+
+    op.drop_table('trabajo_reporte')
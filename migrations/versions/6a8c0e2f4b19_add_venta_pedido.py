@@ -0,0 +1,39 @@
+"""add venta pedido
+
+Revision ID: 6a8c0e2f4b19
+Revises: 5f7c9e1b3d82
+Create Date: 2026-10-19 10:12:40.527193
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6a8c0e2f4b19'
+down_revision = '5f7c9e1b3d82'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('venta_pedido',
+    sa.Column('idVentaPedido', sa.Integer(), nullable=False),
+    sa.Column('idPedido', sa.Integer(), nullable=False),
+    sa.Column('dia', sa.Date(), nullable=False),
+    sa.Column('categoria', sa.String(length=50), nullable=False),
+    sa.Column('pedidos', sa.Integer(), nullable=False),
+    sa.Column('unidades', sa.Integer(), nullable=False),
+    sa.Column('ingresos', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.PrimaryKeyConstraint('idVentaPedido')
+    )
+    with op.batch_alter_table('venta_pedido', schema=None) as batch_op:
+        batch_op.create_index('ix_venta_pedido_pedido', ['idPedido'], unique=False)
+    # Rellenar venta_pedido (y rehacer venta_diaria) con: flask dashboard backfill-sales
+
+
+def downgrade():
+    with op.batch_alter_table('venta_pedido', schema=None) as batch_op:
+        batch_op.drop_index('ix_venta_pedido_pedido')
+
+    op.drop_table('venta_pedido')
@@ -0,0 +1,26 @@
+"""add trabajo reporte updated_at
+
+Revision ID: 7b9d1f3a5c20
+Revises: 6a8c0e2f4b19
+Create Date: 2026-10-19 11:03:18.904512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b9d1f3a5c20'
+down_revision = '6a8c0e2f4b19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('trabajo_reporte', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('trabajo_reporte', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,39 @@
+"""make pedido fecha not null
+
+Revision ID: 8c0e2a4f6d31
+Revises: 7b9d1f3a5c20
+Create Date: 2026-10-19 12:20:44.316027
+
+Los pedidos sin fecha quedaban fuera de la paginación por cursor (fecha, idPedido)
+y rompían el next_cursor. Se les asigna la fecha de su primer evento de estado o,
+si no tienen ninguno, la fecha de la migración. Después conviene ejecutar
+``flask dashboard backfill-sales`` para que venta_diaria los cuente en su día.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c0e2a4f6d31'
+down_revision = '7b9d1f3a5c20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        UPDATE pedido SET fecha = COALESCE(
+            (SELECT MIN(pedido_evento.fecha) FROM pedido_evento
+             WHERE pedido_evento.idPedido = pedido.idPedido),
+            CURRENT_TIMESTAMP
+        )
+        WHERE fecha IS NULL
+    """)
+    with op.batch_alter_table('pedido', schema=None) as batch_op:
+        batch_op.alter_column('fecha', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('pedido', schema=None) as batch_op:
+        batch_op.alter_column('fecha', existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,58 @@
+"""add product search index
+
+Revision ID: c41f08b2d9e7
+Revises: a7c3e91d5b20
+Create Date: 2026-10-18 11:03:27.218604
+
+SQLite: tabla virtual FTS5 product_fts (contenido externo) + triggers de sincronización.
+MySQL: índice FULLTEXT ft_product_search sobre (nameProduct, description, category).
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41f08b2d9e7'
+down_revision = 'a7c3e91d5b20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS product_fts USING fts5(
+            nameProduct, description, category,
+            content='product', content_rowid='idProduct',
+            tokenize='unicode61 remove_diacritics 2'
+        )""")
+        op.execute("""CREATE TRIGGER IF NOT EXISTS product_fts_ai AFTER INSERT ON product BEGIN
+            INSERT INTO product_fts(rowid, nameProduct, description, category)
+            VALUES (new.idProduct, new.nameProduct, new.description, new.category);
+        END""")
+        op.execute("""CREATE TRIGGER IF NOT EXISTS product_fts_ad AFTER DELETE ON product BEGIN
+            INSERT INTO product_fts(product_fts, rowid, nameProduct, description, category)
+            VALUES ('delete', old.idProduct, old.nameProduct, old.description, old.category);
+        END""")
+        op.execute("""CREATE TRIGGER IF NOT EXISTS product_fts_au AFTER UPDATE OF nameProduct, description, category ON product BEGIN
+            INSERT INTO product_fts(product_fts, rowid, nameProduct, description, category)
+            VALUES ('delete', old.idProduct, old.nameProduct, old.description, old.category);
+            INSERT INTO product_fts(rowid, nameProduct, description, category)
+            VALUES (new.idProduct, new.nameProduct, new.description, new.category);
+        END""")
+        op.execute("INSERT INTO product_fts(product_fts) VALUES ('rebuild')")
+    elif dialect in ('mysql', 'mariadb'):
+        op.create_index('ft_product_search', 'product', ['nameProduct', 'description', 'category'],
+                        mysql_prefix='FULLTEXT')
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS product_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS product_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS product_fts_ai")
+        op.execute("DROP TABLE IF EXISTS product_fts")
+    elif dialect in ('mysql', 'mariadb'):
+        op.drop_index('ft_product_search', table_name='product')
@@ -0,0 +1,43 @@
+"""add stock reservations
+
+Revision ID: d82b5f3c1a64
+Revises: c41f08b2d9e7
+Create Date: 2026-10-18 12:40:09.771352
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd82b5f3c1a64'
+down_revision = 'c41f08b2d9e7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('reserva_stock',
+    sa.Column('idReserva', sa.Integer(), nullable=False),
+    sa.Column('idUser', sa.Integer(), nullable=False),
+    sa.Column('idProduct', sa.Integer(), nullable=False),
+    sa.Column('cantidad', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['idProduct'], ['product.idProduct'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['idUser'], ['user.idUser'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('idReserva')
+    )
+    with op.batch_alter_table('reserva_stock', schema=None) as batch_op:
+        batch_op.create_index('ix_reserva_producto_expira', ['idProduct', 'expires_at'], unique=False)
+        batch_op.create_index('ix_reserva_usuario', ['idUser'], unique=False)
+        batch_op.create_index('ix_reserva_expira', ['expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('reserva_stock', schema=None) as batch_op:
+        batch_op.drop_index('ix_reserva_expira')
+        batch_op.drop_index('ix_reserva_usuario')
+        batch_op.drop_index('ix_reserva_producto_expira')
+
+    op.drop_table('reserva_stock')
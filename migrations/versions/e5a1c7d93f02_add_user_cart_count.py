@@ -0,0 +1,32 @@
+"""add user cart count
+
+Revision ID: e5a1c7d93f02
+Revises: d82b5f3c1a64
+Create Date: 2026-10-18 13:05:44.215730
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a1c7d93f02'
+down_revision = 'd82b5f3c1a64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('cart_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Inicializar el contador con los carritos existentes
+    op.execute(
+        'UPDATE user SET cart_count = '
+        '(SELECT COUNT(*) FROM cart_item WHERE cart_item.idUser = user.idUser)'
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('cart_count')
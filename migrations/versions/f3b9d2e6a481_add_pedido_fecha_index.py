@@ -0,0 +1,26 @@
+"""add pedido fecha index
+
+Revision ID: f3b9d2e6a481
+Revises: e5a1c7d93f02
+Create Date: 2026-10-18 13:31:02.518904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b9d2e6a481'
+down_revision = 'e5a1c7d93f02'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('pedido', schema=None) as batch_op:
+        batch_op.create_index('ix_pedido_fecha', ['fecha', 'idPedido'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('pedido', schema=None) as batch_op:
+        batch_op.drop_index('ix_pedido_fecha')